@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Seeded synthetic question-bank generator for benchmarks.
+
+Subjects follow the real bank's shape (a few topics, skewed subtopics) and
+review state follows a typical learner: most questions unseen, review counts
+geometric, recent reviews more likely than old ones.
+
+    python3 benchmarks/generate_bank.py 100k -o /tmp/bank.csv
+"""
+import argparse
+import csv
+import random
+import datetime
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# (topic, weight, subtopics) -- subtopic popularity is Zipf-like within a topic
+TOPICS = [
+    ("GK", 0.55, ["General", "History", "Geography", "Polity", "Science", "Economy", "Current Affairs"]),
+    ("English", 0.30, ["General", "Grammar", "Vocabulary", "Idioms", "Comprehension"]),
+    ("Computer", 0.15, ["General", "MS Office", "Networking", "Hardware"]),
+]
+
+WORDS = ("which who what when where year state india first known famous river capital "
+         "article constitution vitamin invented founded largest national festival word "
+         "meaning synonym antonym phrase correct shortcut memory network protocol key").split()
+
+REVIEWED_FRACTION = 0.35
+RECENT_DAYS = 60
+
+def parse_size(value):
+    value = value.lower()
+    return SIZES[value] if value in SIZES else int(value)
+
+def _subjects(rng):
+    topics = [t for t, _, _ in TOPICS]
+    weights = [w for _, w, _ in TOPICS]
+    subtopics = {t: subs for t, _, subs in TOPICS}
+    while True:
+        topic = rng.choices(topics, weights)[0]
+        subs = subtopics[topic]
+        sub = rng.choices(subs, [1.0 / (i + 1) for i in range(len(subs))])[0]
+        yield topic, sub
+
+def _sentence(rng, lo, hi):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi))).capitalize()
+
+def generate_rows(n, seed=42):
+    """Yields CSV rows in the ingest format: Topic,Subtopic,Pattern,Question,A,B,C,D,Answer,Source"""
+    rng = random.Random(seed)
+    subjects = _subjects(rng)
+    for i in range(n):
+        topic, sub = next(subjects)
+        # Question numbers keep every generated question distinct
+        question = f"{_sentence(rng, 6, 18)} #{i}?"
+        options = [f"{_sentence(rng, 1, 4)} {i}{letter}" for letter in "abcd"]
+        answer = rng.choice(options)
+        yield [topic, sub, "Standard MCQ", question, *options, answer, "synthetic"]
+
+def generate_questions(n, seed=42):
+    """Yields tuples ready for ingestion.save_questions()."""
+    for row in generate_rows(n, seed):
+        topic, sub, _, question, a, b, c, d, answer, _ = row
+        subject = f"{topic} - {sub}"
+        correct = "ABCD"[[a, b, c, d].index(answer)]
+        yield (subject, question, a, b, c, d, correct)
+
+def generate_reviews(question_ids, seed=42, now=None):
+    """
+    Yields (question_id, review_count, last_reviewed_ts, recall_score) progress
+    rows for the reviewed subset of `question_ids`.
+    """
+    rng = random.Random(seed + 1)
+    now = now or datetime.datetime.now()
+    for qid in question_ids:
+        if rng.random() >= REVIEWED_FRACTION:
+            continue
+        count = 1
+        while rng.random() < 0.55:
+            count += 1
+        age = datetime.timedelta(days=min(RECENT_DAYS, rng.expovariate(1 / 7.0)))
+        # Well-practised questions drift towards mastery
+        recall = min(1.0, rng.betavariate(1 + count, 2))
+        yield (qid, count, int((now - age).timestamp()), round(recall, 3))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic question bank CSV")
+    parser.add_argument("size", help="10k, 100k, 1m or an integer")
+    parser.add_argument("-o", "--output", required=True, help="CSV file to write")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Topic", "Subtopic", "Pattern", "Question", "A", "B", "C", "D", "Answer", "Source"])
+        writer.writerows(generate_rows(parse_size(args.size), args.seed))
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
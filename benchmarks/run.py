@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Reproducible benchmark suite.
+
+Builds a seeded synthetic bank per size in a scratch directory and measures
+ingest throughput, session selection (SQLite, in-memory and study pack), per-answer and
+batched updates, search, analytics aggregation, report export latency,
+multi-device sync imports and progress resets through the real code paths.
+
+    python3 benchmarks/run.py --sizes 10k 100k          # run and compare to baseline
+    python3 benchmarks/run.py --sizes 10k --save-baseline
+
+Exits with status 1 if any metric regresses past --threshold versus
+benchmarks/baseline.json.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src import db, profiling
+import generate_bank
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+INGEST_BATCH = 50_000
+
+def latency_stats(prefix, samples):
+    values = sorted(samples)
+    return {
+        f"{prefix}_p50_ms": profiling.percentile(values, 50) * 1000,
+        f"{prefix}_p95_ms": profiling.percentile(values, 95) * 1000,
+    }
+
+def time_calls(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def chunks(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def bench_size(n, seed, repeats):
+    from src import ingestion, session, memory, analytics
+
+    results = {}
+
+    # 1. Ingest throughput
+    ingest_seconds = 0.0
+    for batch in chunks(generate_bank.generate_questions(n, seed), INGEST_BATCH):
+        start = time.perf_counter()
+        ingestion.save_questions(batch)
+        ingest_seconds += time.perf_counter() - start
+    results["ingest_rows_per_sec"] = n / ingest_seconds
+
+    # Realistic review state (setup, not measured)
+    conn = db.get_connection()
+    ids = [r[0] for r in conn.execute("SELECT id FROM questions")]
+    with conn:
+        conn.executemany("""
+            INSERT INTO progress (user_id, question_id, review_count, last_reviewed_ts, recall_score)
+            VALUES (?, ?, ?, ?, ?)
+        """, ((db.DEFAULT_USER, *row) for row in generate_bank.generate_reviews(ids, seed)))
+
+    # 2. Session selection
+    mgr = session.SessionManager()
+    results.update(latency_stats("select", time_calls(lambda: mgr.get_questions_for_session(20), repeats)))
+
+    # 2b. The same selection from the in-memory replica (load timed once)
+    from src.store import QuestionStore
+    start = time.perf_counter()
+    replica = QuestionStore.load()
+    results["store_load_ms"] = (time.perf_counter() - start) * 1000
+    mgr_mem = session.SessionManager(store=replica)
+    results.update(latency_stats("select_memory", time_calls(lambda: mgr_mem.get_questions_for_session(20), repeats)))
+
+    # 2c. A study pack of the whole bank: build once, then open + pick a session (what pack-study does)
+    from src import pack
+    pack_path = os.path.join("data", "bank.pack")
+    start = time.perf_counter()
+    pack.build(conn, pack_path)
+    results["pack_build_ms"] = (time.perf_counter() - start) * 1000
+    def pack_session():
+        with pack.StudyPack(pack_path) as study_pack:
+            for i in pack.select(study_pack, 20):
+                study_pack.question(i)
+    results.update(latency_stats("pack_session", time_calls(pack_session, repeats)))
+
+    # 3. Per-answer update (trainer warmed first so the sklearn import isn't counted)
+    engine = memory.MemoryEngine(verbose=False)
+    engine.ensure_trainer()
+    rng = random.Random(seed)
+    answer = lambda: engine.update_question_stats(rng.choice(ids), rng.random() < 0.7, rng.uniform(1, 15))
+    results.update(latency_stats("update", time_calls(answer, repeats)))
+
+    # 3b. Batched submission (an offline import or client sync of 500 reviews)
+    batch = [(rng.choice(ids), rng.random() < 0.7, rng.uniform(1, 15)) for _ in range(500)]
+    start = time.perf_counter()
+    engine.update_many(batch)
+    results["update_many_rows_per_sec"] = len(batch) / (time.perf_counter() - start)
+
+    # 3c. Full-text search. A word plus a question number is the typical lookup;
+    # two common words match most of the bank, so every hit gets ranked.
+    from src import search
+    target = f"article {n // 2}"
+    results.update(latency_stats("search", time_calls(lambda: search.search(target), repeats)))
+    results.update(latency_stats("search_broad", time_calls(lambda: search.search("article constitution"), repeats)))
+
+    # 4. Analytics aggregation (everything the sidebar asks for)
+    engine_a = analytics.AnalyticsEngine()
+    def aggregate():
+        engine_a.get_overall_stats()
+        engine_a.get_subject_performance()
+        engine_a.get_mastery_prediction()
+    results.update(latency_stats("analytics", time_calls(aggregate, repeats)))
+
+    # 5. Report export
+    report = os.path.join("data", "analytics_report.txt")
+    results.update(latency_stats("export", time_calls(lambda: engine_a.export_to_text(report), max(1, repeats // 10))))
+
+    # 5b. Multi-device merge: 20k reviews made on another copy of the bank, exported and imported here
+    from src import sync
+    import sqlite3
+    other = os.path.join("data", "other.db")
+    target = sqlite3.connect(other)
+    conn.backup(target)
+    target.close()
+    since = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM review_log").fetchone()[0]
+    db.DB_PATH, main_path = other, db.DB_PATH
+    device = memory.MemoryEngine(verbose=False)
+    for start in range(0, 20_000, 2_000):
+        device.update_many([(rng.choice(ids), rng.random() < 0.7, rng.uniform(1, 15), 1_760_000_000 + start + i)
+                            for i in range(2_000)], user_id="phone")
+    count, _ = sync.export(db.get_connection(), os.path.join("data", "phone.jsonl.gz"), since)
+    db.DB_PATH = main_path
+    conn = db.get_connection() # switching DB_PATH closed the old one
+    start = time.perf_counter()
+    sync.import_file(conn, os.path.join("data", "phone.jsonl.gz"))
+    results["sync_import_rows_per_sec"] = count / (time.perf_counter() - start)
+
+    # 6. Progress reset (last: it hides everything above) and the lazy cleanup after it
+    from src import resets
+    start = time.perf_counter()
+    resets.reset(conn, db.DEFAULT_USER)
+    results["reset_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    collected = resets.collect(conn)
+    results["collect_rows_per_sec"] = collected / (time.perf_counter() - start)
+    return results
+
+def run(sizes, seed, repeats):
+    all_results = {}
+    for label in sizes:
+        n = generate_bank.parse_size(label)
+        workdir = tempfile.mkdtemp(prefix=f"viva-bench-{label}-")
+        cwd = os.getcwd()
+        try:
+            # Relative data/ and models/ paths resolve inside the scratch dir
+            os.chdir(workdir)
+            db.DB_PATH = os.path.join(workdir, "data", "questions.db")
+            db.close()
+            print(f"[{label}] building {n} questions...")
+            all_results[label] = bench_size(n, seed, repeats)
+            for key, value in all_results[label].items():
+                print(f"[{label}] {key:<24} {value:12.3f}")
+        finally:
+            db.close()
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return all_results
+
+def compare(results, baseline, threshold):
+    """Returns human-readable regressions; throughput metrics (*_per_sec) must not drop."""
+    regressions = []
+    for label, metrics in results.items():
+        for key, value in metrics.items():
+            base = baseline.get(label, {}).get(key)
+            if not base:
+                continue
+            if key.endswith("_per_sec"):
+                regressed = value < base * (1 - threshold)
+            else:
+                regressed = value > base * (1 + threshold)
+            if regressed:
+                regressions.append(f"{label} {key}: {value:.3f} vs baseline {base:.3f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Viva-LDA benchmark suite")
+    parser.add_argument("--sizes", nargs="+", default=["10k"], help="Bank sizes: 10k 100k 1m (or integers)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=200, help="Timed calls per latency metric")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to benchmarks/baseline.json")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.seed, args.repeats)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    payload = {"seed": args.seed, "repeats": args.repeats, "results": results}
+    for path in (os.path.join(RESULTS_DIR, f"{stamp}.json"), os.path.join(RESULTS_DIR, "latest.json")):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("No baseline yet; run with --save-baseline to create one.")
+        return 0
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("REGRESSIONS:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
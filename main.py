@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 import sys
 import os
+import time
 import argparse
-from src import ingestion, session
+
+# Subcommand modules are imported inside their branches so that `--help` or
+# `ingest` never pay for sklearn, NumPy or rich.
 
 def main():
+    if "--profile-startup" in sys.argv:
+        import atexit
+        from src import startup
+        atexit.register(startup.enable().report)
+
     parser = argparse.ArgumentParser(description="Offline MPSC LDA Memory Revision System")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import times on exit")
     
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
@@ -17,30 +26,268 @@ def main():
     # Ingest Directory Command
     ingest_dir_parser = subparsers.add_parser("ingest-dir", help="Ingest all PDFs in a directory")
     ingest_dir_parser.add_argument("dir_path", help="Path to the directory")
-    ingest_dir_parser.add_argument("--subject", help="Subject tag (optional, defaults to dir name)")
+    ingest_dir_parser.add_argument("--subject", help="Has no effect: CSV rows carry their own topic and subtopic columns")
+    ingest_dir_parser.add_argument("--profile", nargs="?", const="data/profile.json", metavar="PATH", help="Write a JSON timing summary (default: data/profile.json)")
 
     # Start Session Command
     start_parser = subparsers.add_parser("start", help="Start a revision session")
     start_parser.add_argument("-n", "--count", type=int, default=20, help="Number of questions")
-    start_parser.add_argument("--subject", help="Filter by subject")
+    start_parser.add_argument("--subject", help="Filter by subject, topic or path prefix (e.g. English, 'GK - Comp')")
+    start_parser.add_argument("--user", default="default", help="Learner whose progress to use")
+    start_parser.add_argument("--profile", nargs="?", const="data/profile.json", metavar="PATH", help="Write a JSON timing summary (default: data/profile.json)")
+    start_parser.add_argument("--resume", action="store_true", help="Continue the last interrupted session")
+    start_parser.add_argument("--auto-maintain", action="store_true", help="Compact the database after the session if it is fragmented")
+    start_parser.add_argument("--in-memory", action="store_true", help="Pick questions from an in-memory copy of the bank")
+    start_parser.add_argument("--feedback-delay", type=float, default=1.5, help="Seconds to show feedback (any key skips)")
+
+    # Search Command
+    search_parser = subparsers.add_parser("search", help="Full-text search over questions and options")
+    search_parser.add_argument("query", help="Words to find, e.g. \"Article 370\" (word* for prefixes)")
+    search_parser.add_argument("--subject", help="Limit to a subject, topic or path prefix")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum results to list (--start drills every match)")
+    search_parser.add_argument("--start", action="store_true", help="Drill the results in a revision session")
+    search_parser.add_argument("-n", "--count", type=int, default=20, help="Questions per session (with --start)")
+    search_parser.add_argument("--user", default="default", help="Learner whose progress to use (with --start)")
+
+    # Export Command
+    export_parser = subparsers.add_parser("export", help="Export questions and review state for offline analysis")
+    export_parser.add_argument("--format", choices=["npz", "parquet", "csv"], default="npz", help="Output format")
+    export_parser.add_argument("--output", default="data/export", help="Output directory")
+    export_parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per batch")
+    export_parser.add_argument("--user", default="default", help="Learner whose progress to export")
+
+    # Simulate Command
+    sim_parser = subparsers.add_parser("simulate", help="Headless load test with simulated learners (runs on DB copies)")
+    sim_parser.add_argument("--sessions", type=int, default=30, help="Sessions per learner")
+    sim_parser.add_argument("-n", "--count", type=int, default=20, help="Questions per session")
+    sim_parser.add_argument("--subject", help="Filter by subject")
+    sim_parser.add_argument("--learners", type=int, default=1, help="Parallel learners (one process each)")
+    sim_parser.add_argument("--gap-hours", type=float, default=24.0, help="Simulated time between sessions")
+    sim_parser.add_argument("--stability", type=float, default=1.0, help="Initial memory stability in days")
+    sim_parser.add_argument("--growth", type=float, default=2.0, help="Stability multiplier after a successful recall")
+    sim_parser.add_argument("--seed", type=int, default=0)
+
+    # Database Maintenance Command
+    maintain_parser = subparsers.add_parser("db-maintain", help="Check, optimize and compact the database")
+    maintain_parser.add_argument("--budget", type=float, default=2.0, help="Seconds to spend releasing free pages")
+    maintain_parser.add_argument("--vacuum", action="store_true", help="Full VACUUM instead (blocks writers; converts old files)")
+
+    # Sync Commands
+    sync_export_parser = subparsers.add_parser("sync-export", help="Write the reviews logged since the last sync for another device")
+    sync_export_parser.add_argument("path", help="Output file (e.g. reviews.jsonl.gz)")
+    sync_export_parser.add_argument("--peer", help="Device it is for: exports only what it wasn't sent before")
+    sync_export_parser.add_argument("--since", type=int, default=0, help="Log position to start after (without --peer)")
+
+    sync_import_parser = subparsers.add_parser("sync-import", help="Merge reviews exported on another device")
+    sync_import_parser.add_argument("path", help="File written by sync-export")
+
+    # Study Pack Commands
+    pack_parser = subparsers.add_parser("pack", help="Compile questions into a study pack for slow machines")
+    pack_parser.add_argument("--subject", help="Subject, topic or path prefix to include (default: the whole bank)")
+    pack_parser.add_argument("--user", default="default", help="Learner whose progress goes into the pack")
+    pack_parser.add_argument("-o", "--output", help="Pack file (default: data/packs/<subject>.pack)")
+
+    pack_study_parser = subparsers.add_parser("pack-study", help="Run a session straight off a study pack (no database)")
+    pack_study_parser.add_argument("pack_path", help="Pack file written by `pack`")
+    pack_study_parser.add_argument("-n", "--count", type=int, default=20, help="Number of questions")
+    pack_study_parser.add_argument("--feedback-delay", type=float, default=1.5, help="Seconds to show feedback (any key skips)")
+
+    pack_sync_parser = subparsers.add_parser("pack-sync", help="Apply answers given on a study pack to the database")
+    pack_sync_parser.add_argument("answers_path", help="The pack's .answers.jsonl file")
+
+    # Backup Command
+    backup_parser = subparsers.add_parser("backup", help="Write a compressed snapshot of the database (safe during sessions)")
+    backup_parser.add_argument("--dir", default="data/backups", help="Snapshot directory")
+    backup_parser.add_argument("--keep", type=int, default=10, help="Snapshots to keep (0 keeps all)")
+
+    # Restore Command
+    restore_parser = subparsers.add_parser("restore", help="Replace the database with a snapshot")
+    restore_parser.add_argument("snapshot", nargs="?", default="latest", help="Snapshot file, or 'latest'")
+    restore_parser.add_argument("--dir", default="data/backups", help="Snapshot directory")
+    restore_parser.add_argument("-y", "--yes", action="store_true", help="Don't ask for confirmation")
+
+    # Serve Command
+    serve_parser = subparsers.add_parser("serve", help="Serve the local HTTP/JSON API for many learners")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--readers", type=int, default=8, help="Threads serving read requests")
+    serve_parser.add_argument("--batch-size", type=int, default=64, help="Max answers per write commit")
+    serve_parser.add_argument("--batch-ms", type=float, default=10.0, help="Max wait for a write batch to fill")
+    serve_parser.add_argument("--in-memory", action="store_true", help="Serve sessions from an in-memory copy of the bank")
+    serve_parser.add_argument("--profile", nargs="?", const="data/profile.json", metavar="PATH", help="Write a JSON timing summary (default: data/profile.json)")
 
     args = parser.parse_args()
     
+    profile_path = getattr(args, "profile", None)
+    if profile_path:
+        from src import profiling
+        profiling.enable()
+        try:
+            run_command(parser, args)
+        finally:
+            profiling.write_summary(profile_path)
+    else:
+        run_command(parser, args)
+
+def run_command(parser, args):
     if args.command == "ingest":
+        from src import ingestion
         if not os.path.exists(args.pdf_path):
             print(f"Error: File not found: {args.pdf_path}")
             return
         ingestion.ingest_pdf(args.pdf_path, args.subject)
 
     elif args.command == "ingest-dir":
+        from src import ingestion
         if not os.path.isdir(args.dir_path):
             print(f"Error: Directory not found: {args.dir_path}")
             return
         ingestion.ingest_directory(args.dir_path, args.subject)
 
     elif args.command == "start":
-        mgr = session.SessionManager()
-        mgr.run_session(count=args.count, subject=args.subject)
+        from src import session
+        replica = None
+        if args.in_memory:
+            from src.store import QuestionStore
+            replica = QuestionStore.load()
+        mgr = session.SessionManager(user_id=args.user, store=replica, auto_maintain=args.auto_maintain)
+        mgr.run_session(count=args.count, subject=args.subject, feedback_delay=args.feedback_delay,
+                        resume=args.resume)
+
+    elif args.command == "search":
+        from src import search
+        try:
+            # A session draws from every match; --limit only trims the listing
+            results = search.search(args.query, args.subject, None if args.start else args.limit)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return
+        if not results:
+            print(f"No questions match \"{args.query}\".")
+            return
+        if args.start:
+            from src import session
+            mgr = session.SessionManager(user_id=args.user)
+            mgr.run_session(count=args.count, question_ids=[r["id"] for r in results])
+            return
+        for r in results:
+            print(f"[{r['id']:>6}] {r['subject']}")
+            print(f"         {r['snippet']}")
+        print(f"\n{len(results)} result(s). Add --start to drill them.")
+
+    elif args.command == "export":
+        from src import export
+        try:
+            export.export_data(args.format, args.output, args.chunk_size, args.user)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+
+    elif args.command == "simulate":
+        from src import simulate
+        stats = simulate.simulate(
+            learners=args.learners,
+            learner_kwargs={"stability": args.stability, "growth": args.growth},
+            sessions=args.sessions, count=args.count, subject=args.subject,
+            gap_hours=args.gap_hours, seed=args.seed)
+        print(f"Learners:          {stats['learners']}")
+        print(f"Reviews:           {stats['reviews']} ({stats['wall_seconds']:.2f}s wall)")
+        print(f"Throughput:        {stats['reviews_per_sec']:.0f} reviews/s "
+              f"({stats['per_learner_reviews_per_sec']:.0f}/s per learner)")
+        print(f"Simulated span:    {stats['simulated_days']:.0f} days")
+        print(f"Answer accuracy:   {stats['accuracy'] * 100:.1f}%")
+        print(f"Bank coverage:     {stats['coverage'] * 100:.1f}%")
+        print(f"Mean retention:    {stats['mean_retention'] * 100:.1f}%")
+        print(f"Retained >= 90%:   {stats['retained_90'] * 100:.1f}%")
+
+    elif args.command == "db-maintain":
+        from src import maintenance
+        if not maintenance.run(args.budget, args.vacuum):
+            sys.exit(1)
+
+    elif args.command == "sync-export":
+        from src import db, sync
+        count, until = sync.export(db.get_connection(), args.path, args.since, args.peer)
+        print(f"Exported {count} reviews to {args.path} (log position {until})")
+
+    elif args.command == "sync-import":
+        from src import db, sync
+        if not os.path.exists(args.path):
+            print(f"Error: File not found: {args.path}")
+            sys.exit(1)
+        start = time.perf_counter()
+        try:
+            result = sync.import_file(db.get_connection(), args.path)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Read {result['read']} reviews: {result['new']} new, {result['read'] - result['new'] - result['skipped']} "
+              f"already here, {result['skipped']} for questions not in this bank.")
+        print(f"Progress recomputed for {result['updated']} questions in {time.perf_counter() - start:.2f}s")
+
+    elif args.command == "pack":
+        from src import db, pack
+        name = (args.subject or "all").replace(" ", "_").replace("/", "_")
+        path = args.output or os.path.join("data", "packs", f"{name}.pack")
+        waiting = pack.unsynced(path)
+        if waiting:
+            print(f"Error: {waiting} answers given on {path} are not in the database yet; "
+                  f"run `pack-sync {pack.answers_path(path)}` first.")
+            sys.exit(1)
+        if os.path.exists(pack.answers_path(path)):
+            os.remove(pack.answers_path(path)) # all synced; they belong to the old build
+        count = pack.build(db.get_connection(), path, args.subject, args.user)
+        if count is None:
+            print(f"No subject matches '{args.subject}'.")
+            sys.exit(1)
+        print(f"Packed {count} questions into {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+    elif args.command == "pack-study":
+        # Deliberately light: no SQLite, NumPy or rich on this path
+        from src import pack
+        if not os.path.exists(args.pack_path):
+            print(f"Error: File not found: {args.pack_path}")
+            sys.exit(1)
+        correct, answered = pack.study(args.pack_path, args.count, args.feedback_delay)
+        if answered:
+            print(f"\nScore: {correct}/{answered}. Answers saved to {pack.answers_path(args.pack_path)}; "
+                  "run pack-sync on it to update your progress.")
+
+    elif args.command == "pack-sync":
+        from src import pack
+        if not os.path.exists(args.answers_path):
+            print(f"Error: File not found: {args.answers_path}")
+            sys.exit(1)
+        print(f"Applied {pack.sync(args.answers_path)} new answers.")
+
+    elif args.command == "backup":
+        from src import backup
+        start = time.perf_counter()
+        before = set(backup.list_snapshots(args.dir))
+        path = backup.create(args.dir, args.keep)
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"Snapshot written: {path} ({size:.2f} MB, {time.perf_counter() - start:.1f}s)")
+        pruned = sorted(before - set(backup.list_snapshots(args.dir)))
+        if pruned:
+            print(f"Pruned {len(pruned)} old snapshot(s): {', '.join(os.path.basename(p) for p in pruned)}")
+
+    elif args.command == "restore":
+        from src import backup
+        print(f"This replaces the database with snapshot: {args.snapshot}")
+        if not args.yes and input("Are you sure you want to proceed? (yes/no): ").lower() != "yes":
+            print("Operation cancelled.")
+            return
+        try:
+            safety = backup.restore(args.snapshot, args.dir)
+        except (OSError, ValueError) as e: # missing, not gzip, or fails the integrity check
+            print(f"Error: {e}")
+            sys.exit(1)
+        print("Database restored.")
+        if safety:
+            print(f"The previous database was saved as {safety}")
+
+    elif args.command == "serve":
+        from src import server
+        server.run(args.host, args.port, args.readers, args.batch_size, args.batch_ms / 1000.0, args.in_memory)
 
     else:
         parser.print_help()
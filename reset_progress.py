@@ -1,34 +1,36 @@
-import sqlite3
 import os
 import shutil
+import argparse
+from src import db, resets
+from src.registry import ModelRegistry
 
-DB_PATH = "data/questions.db"
+DB_PATH = db.DB_PATH
 MODELS_DIR = "models"
 ANALYTICS_FILE = "data/analytics_report.txt"
 
-def reset_database():
+def reset_database(user_id=None, subject=None):
+    """
+    Resets one learner (optionally just one subject subtree), or everyone when
+    user_id is None. Instant: old progress rows become stale (see src/resets.py)
+    and are deleted later in small batches.
+    """
     if not os.path.exists(DB_PATH):
         print(f"Database not found at {DB_PATH}")
-        return
+        return False
 
-    print("Resetting database progress...")
+    scope = f" ({subject})" if subject else ""
+    print(f"Resetting database progress for {user_id or 'all learners'}{scope}...")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Reset progress-related columns
-        cursor.execute("""
-            UPDATE questions 
-            SET review_count = 0, 
-                last_reviewed_at = NULL, 
-                recall_score = 0
-        """)
-        
-        conn.commit()
-        conn.close()
+        conn = db.get_connection()
+        for learner in ([user_id] if user_id else resets.learners(conn)):
+            if resets.reset(conn, learner, subject) is None:
+                print(f"No subject matches '{subject}'.")
+                return False
         print("Done: Database progress reset.")
+        return True
     except Exception as e:
         print(f"Error resetting database: {e}")
+        return False
 
 def delete_models():
     if os.path.exists(MODELS_DIR):
@@ -42,6 +44,12 @@ def delete_models():
     else:
         print("Models directory not found. Skipping.")
 
+def delete_learner_model(user_id):
+    path = ModelRegistry().path(user_id)
+    if os.path.exists(path):
+        os.remove(path)
+        print(f"Done: {user_id}'s personal model cleared.")
+
 def delete_analytics():
     if os.path.exists(ANALYTICS_FILE):
         print("Deleting analytics report...")
@@ -54,15 +62,28 @@ def delete_analytics():
         print("Analytics file not found. Skipping.")
 
 def main():
+    parser = argparse.ArgumentParser(description="Reset learning progress")
+    parser.add_argument("--user", default=db.DEFAULT_USER, help="Learner to reset")
+    parser.add_argument("--all", action="store_true", help="Reset every learner and the shared model")
+    parser.add_argument("--subject", help="Only reset this subject, topic or path prefix (keeps the models)")
+    args = parser.parse_args()
+
     print("=== Viva-LDA Progress Reset Utility ===")
-    print("Warning: This will PERMANENTLY delete your learning progress.")
+    target = "ALL learners'" if args.all else f"{args.user}'s"
+    scope = f" {args.subject}" if args.subject else ""
+    print(f"Warning: This will PERMANENTLY delete {target}{scope} learning progress.")
     print("Ingested questions will be preserved, but scores and history will be cleared.")
     
     # Confirmation prompt
     confirm = input("\nAre you sure you want to proceed? (yes/no): ").lower()
     if confirm == 'yes':
-        reset_database()
-        delete_models()
+        if not reset_database(None if args.all else args.user, args.subject):
+            return
+        # A subject reset keeps the models: they describe the learner's memory, not a subject
+        if args.all and not args.subject:
+            delete_models()
+        elif not args.subject:
+            delete_learner_model(args.user) # the shared population model stays
         delete_analytics()
         print("\nReset Complete. You can now start a fresh session.")
     else:
@@ -1,16 +1,14 @@
-import sqlite3
 import datetime
-
-DB_PATH = "data/questions.db"
+from src import db, forecast, profiling, subjects
 
 class AnalyticsEngine:
-    def __init__(self):
+    def __init__(self, user_id=db.DEFAULT_USER):
+        self.user_id = user_id
         self.conn = None
 
     def _get_conn(self):
         if not self.conn:
-            self.conn = sqlite3.connect(DB_PATH)
-            self.conn.row_factory = sqlite3.Row
+            self.conn = db.get_connection()
         return self.conn
 
     def get_overall_stats(self):
@@ -21,14 +19,11 @@ class AnalyticsEngine:
         cursor.execute("SELECT COUNT(*) FROM questions")
         total = cursor.fetchone()[0]
         
-        # Reviewed vs New
-        cursor.execute("SELECT COUNT(*) FROM questions WHERE review_count > 0")
-        reviewed = cursor.fetchone()[0]
+        # Reviewed vs New, Mastery (Avg Recall of reviewed items): one pass over this learner's rows
+        cursor.execute("SELECT COUNT(*), AVG(recall_score) FROM live_progress WHERE user_id = ? AND review_count > 0",
+                       (self.user_id,))
+        reviewed, mastery = cursor.fetchone()
         new = total - reviewed
-        
-        # Mastery (Avg Recall of reviewed items)
-        cursor.execute("SELECT AVG(recall_score) FROM questions WHERE review_count > 0")
-        mastery = cursor.fetchone()[0]
         mastery = mastery if mastery else 0.0
         
         return {
@@ -38,20 +33,24 @@ class AnalyticsEngine:
             "mastery": mastery * 100 # percentage
         }
 
+    @profiling.timed("analytics.subject_performance")
     def get_subject_performance(self):
         conn = self._get_conn()
         cursor = conn.cursor()
         
+        # Unseen questions count as recall 0, as they did before progress was per learner
         sql = """
-            SELECT subject, 
+            SELECT s.path AS subject, 
                    COUNT(*) as total, 
-                   AVG(recall_score) as avg_recall,
-                   SUM(CASE WHEN review_count > 0 THEN 1 ELSE 0 END) as reviewed_count
-            FROM questions 
-            GROUP BY subject
+                   AVG(COALESCE(p.recall_score, 0.0)) as avg_recall,
+                   SUM(CASE WHEN p.review_count > 0 THEN 1 ELSE 0 END) as reviewed_count
+            FROM questions q
+            JOIN subjects s ON s.id = q.subject_id
+            LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+            GROUP BY q.subject_id
             ORDER BY avg_recall ASC
         """
-        cursor.execute(sql)
+        cursor.execute(sql, (self.user_id,))
         rows = cursor.fetchall()
         
         stats = []
@@ -65,40 +64,34 @@ class AnalyticsEngine:
             })
         return stats
 
+    @profiling.timed("analytics.mastery_prediction")
     def get_mastery_prediction(self):
         conn = self._get_conn()
         cursor = conn.cursor()
         
-        # 1. Total and Mastered
+        # 1. Total and Mastered (index range scan on this learner's recall_score)
         cursor.execute("SELECT COUNT(*) FROM questions")
         total = cursor.fetchone()[0]
         
-        cursor.execute("SELECT COUNT(*) FROM questions WHERE recall_score >= 0.9")
+        cursor.execute("SELECT COUNT(*) FROM live_progress WHERE user_id = ? AND recall_score >= ?",
+                       (self.user_id, forecast.MASTERY_THRESHOLD))
         mastered = cursor.fetchone()[0]
         remaining = total - mastered
         
-        # 2. Velocity: Questions mastered in the last 24 hours
-        one_day_ago = (datetime.datetime.now() - datetime.timedelta(days=1)).isoformat()
-        cursor.execute("SELECT COUNT(*) FROM questions WHERE last_reviewed_at >= ? AND recall_score >= 0.9", (one_day_ago,))
-        velocity = cursor.fetchone()[0]
-        
-        # Fallback if no activity today: check last 7 days average
-        if velocity == 0:
-            seven_days_ago = (datetime.datetime.now() - datetime.timedelta(days=7)).isoformat()
-            cursor.execute("SELECT COUNT(*) FROM questions WHERE last_reviewed_at >= ? AND recall_score >= 0.9", (seven_days_ago,))
-            velocity_7d = cursor.fetchone()[0]
-            velocity = velocity_7d / 7.0 if velocity_7d > 0 else 0
-            
-        days_left = remaining / velocity if velocity > 0 else float('inf')
+        # 2. Velocity: smoothed net mastery gains from the daily buckets
+        result = forecast.forecast(cursor, remaining, user_id=self.user_id)
         
         return {
             "total": total,
             "mastered": mastered,
             "remaining": remaining,
-            "velocity": velocity, # mastered per day
-            "days_left": days_left
+            **result # velocity (mastered per day), days_left and 95% bounds
         }
 
+    def get_subject_rollup(self, name):
+        # Goal names are topics or subtopics ("GK", "Computer"): whole subtree, from the subject dictionary
+        return subjects.rollup(self._get_conn(), name)
+
     def get_weakest_topics(self, limit=5):
         stats = self.get_subject_performance()
         # Filter for subjects with at least some activity to avoid noise
@@ -106,6 +99,7 @@ class AnalyticsEngine:
         # Sort by recall ascending
         return sorted(active_stats, key=lambda x: x['recall'])[:limit]
 
+    @profiling.timed("analytics.export_report")
     def export_to_text(self, filename="data/analytics_report.txt"):
         import os
         
@@ -161,12 +155,12 @@ class AnalyticsEngine:
         lines.append("=" * 80)
         
         query = """
-            SELECT id, subject, question_text, correct_answer, recall_score, review_count, last_reviewed_at
-            FROM questions
-            WHERE review_count > 0
-            ORDER BY recall_score ASC, last_reviewed_at DESC
+            SELECT q.id, q.subject, q.question_text, q.correct_answer, p.recall_score, p.review_count, p.last_reviewed_ts
+            FROM live_progress p JOIN questions q ON q.id = p.question_id
+            WHERE p.user_id = ? AND p.review_count > 0
+            ORDER BY p.recall_score ASC, p.last_reviewed_ts DESC
         """
-        cursor.execute(query)
+        cursor.execute(query, (self.user_id,))
         rows = cursor.fetchall()
         
         if not rows:
@@ -181,7 +175,8 @@ class AnalyticsEngine:
                 score = r['recall_score']
                 status = "CRITICAL" if score < 0.3 else "WEAK" if score < 0.6 else "GOOD" if score < 0.9 else "MASTERED"
                 
-                lines.append(f"Stats: Recall={score:.2f} ({status}) | Reviewed={r['review_count']}x | Last: {r['last_reviewed_at'][:16]}")
+                last = datetime.datetime.fromtimestamp(r['last_reviewed_ts']).strftime('%Y-%m-%d %H:%M') if r['last_reviewed_ts'] else "-"
+                lines.append(f"Stats: Recall={score:.2f} ({status}) | Reviewed={r['review_count']}x | Last: {last}")
                 lines.append("-" * 80)
         
         # 5. ML MASTERY PREDICTION
@@ -197,6 +192,10 @@ class AnalyticsEngine:
         else:
             completion_date = (datetime.datetime.now() + datetime.timedelta(days=prediction['days_left'])).strftime('%Y-%m-%d')
             lines.append(f"Est. Completion:    In {prediction['days_left']:.1f} days")
+            if prediction['days_left_high'] == float('inf'):
+                lines.append(f"95% Range:          {prediction['days_left_low']:.1f} days - open-ended")
+            else:
+                lines.append(f"95% Range:          {prediction['days_left_low']:.1f} - {prediction['days_left_high']:.1f} days")
             lines.append(f"Projected Mastery:  {completion_date}")
         lines.append("=" * 60)
         
@@ -209,5 +208,5 @@ class AnalyticsEngine:
             return False
 
     def close(self):
-        if self.conn:
-            self.conn.close()
+        # The connection is shared process-wide (src/db.py); just drop our handle
+        self.conn = None
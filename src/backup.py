@@ -0,0 +1,113 @@
+import datetime
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from src import db, profiling
+
+# Online snapshots of the question database (`main.py backup` / `restore`).
+#
+# Copying data/questions.db while a session writes can produce a torn file, so
+# snapshots go through SQLite's backup API instead: a few hundred pages per
+# step with a short sleep in between, from a connection holding one read
+# transaction. Under WAL that read transaction is a fixed snapshot, so the copy
+# is consistent, never restarts, and writers carry on the whole time.
+# Snapshots are gzipped, named by time and pruned to the newest KEEP.
+
+BACKUP_DIR = "data/backups"
+PAGES_PER_STEP = 256     # ~1 MB per step with 4 KB pages
+STEP_SLEEP = 0.005       # seconds between steps
+KEEP = 10                # snapshots kept by prune()
+PREFIX = "questions-"
+SUFFIX = ".db.gz"
+
+def snapshot_name(now=None):
+    return f"{PREFIX}{(now or datetime.datetime.now()).strftime('%Y%m%d-%H%M%S-%f')}{SUFFIX}"
+
+def list_snapshots(directory=BACKUP_DIR):
+    """Snapshot paths, oldest first (names sort by time)."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.startswith(PREFIX) and n.endswith(SUFFIX))
+    return [os.path.join(directory, n) for n in names]
+
+def _copy(source, target, pages=PAGES_PER_STEP, pause=STEP_SLEEP):
+    def step(status, remaining, total):
+        if remaining:
+            time.sleep(pause)
+    source.backup(target, pages=pages, progress=step)
+
+@profiling.timed("backup.create")
+def create(directory=BACKUP_DIR, keep=KEEP, pages=PAGES_PER_STEP, pause=STEP_SLEEP):
+    """Writes a compressed snapshot of the live database and prunes old ones. Returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, snapshot_name())
+    raw = path[:-len(".gz")] + ".tmp"
+    # A connection of its own: the read transaction below must not mix with the app's writes
+    source = sqlite3.connect(db.DB_PATH, isolation_level=None)
+    target = sqlite3.connect(raw)
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone() # pins the snapshot
+        _copy(source, target, pages, pause)
+        source.execute("COMMIT")
+        target.execute("PRAGMA journal_mode=DELETE") # self-contained file, no -wal beside it
+    finally:
+        target.close()
+        source.close()
+    try:
+        with open(raw, "rb") as src, gzip.open(path + ".part", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(path + ".part", path) # only complete snapshots ever carry the final name
+    finally:
+        os.remove(raw)
+    prune(directory, keep)
+    return path
+
+def prune(directory=BACKUP_DIR, keep=KEEP):
+    """Deletes all but the newest `keep` snapshots; returns the deleted paths."""
+    old = list_snapshots(directory)[:-keep] if keep else []
+    for path in old:
+        os.remove(path)
+    return old
+
+@profiling.timed("backup.restore")
+def restore(path, directory=BACKUP_DIR):
+    """
+    Replaces the live database with a snapshot (a path, or 'latest'). The
+    snapshot is checked before anything is touched, and the current database
+    is snapshotted first so a restore can itself be undone.
+    Returns the path of that safety snapshot.
+    """
+    if path == "latest":
+        snapshots = list_snapshots(directory)
+        if not snapshots:
+            raise FileNotFoundError(f"No snapshots in {directory}")
+        path = snapshots[-1]
+    raw = os.path.join(os.path.dirname(db.DB_PATH) or ".", ".restore.tmp")
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rb") as src, open(raw, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        snapshot = sqlite3.connect(raw)
+        try:
+            try:
+                problems = [r[0] for r in snapshot.execute("PRAGMA quick_check")]
+            except sqlite3.DatabaseError as e:
+                problems = [str(e)]
+            if problems != ["ok"]:
+                raise ValueError(f"{path} is damaged: {problems[0]}")
+            safety = create(directory) if os.path.exists(db.DB_PATH) else None
+            # Written through the live connection's pager, so other readers see the swap atomically
+            live = db.get_connection()
+            live.commit()
+            _copy(snapshot, live)
+        finally:
+            snapshot.close()
+    finally:
+        if os.path.exists(raw):
+            os.remove(raw)
+    db.close() # reopen: the restored file may need migrating to the current schema
+    db.get_connection()
+    return safety
@@ -0,0 +1,410 @@
+import sqlite3
+import os
+import threading
+from datetime import datetime
+from src import profiling
+
+DB_PATH = "data/questions.db"
+
+# Applied to every connection. WAL lets readers (dashboard, analytics) run while a
+# review is being written; NORMAL sync is durable across application crashes and
+# only risks the last commits on power loss.
+PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL", # only takes effect on new files, see src/maintenance.py
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",   # 256 MB
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+STATEMENT_CACHE_SIZE = 256 # compiled statements kept per connection
+
+DEFAULT_USER = "default" # learner used when none is given (single-user installs)
+SCHEMA_VERSION = 7        # PRAGMA user_version once all migrations below have run
+
+# Static question content. Nothing here changes while studying, so many learners
+# can share one bank. subject_id is the key for filtering and grouping; the
+# subject text stays as the display label.
+QUESTIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        subject TEXT,
+        subject_id INTEGER REFERENCES subjects(id),
+        question_text TEXT,
+        option_a TEXT,
+        option_b TEXT,
+        option_c TEXT,
+        option_d TEXT,
+        correct_answer TEXT
+    )
+'''
+# Topic / subtopic dictionary, see src/subjects.py. question_count is the number
+# of questions filed directly under the subject (kept current by triggers).
+SUBJECTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS subjects (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL COLLATE NOCASE,
+        parent_id INTEGER REFERENCES subjects(id),
+        path TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        question_count INTEGER NOT NULL DEFAULT 0
+    )
+'''
+# Per-learner review state. A row exists only once the learner has seen the
+# question, so "new" questions are the ones without a row. Clustered on the
+# key: one learner's rows are contiguous. Review times are integer epoch
+# seconds (UTC). `epoch` is the learner's reset epoch when the row was written;
+# read through live_progress, which hides rows a later reset made stale.
+PROGRESS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS progress (
+        user_id TEXT NOT NULL,
+        question_id INTEGER NOT NULL REFERENCES questions(id),
+        recall_score REAL NOT NULL DEFAULT 0.0,
+        review_count INTEGER NOT NULL DEFAULT 0,
+        last_reviewed_ts INTEGER,
+        epoch INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, question_id)
+    ) WITHOUT ROWID
+'''
+# Reset epochs, see src/resets.py. learner_epochs holds each learner's current
+# epoch. progress_resets holds the resets whose stale rows are not yet deleted:
+# subject_id 0 is the whole bank, otherwise one row per subject in the reset
+# subtree; progress rows in that scope written before `epoch` are stale.
+EPOCHS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS learner_epochs (
+        user_id TEXT PRIMARY KEY,
+        epoch INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+'''
+RESETS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS progress_resets (
+        user_id TEXT NOT NULL,
+        subject_id INTEGER NOT NULL,
+        epoch INTEGER NOT NULL,
+        PRIMARY KEY (user_id, subject_id)
+    ) WITHOUT ROWID
+'''
+# True for a progress row `p` that a pending reset covers. With nothing pending
+# this is one empty index probe per row. The unary + keeps SQLite from turning
+# the OR into an IN lookup, which would fetch the question's subject every time.
+PROGRESS_STALE = '''
+    EXISTS (
+        SELECT 1 FROM progress_resets r
+        WHERE r.user_id = p.user_id AND r.epoch > p.epoch
+          AND (+r.subject_id = 0 OR +r.subject_id = (SELECT subject_id FROM questions WHERE id = p.question_id))
+    )
+'''
+# Interrupted-session bookkeeping, see src/journal.py: how many of a journaled
+# session's answers are already applied to progress (updated in the same commit).
+SESSIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        applied INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+'''
+# Every review, one row each, for merging progress across devices (src/sync.py).
+# `id` is the event's identity everywhere; `seq` is this file's log position
+# (the export watermark). review_count is 1 except for the baseline events that
+# summarise progress recorded before the log existed. progress is a function of
+# a learner's live events: their count, the newest time and that event's target.
+REVIEW_LOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS review_log (
+        seq INTEGER PRIMARY KEY,
+        id BLOB NOT NULL UNIQUE,
+        user_id TEXT NOT NULL,
+        question_id INTEGER NOT NULL REFERENCES questions(id),
+        reviewed_ts INTEGER,
+        target REAL NOT NULL,
+        review_count INTEGER NOT NULL DEFAULT 1,
+        epoch INTEGER NOT NULL DEFAULT 0
+    )
+'''
+# How far the log has been exported to each named peer (sync export --peer)
+SYNC_PEERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS sync_peers (
+        peer TEXT PRIMARY KEY,
+        exported_seq INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+'''
+# Daily mastery buckets per learner, see src/forecast.py
+MASTERY_TABLE = '''
+    CREATE TABLE IF NOT EXISTS mastery_daily (
+        user_id TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        gained INTEGER NOT NULL DEFAULT 0,
+        lost INTEGER NOT NULL DEFAULT 0,
+        reviews INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID
+'''
+
+SCHEMA = (
+    SUBJECTS_TABLE,
+    "CREATE INDEX IF NOT EXISTS idx_subjects_parent ON subjects(parent_id)",
+    "CREATE INDEX IF NOT EXISTS idx_subjects_name ON subjects(name)",
+    QUESTIONS_TABLE,
+    "CREATE INDEX IF NOT EXISTS idx_questions_subject_id ON questions(subject_id)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS questions_count_insert AFTER INSERT ON questions
+    WHEN NEW.subject_id IS NOT NULL BEGIN
+        UPDATE subjects SET question_count = question_count + 1 WHERE id = NEW.subject_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS questions_count_delete AFTER DELETE ON questions
+    WHEN OLD.subject_id IS NOT NULL BEGIN
+        UPDATE subjects SET question_count = question_count - 1 WHERE id = OLD.subject_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS questions_count_move AFTER UPDATE OF subject_id ON questions BEGIN
+        UPDATE subjects SET question_count = question_count - 1 WHERE id = OLD.subject_id;
+        UPDATE subjects SET question_count = question_count + 1 WHERE id = NEW.subject_id;
+    END
+    ''',
+    PROGRESS_TABLE,
+    # Weakest-first selection and mastery counts for one learner
+    "CREATE INDEX IF NOT EXISTS idx_progress_recall ON progress(user_id, recall_score)",
+    # Time-window scans (recently reviewed, per-day roll-ups) are integer ranges
+    "CREATE INDEX IF NOT EXISTS idx_progress_reviewed ON progress(user_id, last_reviewed_ts)",
+    EPOCHS_TABLE,
+    RESETS_TABLE,
+    # What every reader uses: progress minus rows made stale by a reset
+    f"CREATE VIEW IF NOT EXISTS live_progress AS SELECT * FROM progress p WHERE NOT {PROGRESS_STALE}",
+    # Read-only compatibility for tools that still expect the old local ISO column
+    '''
+    CREATE VIEW IF NOT EXISTS progress_iso AS
+    SELECT user_id, question_id, recall_score, review_count,
+           strftime('%Y-%m-%dT%H:%M:%S', last_reviewed_ts, 'unixepoch', 'localtime') AS last_reviewed_at
+    FROM live_progress
+    ''',
+    MASTERY_TABLE,
+    SESSIONS_TABLE,
+    REVIEW_LOG_TABLE,
+    "CREATE INDEX IF NOT EXISTS idx_review_log_learner ON review_log(user_id, question_id)",
+    SYNC_PEERS_TABLE,
+)
+
+# Full-text index over question text and options (src/search.py). External
+# content: the text lives once, in questions; triggers keep the index in step
+# with every insert, delete and edit. Optional: skipped if SQLite lacks FTS5.
+SEARCH_SCHEMA = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+        question_text, option_a, option_b, option_c, option_d,
+        content='questions', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+        INSERT INTO questions_fts (rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES (NEW.id, NEW.question_text, NEW.option_a, NEW.option_b, NEW.option_c, NEW.option_d);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES ('delete', OLD.id, OLD.question_text, OLD.option_a, OLD.option_b, OLD.option_c, OLD.option_d);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS questions_fts_update
+    AFTER UPDATE OF question_text, option_a, option_b, option_c, option_d ON questions BEGIN
+        INSERT INTO questions_fts (questions_fts, rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES ('delete', OLD.id, OLD.question_text, OLD.option_a, OLD.option_b, OLD.option_c, OLD.option_d);
+        INSERT INTO questions_fts (rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES (NEW.id, NEW.question_text, NEW.option_a, NEW.option_b, NEW.option_c, NEW.option_d);
+    END
+    ''',
+)
+
+_local = threading.local()
+
+def connect(path=None):
+    """Opens a new, fully configured connection. Most callers want get_connection()."""
+    path = path or DB_PATH
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    init_schema(conn)
+    profiling.trace_sql(conn)
+    return conn
+
+def init_schema(conn):
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        migrate(conn)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    create_search_index(conn)
+    conn.commit()
+
+def create_search_index(conn):
+    """Creates the FTS5 index and its triggers. Returns False if FTS5 is unavailable."""
+    try:
+        for statement in SEARCH_SCHEMA:
+            conn.execute(statement)
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def _columns(conn, table):
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+def _split_progress(conn):
+    """v1: moves review state off `questions` into per-learner `progress` rows."""
+    if "recall_score" in _columns(conn, "questions"):
+        # Table as of v1; v2 converts its review times
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS progress (
+                user_id TEXT NOT NULL,
+                question_id INTEGER NOT NULL REFERENCES questions(id),
+                recall_score REAL NOT NULL DEFAULT 0.0,
+                review_count INTEGER NOT NULL DEFAULT 0,
+                last_reviewed_at TIMESTAMP,
+                PRIMARY KEY (user_id, question_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO progress (user_id, question_id, recall_score, review_count, last_reviewed_at)
+            SELECT ?, id, COALESCE(recall_score, 0.0), review_count, last_reviewed_at
+            FROM questions WHERE review_count > 0
+        ''', (DEFAULT_USER,))
+        conn.execute("DROP INDEX IF EXISTS idx_questions_recall")
+        for column in ("recall_score", "review_count", "last_reviewed_at"):
+            conn.execute(f"ALTER TABLE questions DROP COLUMN {column}")
+
+    mastery = _columns(conn, "mastery_daily")
+    if mastery and "user_id" not in mastery:
+        conn.execute("ALTER TABLE mastery_daily RENAME TO mastery_daily_v0")
+        conn.execute(MASTERY_TABLE)
+        conn.execute('''
+            INSERT INTO mastery_daily (user_id, day, gained, lost, reviews)
+            SELECT ?, day, gained, lost, reviews FROM mastery_daily_v0
+        ''', (DEFAULT_USER,))
+        conn.execute("DROP TABLE mastery_daily_v0")
+
+def _epoch_review_times(conn):
+    """v2: ISO `last_reviewed_at` strings -> integer `last_reviewed_ts` epoch seconds."""
+    if "last_reviewed_at" not in _columns(conn, "progress"):
+        return
+    conn.execute("ALTER TABLE progress ADD COLUMN last_reviewed_ts INTEGER")
+    rows = conn.execute("SELECT user_id, question_id, last_reviewed_at FROM progress "
+                        "WHERE last_reviewed_at IS NOT NULL").fetchall()
+    converted = []
+    for user_id, question_id, value in rows:
+        try:
+            # Stored as naive local time, which is what fromisoformat().timestamp() assumes
+            converted.append((int(datetime.fromisoformat(value).timestamp()), user_id, question_id))
+        except (TypeError, ValueError):
+            pass # unparseable: treated as never timed
+    conn.executemany("UPDATE progress SET last_reviewed_ts = ? WHERE user_id = ? AND question_id = ?", converted)
+    conn.execute("ALTER TABLE progress DROP COLUMN last_reviewed_at")
+
+def _subject_dictionary(conn):
+    """v3: files every question under a subjects row (topic / subtopic) by id."""
+    if not _columns(conn, "questions") or "subject_id" in _columns(conn, "questions"):
+        return
+    from src import subjects
+    conn.execute(SUBJECTS_TABLE)
+    conn.execute("ALTER TABLE questions ADD COLUMN subject_id INTEGER REFERENCES subjects(id)")
+    cursor = conn.cursor()
+    labels = [r[0] for r in conn.execute("SELECT DISTINCT subject FROM questions")]
+    for label in labels:
+        subject_id = subjects.ensure(cursor, label)
+        if label is None:
+            conn.execute("UPDATE questions SET subject_id = ? WHERE subject IS NULL", (subject_id,))
+        else:
+            conn.execute("UPDATE questions SET subject_id = ? WHERE subject = ?", (subject_id, label))
+    subjects.refresh_counts(conn)
+    conn.execute("DROP INDEX IF EXISTS idx_questions_subject") # replaced by the subject_id index
+
+def _search_index(conn):
+    """v4: builds the full-text index for questions ingested before it existed."""
+    if _columns(conn, "questions") and create_search_index(conn):
+        conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+
+def _progress_epochs(conn):
+    """v5: progress rows carry a reset epoch; progress_iso is rebuilt over live_progress."""
+    if not _columns(conn, "progress") or "epoch" in _columns(conn, "progress"):
+        return
+    conn.execute("ALTER TABLE progress ADD COLUMN epoch INTEGER NOT NULL DEFAULT 0")
+    conn.execute("DROP VIEW IF EXISTS progress_iso")
+
+def _review_log(conn):
+    """v6: seeds the review log with one baseline event per live progress row."""
+    if not _columns(conn, "progress"):
+        return
+    from src import sync
+    conn.execute(REVIEW_LOG_TABLE)
+    live = f"WHERE NOT {PROGRESS_STALE}" if _columns(conn, "progress_resets") else ""
+    rows = conn.execute(f'''
+        SELECT p.user_id, p.question_id, p.review_count, p.last_reviewed_ts, p.recall_score, p.epoch, q.question_text
+        FROM progress p JOIN questions q ON q.id = p.question_id {live}
+    ''').fetchall()
+    conn.executemany('''
+        INSERT OR IGNORE INTO review_log (id, user_id, question_id, reviewed_ts, target, review_count, epoch)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', ((sync.baseline_id(user_id, text, count, ts, score), user_id, question_id, ts, score, count, epoch)
+          for user_id, question_id, count, ts, score, epoch, text in rows))
+
+def _mastery_backfill(conn):
+    """v7: seeds the daily mastery buckets for learners whose progress predates them."""
+    if not _columns(conn, "progress"):
+        return
+    from src import forecast
+    conn.execute(MASTERY_TABLE)
+    forecast.backfill(conn.cursor(), skip_stale=bool(_columns(conn, "progress_resets")))
+
+# user_version -> upgrade step; each runs once, in order, inside one transaction
+MIGRATIONS = {
+    1: _split_progress,
+    2: _epoch_review_times,
+    3: _subject_dictionary,
+    4: _search_index,
+    5: _progress_epochs,
+    6: _review_log,
+    7: _mastery_backfill,
+}
+
+def migrate(conn):
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE") # one migrating connection at a time
+    try:
+        # Re-read under the write lock: another connection may have just migrated
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target in sorted(MIGRATIONS):
+            if target > version:
+                MIGRATIONS[target](conn)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def get_connection():
+    """
+    Returns the long-lived connection for this thread, opening it on first use.
+    Connections are never shared across threads or forked processes.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        if _local.pid == os.getpid() and _local.path == DB_PATH:
+            return conn
+        close() # DB_PATH was repointed (tests, tools) or we were forked
+    conn = connect()
+    _local.conn = conn
+    _local.pid = os.getpid()
+    _local.path = DB_PATH
+    return conn
+
+def close():
+    """Closes this thread's connection (if any); the next get_connection() reopens it."""
+    conn = getattr(_local, "conn", None)
+    # A connection inherited through fork() belongs to the parent; just drop it
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
@@ -0,0 +1,226 @@
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+import numpy as np
+from src import db
+
+EXPORT_DIR = "data/export"
+CHUNK_SIZE = 5000
+
+# Text columns are stored Arrow-style: one contiguous UTF-8 blob per column
+# plus an int64 offsets array (len = rows + 1), so nothing needs pickling.
+TEXT_COLUMNS = ["question_text", "option_a", "option_b", "option_c", "option_d", "correct_answer"]
+# Fixed dtypes, so an empty export has the same schema as a full one
+NUMERIC_COLUMNS = {"id": np.int64, "subject_code": np.int32, "recall_score": np.float32,
+                   "review_count": np.int32, "last_reviewed_at": np.int64}
+
+# One learner's view of the bank: every question, with that learner's progress
+QUESTION_QUERY = """
+    SELECT q.id, q.subject, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d,
+           q.correct_answer, p.recall_score, p.review_count, p.last_reviewed_ts
+    FROM questions q
+    LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+    ORDER BY q.id
+"""
+
+def iter_question_batches(conn, chunk_size=CHUNK_SIZE, user_id=db.DEFAULT_USER):
+    """
+    Yields typed column batches of the question table.
+    Subjects are dictionary-encoded; the shared dictionary grows as batches are read.
+    """
+    cursor = conn.cursor()
+    cursor.execute(QUESTION_QUERY, (user_id,))
+    subject_codes = {}
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+
+        codes = []
+        for r in rows:
+            sub = r[1] or ""
+            if sub not in subject_codes:
+                subject_codes[sub] = len(subject_codes)
+            codes.append(subject_codes[sub])
+
+        batch = {
+            "id": np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+            "subject_code": np.array(codes, dtype=np.int32),
+            "recall_score": np.fromiter((r[8] or 0.0 for r in rows), dtype=np.float32, count=len(rows)),
+            "review_count": np.fromiter((r[9] or 0 for r in rows), dtype=np.int32, count=len(rows)),
+            # Already epoch seconds in the DB; -1 = never reviewed
+            "last_reviewed_at": np.fromiter((-1 if r[10] is None else r[10] for r in rows), dtype=np.int64, count=len(rows)),
+        }
+        for offset, name in enumerate(TEXT_COLUMNS, start=2):
+            batch[name] = [r[offset] or "" for r in rows]
+
+        yield batch, list(subject_codes)
+
+def _encode_text(values):
+    """list[str] -> (uint8 blob, int64 offsets)"""
+    encoded = [v.encode("utf-8") for v in values]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+def _spooled_member(zf, name, dtype, spool):
+    """Copies a spool of raw `dtype` values into the archive as NAME.npy."""
+    dtype = np.dtype(dtype)
+    count = spool.tell() // dtype.itemsize
+    spool.seek(0)
+    with zf.open(f"{name}.npy", "w", force_zip64=True) as out:
+        np.lib.format.write_array_header_1_0(out, {
+            "descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (count,)})
+        shutil.copyfileobj(spool, out)
+
+def export_npz(conn, out_dir, chunk_size=CHUNK_SIZE, user_id=db.DEFAULT_USER):
+    """
+    Each batch is appended to one spool file per column as it is read, and the
+    spools are copied into the archive at the end, so memory use stays at one
+    batch whatever the size of the bank.
+    """
+    columns = dict(NUMERIC_COLUMNS)
+    for name in TEXT_COLUMNS:
+        columns[f"{name}__data"] = np.uint8
+        columns[f"{name}__offsets"] = np.int64
+    subjects, total = [], 0
+    text_ends = dict.fromkeys(TEXT_COLUMNS, 0)
+    path = os.path.join(out_dir, "questions.npz")
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as spool_dir:
+        spools = {name: open(os.path.join(spool_dir, name), "w+b") for name in columns}
+        try:
+            for name in TEXT_COLUMNS:
+                spools[f"{name}__offsets"].write(np.zeros(1, dtype=np.int64).tobytes())
+            for batch, subjects in iter_question_batches(conn, chunk_size, user_id):
+                for name, dtype in NUMERIC_COLUMNS.items():
+                    spools[name].write(batch[name].astype(dtype, copy=False).tobytes())
+                for name in TEXT_COLUMNS:
+                    # Batch offsets restart at 0; shift them past what is already written
+                    blob, offsets = _encode_text(batch[name])
+                    spools[f"{name}__data"].write(blob.tobytes())
+                    spools[f"{name}__offsets"].write((offsets[1:] + text_ends[name]).tobytes())
+                    text_ends[name] += int(offsets[-1])
+                total += len(batch["id"])
+
+            # Uncompressed on purpose: stored members can be memory-mapped by open_npz()
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for name, dtype in columns.items():
+                    _spooled_member(zf, name, dtype, spools[name])
+                for name, array in zip(("subject_dict__data", "subject_dict__offsets"), _encode_text(subjects)):
+                    with zf.open(f"{name}.npy", "w", force_zip64=True) as out:
+                        np.lib.format.write_array(out, array)
+        finally:
+            for spool in spools.values():
+                spool.close()
+    return path, total
+
+def export_parquet(conn, out_dir, chunk_size=CHUNK_SIZE, user_id=db.DEFAULT_USER):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow).")
+
+    path = os.path.join(out_dir, "questions.parquet")
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("subject", pa.dictionary(pa.int32(), pa.string())),
+        *[(name, pa.string()) for name in TEXT_COLUMNS],
+        ("recall_score", pa.float32()),
+        ("review_count", pa.int32()),
+        ("last_reviewed_at", pa.timestamp("s")),
+    ])
+
+    total = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch, subjects in iter_question_batches(conn, chunk_size, user_id):
+            reviewed = batch["last_reviewed_at"]
+            columns = [
+                pa.array(batch["id"]),
+                pa.DictionaryArray.from_arrays(pa.array(batch["subject_code"]), pa.array(subjects, pa.string())),
+                *[pa.array(batch[name], pa.string()) for name in TEXT_COLUMNS],
+                pa.array(batch["recall_score"]),
+                pa.array(batch["review_count"]),
+                pa.array(reviewed, pa.timestamp("s"), mask=reviewed < 0),
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+            total += len(batch["id"])
+    return path, total
+
+def export_csv(conn, out_dir, chunk_size=CHUNK_SIZE, user_id=db.DEFAULT_USER):
+    path = os.path.join(out_dir, "questions.csv")
+    subjects = []
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "subject_code", *TEXT_COLUMNS, "recall_score", "review_count", "last_reviewed_at"])
+        for batch, subjects in iter_question_batches(conn, chunk_size, user_id):
+            writer.writerows(zip(
+                batch["id"].tolist(),
+                batch["subject_code"].tolist(),
+                *[batch[name] for name in TEXT_COLUMNS],
+                batch["recall_score"].tolist(),
+                batch["review_count"].tolist(),
+                batch["last_reviewed_at"].tolist(),
+            ))
+            total += len(batch["id"])
+
+    # Dictionary for subject_code lives in a sidecar file
+    with open(os.path.join(out_dir, "subjects.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["subject_code", "subject"])
+        writer.writerows(enumerate(subjects))
+    return path, total
+
+EXPORTERS = {
+    "npz": export_npz,
+    "parquet": export_parquet,
+    "csv": export_csv,
+}
+
+def export_data(fmt="npz", out_dir=EXPORT_DIR, chunk_size=CHUNK_SIZE, user_id=db.DEFAULT_USER):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    path, total = EXPORTERS[fmt](db.get_connection(), out_dir, chunk_size, user_id)
+    print(f"Exported {total} questions to {path}")
+    return path
+
+def open_npz(path):
+    """
+    Memory-maps every member of an uncompressed .npz written by export_npz.
+    Returns a dict of read-only np.memmap arrays; no data is copied or parsed.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as raw:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} is compressed and cannot be memory-mapped")
+            # Skip the zip local file header to reach the .npy payload
+            raw.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(raw.read(4), dtype="<u2")
+            raw.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(raw)
+            key = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if 0 in shape:
+                arrays[key] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[key] = np.memmap(path, dtype=dtype, mode="r", offset=raw.tell(),
+                                        shape=shape, order="F" if fortran else "C")
+    return arrays
+
+def text_column(arrays, name, index):
+    """Decodes a single string from an Arrow-style text column."""
+    offsets = arrays[f"{name}__offsets"]
+    start, end = int(offsets[index]), int(offsets[index + 1])
+    return bytes(arrays[f"{name}__data"][start:end]).decode("utf-8")
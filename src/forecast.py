@@ -0,0 +1,129 @@
+import datetime
+import json
+import math
+from src import db
+from src.db import DEFAULT_USER
+
+# Daily mastery buckets: one row per learner and local calendar day (date ordinal).
+# gained/lost count questions crossing the mastery threshold in either direction,
+# so the net per-day series is the learner's mastery velocity.
+# The mastery_daily table itself is created by src/db.py.
+# The series is at most WINDOW_DAYS long, so plain Python is used: this runs
+# when the menu first draws and importing NumPy alone would cost ~100 ms.
+MASTERY_THRESHOLD = 0.9
+WINDOW_DAYS = 28
+SMOOTHING = 0.3   # EWMA alpha; higher reacts faster to recent days
+Z_95 = 1.96
+
+def today():
+    return datetime.date.today().toordinal()
+
+def record_review(cursor, old_score, new_score, day=None, user_id=DEFAULT_USER):
+    """Bumps today's bucket for a single review. Runs inside the caller's transaction."""
+    record_reviews(cursor, [(old_score, new_score, day if day is not None else today())], user_id)
+
+def record_reviews(cursor, reviews, user_id=DEFAULT_USER):
+    """Same for many (old_score, new_score, day) reviews, in one executemany."""
+    rows = []
+    for old_score, new_score, day in reviews:
+        old_mastered = (old_score or 0.0) >= MASTERY_THRESHOLD
+        new_mastered = new_score >= MASTERY_THRESHOLD
+        gained = 1 if new_mastered and not old_mastered else 0
+        lost = 1 if old_mastered and not new_mastered else 0
+        rows.append((user_id, day, gained, lost))
+    cursor.executemany('''
+        INSERT INTO mastery_daily (user_id, day, gained, lost, reviews) VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT(user_id, day) DO UPDATE SET
+            gained = gained + excluded.gained,
+            lost = lost + excluded.lost,
+            reviews = reviews + 1
+    ''', rows)
+
+def record_reset(cursor, subject_ids, user_id=DEFAULT_USER):
+    """
+    Takes back the gains of the mastered questions a subject-scoped reset is
+    about to make stale: each counts as lost on the day it was last reviewed,
+    the day backfill() and the review path credit it. Call it before the reset
+    is recorded, while the rows are still live.
+    """
+    cursor.execute('''
+        SELECT date(p.last_reviewed_ts, 'unixepoch', 'localtime') AS d, COUNT(*)
+        FROM live_progress p JOIN questions q ON q.id = p.question_id
+        WHERE p.user_id = ? AND p.recall_score >= ? AND p.last_reviewed_ts IS NOT NULL
+          AND q.subject_id IN (SELECT value FROM json_each(?))
+        GROUP BY d
+    ''', (user_id, MASTERY_THRESHOLD, json.dumps(subject_ids)))
+    rows = [(user_id, datetime.date.fromisoformat(d).toordinal(), lost) for d, lost in cursor.fetchall() if d]
+    cursor.executemany('''
+        INSERT INTO mastery_daily (user_id, day, gained, lost, reviews) VALUES (?, ?, 0, ?, 0)
+        ON CONFLICT(user_id, day) DO UPDATE SET lost = lost + excluded.lost
+    ''', rows)
+
+def backfill(cursor, skip_stale=True):
+    """
+    One-off seed for databases that predate the buckets, run by the v7 migration
+    in src/db.py: for every learner with progress but no buckets, each currently
+    mastered question counts as gained on the day it was last reviewed.
+    skip_stale leaves out rows a reset made stale (needs progress_resets).
+    """
+    live = f"AND NOT {db.PROGRESS_STALE}" if skip_stale else ""
+    cursor.execute(f'''
+        SELECT p.user_id, date(p.last_reviewed_ts, 'unixepoch', 'localtime') AS d, COUNT(*), SUM(p.recall_score >= ?)
+        FROM progress p
+        WHERE p.last_reviewed_ts IS NOT NULL {live}
+          AND NOT EXISTS (SELECT 1 FROM mastery_daily m WHERE m.user_id = p.user_id)
+        GROUP BY p.user_id, d
+    ''', (MASTERY_THRESHOLD,))
+    rows = [(user_id, datetime.date.fromisoformat(d).toordinal(), gained or 0, reviews)
+            for user_id, d, reviews, gained in cursor.fetchall() if d]
+    cursor.executemany("INSERT INTO mastery_daily (user_id, day, gained, lost, reviews) VALUES (?, ?, ?, 0, ?)", rows)
+
+def load_series(cursor, window=WINDOW_DAYS, end_day=None, user_id=DEFAULT_USER):
+    """
+    Returns the dense net-gain series for the whole trailing window (zeros on
+    idle days), so a single busy day is averaged over the window, not taken as the rate.
+    """
+    end_day = end_day if end_day is not None else today()
+    start_day = end_day - window + 1
+    cursor.execute("SELECT day, gained - lost FROM mastery_daily WHERE user_id = ? AND day BETWEEN ? AND ?",
+                   (user_id, start_day, end_day))
+    series = [0.0] * window
+    for day, net in cursor.fetchall():
+        series[day - start_day] = float(net)
+    return series
+
+def fit_velocity(series, alpha=SMOOTHING):
+    """
+    Exponentially weighted level of the daily series with a standard error
+    from the weighted residuals. Returns (velocity, low, high) in items/day.
+    """
+    n = len(series)
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    weights = [alpha * (1 - alpha) ** (n - 1 - i) for i in range(n)]
+    total = sum(weights)
+    level = sum(w * x for w, x in zip(weights, series)) / total
+    if n == 1:
+        return level, level, level
+    variance = sum(w * (x - level) ** 2 for w, x in zip(weights, series)) / total
+    n_eff = total ** 2 / sum(w * w for w in weights)
+    margin = Z_95 * math.sqrt(variance / n_eff)
+    return level, level - margin, level + margin
+
+def eta_days(remaining, velocity):
+    if remaining <= 0:
+        return 0.0
+    return remaining / velocity if velocity > 0 else float('inf')
+
+def forecast(cursor, remaining, window=WINDOW_DAYS, user_id=DEFAULT_USER):
+    series = load_series(cursor, window, user_id=user_id)
+    velocity, low, high = fit_velocity(series)
+    return {
+        "velocity": velocity,
+        "velocity_low": low,
+        "velocity_high": high,
+        "days_left": eta_days(remaining, velocity),
+        # Faster velocity bound gives the optimistic (earliest) ETA
+        "days_left_low": eta_days(remaining, high),
+        "days_left_high": eta_days(remaining, low),
+    }
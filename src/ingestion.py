@@ -1,53 +1,31 @@
-import sqlite3
 import csv
 import os
-
-DB_PATH = "data/questions.db"
+from src import db, profiling, subjects
 
 def init_db():
-    """Initializes the SQLite database."""
-    os.makedirs("data", exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            subject TEXT,
-            question_text TEXT,
-            option_a TEXT,
-            option_b TEXT,
-            option_c TEXT,
-            option_d TEXT,
-            correct_answer TEXT,
-            recall_score REAL DEFAULT 0.0,
-            review_count INTEGER DEFAULT 0,
-            last_reviewed_at TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    """Initializes the SQLite database (schema lives in src/db.py)."""
+    db.init_schema(db.get_connection())
 
+@profiling.timed("ingest.save_questions")
 def save_questions(questions):
-    """Saves parsed questions to the database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    """Saves parsed questions to the database in a single transaction."""
+    conn = db.get_connection()
     
-    count = 0
-    for q in questions:
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO questions (subject, question_text, option_a, option_b, option_c, option_d, correct_answer)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', q)
-            if cursor.rowcount > 0:
-                count += 1
-        except sqlite3.IntegrityError:
-            pass # Skip duplicates
+    with conn:
+        # File each row under its subject id (created on first sight; cached per call)
+        cursor = conn.cursor()
+        cache = {}
+        rows = [(q[0], subjects.ensure(cursor, q[0], cache), *q[1:]) for q in questions]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO questions (subject, subject_id, question_text, option_a, option_b, option_c, option_d, correct_answer)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        # rowcount, not total_changes: the subjects.question_count triggers also write
+        inserted = cursor.rowcount
             
-    conn.commit()
-    conn.close()
-    return count
+    return inserted
 
+@profiling.timed("ingest.csv")
 def ingest_csv(csv_path):
     print(f"Processing {csv_path}...")
     init_db()
@@ -147,8 +125,11 @@ def ingest_csv(csv_path):
         saved_count = save_questions(questions)
         print(f"Saved {saved_count} new questions to database.")
 
-def ingest_directory(directory_path):
-    """Recursively ingest all CSVs in a directory."""
+def ingest_directory(directory_path, subject=None):
+    """
+    Recursively ingest all CSVs in a directory.
+    `subject` is accepted for CLI compatibility; CSV rows carry their own topic columns.
+    """
     for root, dirs, files in os.walk(directory_path):
         for file in files:
             if file.lower().endswith(".csv"):
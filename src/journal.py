@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import uuid
+from urllib.parse import quote
+
+# Crash-safe session journal: one append-only JSON-lines file per learner.
+#
+#   {"session": "3f2a...", "subject": "GK", "ids": [12, 7, 40, ...]}     first line
+#   {"i": 0, "qid": 12, "ok": true, "rt": 3.1, "ts": 1700000000}          one per answer
+#
+# Every line is flushed to the OS as it is written, so a killed process loses
+# nothing; fsync (which survives power loss too) runs every SYNC_EVERY answers.
+# How many answers already reached the database is stored next to the progress
+# rows (sessions.applied, same transaction), so replaying a journal after a
+# crash applies each answer exactly once. The file is removed when the session
+# completes.
+
+JOURNAL_DIR = "data/journal"
+SYNC_EVERY = 5        # answers per fsync
+SYNC_SECONDS = 2.0    # ... or this long since the last one
+
+class PendingSession:
+    """An interrupted session read back from its journal."""
+    def __init__(self, session_id, subject, question_ids, answers):
+        self.session_id = session_id
+        self.subject = subject
+        self.question_ids = question_ids
+        self.answers = answers # dicts in answer order: i, qid, ok, rt, ts
+
+def read_records(path):
+    """
+    (records, intact bytes) from a JSON-lines file, stopping at a torn last
+    line; ([], 0) if there is no file. Study packs' answer files use it too.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    records, intact = [], 0
+    for line in data.splitlines(keepends=True):
+        try:
+            if not line.endswith(b"\n"):
+                raise ValueError
+            records.append(json.loads(line))
+        except ValueError:
+            break # torn final write: everything before it is intact
+        intact += len(line)
+    return records, intact
+
+def applied_count(cursor, session_id):
+    """How many of a session's answers the database already has."""
+    cursor.execute("SELECT applied FROM sessions WHERE id = ?", (session_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def mark_applied(cursor, session_id, user_id, count):
+    """Records (in the caller's transaction) that the session's first `count` answers are in the database."""
+    cursor.execute('''
+        INSERT INTO sessions (id, user_id, applied) VALUES (?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET applied = excluded.applied
+    ''', (session_id, user_id, count))
+
+class SessionJournal:
+    def __init__(self, user_id, directory=JOURNAL_DIR):
+        self.user_id = user_id
+        self.path = os.path.join(directory, quote(user_id, safe="") + ".jsonl")
+        self.session_id = None
+        self._file = None
+        self._unsynced = 0
+        self._synced_at = 0.0
+        self._intact = 0 # bytes of whole lines seen by load()
+
+    def _append(self, record, sync=False):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if sync or self._unsynced >= SYNC_EVERY or time.monotonic() - self._synced_at >= SYNC_SECONDS:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._synced_at = time.monotonic()
+
+    def begin(self, question_ids, subject=None):
+        """Starts a new journal (replacing any old one) with the selected questions."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.close()
+        self.session_id = uuid.uuid4().hex
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._append({"session": self.session_id, "subject": subject, "ids": list(question_ids)}, sync=True)
+        return self.session_id
+
+    def reopen(self):
+        """Continues the journal of the session load() returned (dropping a torn last line)."""
+        self.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._file.truncate(self._intact)
+
+    def record(self, index, question_id, is_correct, response_time, reviewed_at):
+        self._append({"i": index, "qid": question_id, "ok": bool(is_correct),
+                      "rt": round(response_time, 3), "ts": int(reviewed_at)})
+
+    def mark_applied(self, cursor, count):
+        """Records (in the caller's transaction) that the first `count` answers are in the database."""
+        mark_applied(cursor, self.session_id, self.user_id, count)
+
+    def applied(self, cursor):
+        """How many of this session's answers the database already has."""
+        return applied_count(cursor, self.session_id)
+
+    def load(self):
+        """The interrupted session in this learner's journal, or None."""
+        records, self._intact = read_records(self.path)
+        if not records or "session" not in records[0]:
+            return None
+        head = records[0]
+        self.session_id = head["session"]
+        return PendingSession(head["session"], head.get("subject"), head["ids"], records[1:])
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def finish(self, conn):
+        """The session is complete and applied: drop the journal and its watermark."""
+        self.close()
+        if self.session_id is not None:
+            with conn:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (self.session_id,))
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.session_id = None
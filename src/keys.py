@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+
+# Single-keystroke input for the drill loop. POSIX terminals are switched to
+# cbreak mode (no line buffering, no echo, Ctrl-C still works); Windows uses msvcrt.
+# Multi-byte keys (arrows, function keys) come back as their first byte only.
+
+ESCAPE_WAIT = 0.05 # seconds to wait for the rest of an escape sequence
+
+def is_interactive():
+    return sys.stdin.isatty()
+
+class KeyReader:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.saved = None
+
+    def __enter__(self):
+        if os.name != "nt" and self.stream.isatty():
+            import termios
+            import tty
+            fd = self.stream.fileno()
+            self.saved = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved is not None:
+            import termios
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self.saved)
+            self.saved = None
+        return False
+
+    def flush(self):
+        """Drops keys typed ahead (e.g. during a redraw) so they don't answer the next question."""
+        while self.read(timeout=0) is not None:
+            pass
+
+    def read(self, timeout=None):
+        """Returns one key, or None if `timeout` seconds pass first (None waits forever)."""
+        if os.name == "nt":
+            import msvcrt
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                if msvcrt.kbhit():
+                    key = msvcrt.getwch()
+                    if key in ("\x00", "\xe0"):
+                        msvcrt.getwch() # arrows / function keys: prefix + scan code, one key
+                    return key
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.01)
+
+        data = self._read_byte(timeout)
+        if data is None:
+            return None
+        if data == b"\x1b":
+            self._skip_escape()
+        return data.decode("utf-8", errors="ignore")
+
+    def _read_byte(self, timeout):
+        import select
+        fd = self.stream.fileno()
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return None
+        data = os.read(fd, 1)
+        if not data:
+            raise EOFError("stdin closed")
+        return data
+
+    def _skip_escape(self):
+        """
+        Swallows the rest of an escape sequence (arrow keys send ESC [ A..D), so
+        its last byte can't pass for an answer. The bytes of one key arrive together.
+        """
+        lead = self._read_byte(ESCAPE_WAIT)
+        if lead == b"[":
+            # CSI: parameter bytes, then one final byte in @..~
+            while True:
+                byte = self._read_byte(ESCAPE_WAIT)
+                if byte is None or 0x40 <= byte[0] <= 0x7E:
+                    return
+        elif lead == b"O":
+            self._read_byte(ESCAPE_WAIT) # SS3: one more byte (F1-F4, arrows in application mode)
+
+    def read_choice(self, choices):
+        """Blocks until one of `choices` is pressed (case-insensitive)."""
+        valid = {c.upper() for c in choices}
+        while True:
+            key = self.read()
+            if key is None:
+                continue
+            if key.upper() in valid:
+                return key.upper()
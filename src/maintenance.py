@@ -0,0 +1,161 @@
+import time
+import sqlite3
+from src import db, profiling
+
+# Database upkeep for long-running installs: planner statistics, reclaiming
+# free pages, a quick corruption check and a size breakdown (`main.py db-maintain`).
+#
+# New databases are created with auto_vacuum=INCREMENTAL (see db.PRAGMAS), so
+# pages freed by deletes can be handed back a few at a time. Older files need
+# one full VACUUM (`db-maintain --vacuum`) to switch over.
+
+VACUUM_STEP = 256        # pages released per incremental_vacuum call (own transaction)
+TIME_BUDGET = 2.0        # seconds db-maintain spends on incremental vacuum
+ANALYSIS_LIMIT = 1000    # rows sampled per index by ANALYZE; keeps it fast on big banks
+AUTO_THRESHOLD = 0.10    # free pages / all pages that triggers maintenance at session end
+AUTO_BUDGET = 0.5        # seconds the session-end hook may spend
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+def stats(conn):
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        "page_size": page_size,
+        "pages": page_count,
+        "free_pages": free,
+        "bytes": page_count * page_size,
+        "fragmentation": free / page_count if page_count else 0.0,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(conn.execute("PRAGMA auto_vacuum").fetchone()[0], "?"),
+    }
+
+@profiling.timed("maintenance.analyze")
+def analyze(conn):
+    """Refreshes the planner statistics (sampled), then lets SQLite pick anything else it wants."""
+    conn.commit()
+    conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    conn.commit()
+
+@profiling.timed("maintenance.incremental_vacuum")
+def incremental_vacuum(conn, budget=TIME_BUDGET):
+    """
+    Returns free pages to the filesystem in small steps until none are left or
+    `budget` seconds pass. Each step is its own short write transaction, so a
+    session writing at the same time only ever waits for one step.
+    Returns the number of pages released (0 unless auto_vacuum is incremental).
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    conn.commit()
+    released = 0
+    deadline = time.monotonic() + budget
+    while time.monotonic() < deadline:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not before:
+            break
+        conn.execute(f"PRAGMA incremental_vacuum({VACUUM_STEP})").fetchall()
+        conn.commit()
+        released += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if released:
+        # The released pages sit in the WAL until it is checkpointed
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return released
+
+def full_vacuum(conn):
+    """Rewrites the whole file (blocks writers while it runs); also switches old files to incremental."""
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def quick_check(conn):
+    """PRAGMA quick_check: structural problems found, [] when the file is healthy."""
+    rows = [r[0] for r in conn.execute("PRAGMA quick_check")]
+    return [] if rows == ["ok"] else rows
+
+def size_report(conn):
+    """
+    [(table, pages, bytes, [(index, pages, bytes), ...]), ...], largest first.
+    None if this SQLite was built without the dbstat table.
+    """
+    try:
+        usage = {r[0]: (r[1], r[2]) for r in
+                 conn.execute("SELECT name, COUNT(*), SUM(pgsize) FROM dbstat GROUP BY name")}
+    except sqlite3.OperationalError:
+        return None
+    owners = {r[0]: (r[1], r[2]) for r in conn.execute("SELECT name, tbl_name, type FROM sqlite_master")}
+    tables = {}
+    for name, (pages, size) in usage.items():
+        table, kind = owners.get(name, (name, "table"))
+        entry = tables.setdefault(table, [table, 0, 0, []])
+        if kind == "index":
+            entry[3].append((name, pages, size))
+        else:
+            entry[1] += pages
+            entry[2] += size
+    report = []
+    for table, pages, size, indexes in tables.values():
+        indexes.sort(key=lambda i: -i[2])
+        report.append((table, pages, size, indexes))
+    report.sort(key=lambda t: -(t[2] + sum(i[2] for i in t[3])))
+    return report
+
+def _mb(size):
+    return f"{size / (1024 * 1024):8.2f} MB"
+
+def run(budget=TIME_BUDGET, vacuum=False):
+    """Everything `main.py db-maintain` does, with a printed report. Returns False on corruption."""
+    conn = db.get_connection()
+    before = stats(conn)
+    print(f"Database: {db.DB_PATH}")
+    print(f"  {_mb(before['bytes'])}, {before['pages']} pages of {before['page_size']} B, "
+          f"{before['free_pages']} free ({before['fragmentation']:.1%}), auto_vacuum={before['auto_vacuum']}")
+
+    problems = quick_check(conn)
+    if problems:
+        print("Integrity check FAILED (no changes made):")
+        for line in problems[:20]:
+            print(f"  {line}")
+        return False
+    print("Integrity: ok")
+
+    analyze(conn)
+    print("Statistics: refreshed (ANALYZE, PRAGMA optimize)")
+
+    if vacuum:
+        print("Running full VACUUM (writers wait until it finishes)...")
+        full_vacuum(conn)
+    elif before["auto_vacuum"] != "incremental":
+        print("Free pages can't be released incrementally on this file yet; run once with --vacuum.")
+    else:
+        released = incremental_vacuum(conn, budget)
+        print(f"Incremental vacuum: released {released} pages")
+
+    after = stats(conn)
+    print(f"  {_mb(after['bytes'])}, {after['free_pages']} free pages ({after['fragmentation']:.1%})")
+
+    report = size_report(conn)
+    if report is None:
+        print("Size breakdown unavailable (SQLite built without dbstat).")
+        return True
+    print(f"\n{'Table / index':40} {'Pages':>8} {'Size':>11}")
+    for table, pages, size, indexes in report:
+        print(f"{table:40} {pages:8d} {_mb(size)}")
+        for name, index_pages, index_size in indexes:
+            print(f"  {name:38} {index_pages:8d} {_mb(index_size)}")
+    return True
+
+def auto_maintain(conn=None, threshold=AUTO_THRESHOLD, budget=AUTO_BUDGET):
+    """
+    Session-end hook (opt-in): cheap upkeep once enough of the file is free
+    pages. Returns True if it ran.
+    """
+    conn = conn or db.get_connection()
+    if stats(conn)["fragmentation"] < threshold:
+        return False
+    incremental_vacuum(conn, budget)
+    conn.execute("PRAGMA optimize")
+    return True
@@ -1,11 +1,12 @@
-import sqlite3
 import numpy as np
-import pickle
+import json
 import os
 import time
-from sklearn.linear_model import SGDRegressor
-from sklearn.preprocessing import StandardScaler
+import threading
 from datetime import datetime
+from src import db, forecast, profiling, resets, sync
+from src.weights import RecallWeights, WEIGHTS_PATH
+from src.registry import ModelRegistry
 
 # Feature definitions:
 # 1. Repetition Count
@@ -13,69 +14,131 @@ from datetime import datetime
 # 3. Previous Recall Prob (or average score history)
 # 4. Last Response Time (normalized)
 
-MODEL_PATH = "models/memory_model.pkl"
-SCALER_PATH = "models/scaler.pkl"
-DB_PATH = "data/questions.db"
+# Pickles written by older versions; converted to WEIGHTS_PATH on first load
+LEGACY_MODEL_PATH = "models/memory_model.pkl"
+LEGACY_SCALER_PATH = "models/scaler.pkl"
+
+def review_target(is_correct, response_time):
+    # Label: 1.0 if correct, else 0.0
+    # Maybe weight by response time? 
+    # If correct but slow (e.g. > 10s), label = 0.5?
+    target = 1.0 if is_correct else 0.0
+    if is_correct and response_time > 10.0:
+        target = 0.7 # "Hard" correct
+    return target
 
 class MemoryEngine:
-    def __init__(self):
-        self.model = SGDRegressor(loss='squared_error', penalty='l2', learning_rate='invscaling', eta0=0.01)
-        self.scaler = StandardScaler()
-        self.is_fitted = False
-        self._load_model()
+    def __init__(self, verbose=True, registry=None, store=None):
+        # Weights are read on first use (see ensure_loaded) and sklearn is only
+        # imported when training, so constructing an engine costs nothing.
+        # self.weights is the population model trained on every learner's reviews;
+        # it is also the prior a learner's own model starts from.
+        self.weights = None
+        self.model = None
+        self.scaler = None
+        self.registry = registry if registry is not None else ModelRegistry()
+        self._learner_estimators = None # scratch pair reused to train learner models
+        self.store = store # optional src/store.py replica, kept current after every write
+        self.verbose = verbose
+        self.clock = time.time # swapped for a simulated clock by src/simulate.py
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @property
+    def is_fitted(self):
+        return self.weights is not None
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    def ensure_loaded(self):
+        """Loads the model weights once. Safe to call from a warm-up thread."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._load_model()
+            self._loaded = True
+
+    def ensure_trainer(self):
+        """Imports sklearn and builds estimators carrying the current weights."""
+        self.ensure_loaded()
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is not None:
+                return
+            model, scaler = self._new_estimators()
+            if self.weights is not None:
+                self.weights.to_estimators(model, scaler)
+            self.scaler = scaler
+            self.model = model
+
+    @staticmethod
+    def _new_estimators():
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+        model = SGDRegressor(loss='squared_error', penalty='l2', learning_rate='invscaling', eta0=0.01)
+        return model, StandardScaler()
 
     def _load_model(self):
-        if os.path.exists(MODEL_PATH) and os.path.exists(SCALER_PATH):
+        if os.path.exists(WEIGHTS_PATH):
             try:
-                with open(MODEL_PATH, 'rb') as f:
-                    self.model = pickle.load(f)
-                with open(SCALER_PATH, 'rb') as f:
-                    self.scaler = pickle.load(f)
-                self.is_fitted = True
-                print("Loaded existing memory model.")
+                self.weights = RecallWeights.load(WEIGHTS_PATH)
+                self._log("Loaded existing memory model.")
             except Exception as e:
-                print(f"Failed to load model: {e}. Starting fresh.")
+                self._log(f"Failed to load model: {e}. Starting fresh.")
+        elif os.path.exists(LEGACY_MODEL_PATH) and os.path.exists(LEGACY_SCALER_PATH):
+            self._migrate_legacy_model()
         else:
-            print("No existing model found. Starting fresh.")
-            # Initialize with dummy data to enable partial_fit immediately if needed
-            # Or handle first fit carefully
+            self._log("No existing model found. Starting fresh.")
+
+    def _migrate_legacy_model(self):
+        # One-time conversion of our own pickles; never loaded again afterwards
+        import pickle
+        try:
+            with open(LEGACY_MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
+            with open(LEGACY_SCALER_PATH, 'rb') as f:
+                scaler = pickle.load(f)
+            self.weights = RecallWeights.from_estimators(model, scaler)
+            self.weights.save(WEIGHTS_PATH)
+            self._log(f"Converted legacy model to {WEIGHTS_PATH}.")
+        except Exception as e:
+            self._log(f"Failed to convert legacy model: {e}. Starting fresh.")
     
+    @profiling.timed("memory.save_model")
     def _save_model(self):
-        os.makedirs("models", exist_ok=True)
-        with open(MODEL_PATH, 'wb') as f:
-            pickle.dump(self.model, f)
-        with open(SCALER_PATH, 'wb') as f:
-            pickle.dump(self.scaler, f)
+        self.weights.save(WEIGHTS_PATH)
 
-    def get_features(self, question_data):
+    def save(self, learners=True):
+        """
+        Persists the population weights (used by callers that batch updates) and,
+        unless learners=False, every learner model changed since the last flush.
+        """
+        if self.weights is not None:
+            self._save_model()
+        if learners:
+            self.registry.flush()
+
+    def learner_weights(self, user_id):
+        """The learner's own model, or the population prior while they have none."""
+        return self.registry.get(user_id) or self.weights
+
+    def get_features(self, question_data, now=None):
         """
         Constructs feature vector from question data.
         question_data: tuple or dict containing:
         - review_count
-        - last_reviewed_at (timestamp)
+        - last_reviewed_ts (epoch seconds, None if never reviewed)
         - (optional) avg_response_time or similar interaction history
+        now: epoch seconds of the review (defaults to the engine clock)
         """
         # For simplicity, let's assume we fetch these from DB or pass them in
         # We need to calculate 'days_since_last_review'
-        
-        last_reviewed = question_data.get('last_reviewed_at')
-        if not last_reviewed:
-            days_since = 1000.0 # Treat new questions as "very old" or handle separately? 
-            # Actually, new questions have likelihood 0 of recall if never seen, 
-            # but usually we want to PRIORITIZE them.
-            # Let's say days_since = 0 for new? No, that implies immediate review.
-            days_since = 0.0 
-        else:
-            # Parse timestamp if string
-            if isinstance(last_reviewed, str):
-                try:
-                    last_ts = datetime.fromisoformat(last_reviewed).timestamp()
-                except:
-                    last_ts = time.time() # validation fallback
-            else:
-                last_ts = last_reviewed
-            
-            days_since = (time.time() - last_ts) / (86400.0)
+        days_since = self._days_since(question_data.get('last_reviewed_ts'), now)
             
         review_count = question_data.get('review_count', 0)
         
@@ -83,10 +146,22 @@ class MemoryEngine:
         # We can add more 'classical' features later
         return np.array([[review_count, days_since]])
 
-    def train(self, features, label):
+    def _days_since(self, last_reviewed_ts, now=None):
+        if last_reviewed_ts is None:
+            # Actually, new questions have likelihood 0 of recall if never seen, 
+            # but usually we want to PRIORITIZE them.
+            # Let's say days_since = 0 for new? No, that implies immediate review.
+            return 0.0
+        # Integer epoch seconds: no parsing on the hot path
+        return ((now or self.clock()) - last_reviewed_ts) / 86400.0
+
+    @profiling.timed("memory.train")
+    def train(self, features, label, save=True, user_id=None):
         """
         updates the model with new experience.
-        label: 1.0 (Correct), 0.0 (Incorrect)
+        label: 1.0 (Correct), 0.0 (Incorrect); one per row of features
+        save: False defers writing the weights to a later save() call
+        user_id: also trains that learner's own model (written in registry batches)
         """
         # If not fitted, we need to fit on a batch or use partial_fit with classes?
         # SGDRegressor is strictly regression. Label is float.
@@ -99,60 +174,84 @@ class MemoryEngine:
         # Let's implementation a simple manual scaling or assume ranges.
         # Or just use the scaler's partial_fit if available. (It is available in 1.3+)
         
+        self.ensure_trainer()
         self.scaler.partial_fit(features)
         X_scaled = self.scaler.transform(features)
         
-        self.model.partial_fit(X_scaled, [label])
-        self.is_fitted = True
-        self._save_model()
+        # The learner's model starts from the population as it was before this review
+        prior = self.learner_weights(user_id) if user_id is not None else None
+        
+        labels = np.atleast_1d(label)
+        self.model.partial_fit(X_scaled, labels)
+        self.weights = RecallWeights.from_estimators(self.model, self.scaler)
+        if save:
+            self._save_model()
+        if user_id is not None:
+            self._train_learner(user_id, prior, features, labels)
 
-    def predict_recall(self, features):
-        if not self.is_fitted:
+    def _train_learner(self, user_id, prior, features, labels):
+        if self._learner_estimators is None:
+            self._learner_estimators = self._new_estimators()
+        if prior is None:
+            model, scaler = self._new_estimators() # nothing to start from yet
+        else:
+            model, scaler = prior.to_estimators(*self._learner_estimators)
+        scaler.partial_fit(features)
+        model.partial_fit(scaler.transform(features), labels)
+        self.registry.put(user_id, RecallWeights.from_estimators(model, scaler))
+
+    def predict_recall(self, features, user_id=None):
+        self.ensure_loaded()
+        weights = self.learner_weights(user_id) if user_id is not None else self.weights
+        if weights is None:
             # Heuristic fallback if model is cold
             # New questions (review_count=0) -> 0.0 recall (force review)
             # Old questions -> decays with time
             return 0.5 
             
-        X_scaled = self.scaler.transform(features)
-        prediction = self.model.predict(X_scaled)[0]
+        # Pure NumPy: inference never needs sklearn
+        prediction = float(weights.predict(features)[0])
         return max(0.0, min(1.0, prediction)) # Clip to [0, 1]
 
-    def update_question_stats(self, question_id, is_correct, response_time):
+    @profiling.timed("memory.update_question_stats")
+    def update_question_stats(self, question_id, is_correct, response_time, commit=True, user_id=db.DEFAULT_USER):
         """
-        Updates the DB with the result of a review and triggers model training.
+        Updates the learner's progress row with the result of a review and triggers model training.
+        commit=False leaves the transaction open and the weights unsaved so a
+        caller can group many answers into one commit and one save().
         """
-        conn = sqlite3.connect(DB_PATH)
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         # Get current stats
-        cursor.execute("SELECT review_count, last_reviewed_at FROM questions WHERE id=?", (question_id,))
+        cursor.execute("""
+            SELECT p.review_count, p.last_reviewed_ts, p.recall_score
+            FROM questions q LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+            WHERE q.id = ?
+        """, (user_id, question_id))
         row = cursor.fetchone()
         
         if not row:
             return
             
-        old_count, last_ts = row
+        old_count, last_ts, old_score = row
         old_count = old_count if old_count else 0
         
         # Prepare features for training (state BEFORE this review)
         features = self.get_features({
             'review_count': old_count,
-            'last_reviewed_at': last_ts
+            'last_reviewed_ts': last_ts
         })
         
-        # Label: 1.0 if correct, else 0.0
-        # Maybe weight by response time? 
-        # If correct but slow (e.g. > 10s), label = 0.5?
-        target = 1.0 if is_correct else 0.0
-        if is_correct and response_time > 10.0:
-            target = 0.7 # "Hard" correct
+        target = review_target(is_correct, response_time)
         
-        # Train model
-        self.train(features, target)
+        # Train the population model and this learner's own
+        self.train(features, target, save=commit, user_id=user_id)
         
         # Update DB
         new_count = old_count + 1
-        new_ts = datetime.now().isoformat()
+        now_ts = self.clock()
+        now = datetime.fromtimestamp(now_ts)
         
         # Predict NEW recall score for scheduling (future state)
         # We can just store the model's current prediction for "now", but scheduling 
@@ -161,14 +260,78 @@ class MemoryEngine:
         # or store the model's prediction for ONE DAY from now?
         # Let's store the current 'strength' (0-1).
         
+        # Written in the learner's current epoch (replacing any stale row)
+        epoch = resets.current_epoch(cursor, user_id)
         cursor.execute("""
-            UPDATE questions 
-            SET review_count=?, last_reviewed_at=?, recall_score=?
-            WHERE id=?
-        """, (new_count, new_ts, target, question_id))
+            INSERT OR REPLACE INTO progress (user_id, question_id, review_count, last_reviewed_ts, recall_score, epoch)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, question_id, new_count, int(now_ts), target, epoch))
+        sync.record(cursor, user_id, epoch, [(question_id, int(now_ts), target)])
+        if self.store is not None:
+            self.store.apply(user_id, [(question_id, new_count, int(now_ts), target)])
+        
+        # Roll the review into today's mastery bucket for forecasting
+        forecast.record_review(cursor, old_score, target, day=now.date().toordinal(), user_id=user_id)
         
-        conn.commit()
-        conn.close()
+        if commit:
+            conn.commit()
+
+    @profiling.timed("memory.update_many")
+    def update_many(self, events, commit=True, user_id=db.DEFAULT_USER):
+        """
+        Applies many reviews at once (imports, client sync, end-of-session flush).
+        events: iterable of (question_id, is_correct, response_time[, reviewed_at epoch]),
+        in the order they happened. One read of prior state, one partial_fit over
+        the whole feature matrix, one weights save and one executemany.
+        Returns the number of reviews applied (unknown question ids are skipped).
+        """
+        events = list(events)
+        if not events:
+            return 0
+        conn = db.get_connection()
+        cursor = conn.cursor()
+
+        ids = sorted({e[0] for e in events})
+        cursor.execute("""
+            SELECT q.id, p.review_count, p.last_reviewed_ts, p.recall_score
+            FROM questions q LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+            WHERE q.id IN (SELECT value FROM json_each(?))
+        """, (user_id, json.dumps(ids)))
+        state = {qid: (count or 0, last_ts, score) for qid, count, last_ts, score in cursor.fetchall()}
+
+        # Walk the events in order so repeats of a question see the earlier review
+        rows, targets, progress, transitions, log = [], [], {}, [], []
+        for event in events:
+            question_id, is_correct, response_time = event[:3]
+            if question_id not in state:
+                continue
+            now = event[3] if len(event) > 3 and event[3] is not None else self.clock()
+            old_count, last_ts, old_score = state[question_id]
+            rows.append((old_count, self._days_since(last_ts, now)))
+            target = review_target(is_correct, response_time)
+            targets.append(target)
+            reviewed = datetime.fromtimestamp(now)
+            state[question_id] = (old_count + 1, now, target)
+            progress[question_id] = (question_id, old_count + 1, int(now), target)
+            log.append((question_id, int(now), target))
+            transitions.append((old_score, target, reviewed.date().toordinal()))
+        if not rows:
+            return 0
+
+        self.train(np.array(rows, dtype=np.float64), np.array(targets), save=commit, user_id=user_id)
+        epoch = resets.current_epoch(cursor, user_id)
+        cursor.executemany("""
+            INSERT OR REPLACE INTO progress (user_id, question_id, review_count, last_reviewed_ts, recall_score, epoch)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, ((user_id, *row, epoch) for row in progress.values()))
+        sync.record(cursor, user_id, epoch, log)
+        if self.store is not None:
+            self.store.apply(user_id, list(progress.values()))
+        forecast.record_reviews(cursor, transitions, user_id=user_id)
+
+        if commit:
+            conn.commit()
+        return len(rows)
 
 if __name__ == "__main__":
     # Smoke test
@@ -0,0 +1,288 @@
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+import uuid
+from contextlib import nullcontext
+from src import journal
+
+# Study packs: a subject's questions compiled into one read-only file that a
+# session can run from with nothing but the standard library (`main.py pack`,
+# `pack-study`, `pack-sync`). Meant for slow machines where opening SQLite and
+# importing NumPy/sklearn is most of the start-up time.
+#
+# Layout (little-endian):
+#   header   HEADER, below
+#   meta     one META record per question: fixed width, read in place
+#   offsets  uint32 per string + 1: string k is text[offsets[k]:offsets[k + 1]]
+#   text     UTF-8, back to back. Strings 5i..5i+4 are question i's text and
+#            options A-D, then one per subject label, then the learner's id.
+#
+# The reader maps the file and slices it; nothing is decoded until a question is
+# shown. Answers go to PATH.answers.jsonl beside the pack (a header line, then
+# one line per answer) and reach the database later through `pack-sync`, which
+# applies each answer exactly once (the watermark helpers in src/journal.py).
+
+MAGIC = b"VIVAPACK"
+VERSION = 1
+HEADER = struct.Struct("<8sII16sIIQQQ") # magic, version, questions, pack id, subjects, reserved, 3 section offsets
+META = struct.Struct("<IHBxIqf")         # question id, subject index, answer index, review count, last review, recall
+STRINGS_PER_QUESTION = 5
+ANSWERS = "ABCD"
+NEVER = -1                               # last review time of a question never seen
+
+def answers_path(path):
+    return path + ".answers.jsonl"
+
+def _align(n, to=8):
+    return (n + to - 1) // to * to
+
+def build(conn, path, subject=None, user_id="default"):
+    """
+    Writes the pack for `subject` (its whole subtree; None = the whole bank) with
+    the learner's progress as of now. Returns the number of questions, or None
+    if the subject matches nothing.
+    """
+    from src import subjects
+    where, params = "", [user_id]
+    if subject:
+        subject_ids = subjects.resolve(conn, subject)
+        if not subject_ids:
+            return None
+        where, params = "WHERE q.subject_id IN (SELECT value FROM json_each(?))", [user_id, json.dumps(subject_ids)]
+    rows = conn.execute(f'''
+        SELECT q.id, q.subject, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d, q.correct_answer,
+               COALESCE(p.review_count, 0), p.last_reviewed_ts, COALESCE(p.recall_score, 0.0)
+        FROM questions q LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+        {where} ORDER BY q.id
+    ''', params).fetchall()
+
+    labels = {}
+    meta, strings = bytearray(), []
+    for qid, label, text, a, b, c, d, correct, count, last_ts, score in rows:
+        index = labels.setdefault(label or "", len(labels))
+        answer = ANSWERS.find((correct or "").strip().upper()[:1]) if correct else -1
+        meta += META.pack(qid, index, answer if answer >= 0 else 255, count,
+                          NEVER if last_ts is None else last_ts, score)
+        strings.extend(s or "" for s in (text, a, b, c, d))
+    strings.extend(labels)
+    strings.append(user_id)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets, position = [], 0
+    for blob in encoded:
+        offsets.append(position)
+        position += len(blob)
+    offsets.append(position)
+
+    meta_at = _align(HEADER.size)
+    offsets_at = _align(meta_at + len(meta))
+    text_at = _align(offsets_at + 4 * len(offsets))
+    header = HEADER.pack(MAGIC, VERSION, len(rows), uuid.uuid4().bytes, len(labels), 0, meta_at, offsets_at, text_at)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".part", "wb") as f:
+        for at, chunk in ((0, header), (meta_at, meta), (offsets_at, struct.pack(f"<{len(offsets)}I", *offsets))):
+            f.write(b"\0" * (at - f.tell()))
+            f.write(chunk)
+        f.write(b"\0" * (text_at - f.tell()))
+        for blob in encoded:
+            f.write(blob)
+    os.replace(path + ".part", path)
+    return len(rows)
+
+class StudyPack:
+    """A pack mapped into memory. question(i) decodes just that question's strings."""
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Study packs are little-endian; this machine is not")
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, pack_id, labels, _, meta_at, offsets_at, text_at = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a study pack")
+        self.pack_id = pack_id.hex()
+        self._count = count
+        self._labels = labels
+        self._meta_at = meta_at
+        self._text_at = text_at
+        self._view = memoryview(self._map)
+        string_count = STRINGS_PER_QUESTION * count + labels + 1
+        self._offsets = self._view[offsets_at:offsets_at + 4 * (string_count + 1)].cast("I")
+        self.user_id = self._string(string_count - 1)
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._map is not None:
+            self._offsets.release()
+            self._view.release()
+            self._map.close()
+            self._map = None
+
+    def _string(self, k):
+        start = self._text_at + self._offsets[k]
+        return str(self._view[start:self._text_at + self._offsets[k + 1]], "utf-8")
+
+    def meta(self, i):
+        """(question id, subject index, answer index, review count, last review or NEVER, recall score)"""
+        return META.unpack_from(self._map, self._meta_at + i * META.size)
+
+    def metas(self):
+        return META.iter_unpack(self._view[self._meta_at:self._meta_at + self._count * META.size])
+
+    def question(self, i):
+        """Question i as a dict shaped like the rows SessionManager hands out."""
+        qid, label, answer, count, last_ts, score = self.meta(i)
+        base = STRINGS_PER_QUESTION * i
+        text, a, b, c, d = (self._string(base + k) for k in range(STRINGS_PER_QUESTION))
+        return {
+            "id": qid, "subject": self._string(STRINGS_PER_QUESTION * self._count + label),
+            "question_text": text, "option_a": a, "option_b": b, "option_c": c, "option_d": d,
+            "correct_answer": ANSWERS[answer] if answer < len(ANSWERS) else "",
+            "review_count": count, "last_reviewed_ts": None if last_ts == NEVER else last_ts,
+            "recall_score": score,
+        }
+
+def read_answers(path):
+    """
+    (header, answers, intact bytes) from an answers file, stopping at a torn
+    last line; (None, [], 0) if there is none.
+    """
+    records, intact = journal.read_records(path)
+    if not records or "pack" not in records[0]:
+        return None, [], 0
+    return records[0], records[1:], intact
+
+def select(pack, count, answered=None, rng=random):
+    """
+    Pack positions for a session, same mix as SessionManager: weakest reviewed
+    half, a fifth new, the rest random. `answered` ({question id: correct})
+    overlays answers not yet synced; the real scores come back with pack-sync.
+    """
+    answered = answered or {}
+    weak, new, seen = [], [], []
+    for i, (qid, _, _, reviews, _, score) in enumerate(pack.metas()):
+        if qid in answered:
+            reviews, score = reviews + 1, 1.0 if answered[qid] else 0.0
+        if reviews:
+            weak.append((score, i))
+            seen.append(i)
+        else:
+            new.append(i)
+    weak.sort()
+    chosen = [i for _, i in weak[:int(count * 0.5)]]
+    taken = set(chosen)
+    chosen += rng.sample(new, min(len(new), int(count * 0.2)))
+    taken.update(chosen)
+    for pool in (seen, new):
+        rest = [i for i in pool if i not in taken]
+        extra = rng.sample(rest, max(0, min(len(rest), count - len(chosen))))
+        chosen += extra
+        taken.update(extra)
+    rng.shuffle(chosen)
+    return chosen
+
+def study(path, count=20, feedback_delay=1.5):
+    """A plain-terminal session straight off the pack. Returns (correct, answered)."""
+    from src import keys
+    with StudyPack(path) as pack:
+        log = answers_path(path)
+        header, previous, intact = read_answers(log)
+        if header is not None and header["pack"] != pack.pack_id:
+            raise ValueError(f"{log} belongs to another build of this pack; run pack-sync, then delete it")
+        answered = {a["qid"]: a["ok"] for a in previous}
+        positions = select(pack, count, answered)
+        if not positions:
+            print("This pack has no questions.")
+            return 0, 0
+
+        correct = done = 0
+        reader = keys.KeyReader() if keys.is_interactive() else None
+        with open(log, "a", encoding="utf-8") as out:
+            out.truncate(intact) # drops a torn line left by a crash
+            if header is None:
+                out.write(json.dumps({"pack": pack.pack_id, "user": pack.user_id}) + "\n")
+            try:
+                with reader or nullcontext():
+                    for n, i in enumerate(positions, 1):
+                        q = pack.question(i)
+                        print(f"\n[{n}/{len(positions)}] {q['subject']}")
+                        print(q["question_text"])
+                        for letter in ANSWERS:
+                            print(f"  ({letter}) {q['option_' + letter.lower()]}")
+                        start = time.perf_counter()
+                        if reader:
+                            reader.flush()
+                            choice = reader.read_choice(list(ANSWERS))
+                        else:
+                            choice = ""
+                            while not choice or choice not in ANSWERS:
+                                choice = input("Your answer (A/B/C/D): ").strip().upper()[:1]
+                        response_time = time.perf_counter() - start
+                        ok = choice == q["correct_answer"]
+                        correct += ok
+                        done += 1
+                        print(f"{choice}: Correct!" if ok else f"{choice}: Wrong! Ans: {q['correct_answer']}")
+                        out.write(json.dumps({"qid": q["id"], "ok": ok, "rt": round(response_time, 3),
+                                              "ts": int(time.time())}) + "\n")
+                        out.flush()
+                        if reader:
+                            reader.read(timeout=feedback_delay)
+                        elif feedback_delay:
+                            time.sleep(feedback_delay)
+            except KeyboardInterrupt:
+                print("\nSession stopped; the answers so far are saved.")
+            finally:
+                os.fsync(out.fileno())
+        return correct, done
+
+def sync(path, engine=None):
+    """
+    Applies a pack's answers file to the database (pack-sync) through
+    MemoryEngine.update_many with the original times. The count applied is
+    committed with the progress rows, so syncing again applies only new answers.
+    Returns how many were applied.
+    """
+    from src import db
+    header, answers, _ = read_answers(path)
+    if header is None:
+        return 0
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    session_id = f"pack-{header['pack']}"
+    missing = answers[journal.applied_count(cursor, session_id):]
+    if not missing:
+        return 0
+    if engine is None:
+        from src import memory
+        engine = memory.MemoryEngine(verbose=False)
+    try:
+        engine.update_many([(a["qid"], a["ok"], a["rt"], a["ts"]) for a in missing], commit=False, user_id=header["user"])
+        journal.mark_applied(cursor, session_id, header["user"], len(answers))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    engine.save()
+    return len(missing)
+
+def unsynced(path):
+    """Answers in the pack's answers file that the database doesn't have yet."""
+    from src import db
+    header, answers, _ = read_answers(answers_path(path))
+    if header is None:
+        return 0
+    return len(answers) - journal.applied_count(db.get_connection().cursor(), f"pack-{header['pack']}")
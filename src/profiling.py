@@ -0,0 +1,107 @@
+import json
+import os
+import time
+import functools
+from collections import defaultdict
+
+# Opt-in hot-path instrumentation. Everything here is a cheap no-op until
+# enable() is called (main.py --profile), so the decorators can stay on the
+# hot paths permanently.
+
+ENABLED = False
+MAX_SAMPLES = 100000 # per operation; older samples are dropped beyond this
+
+_samples = defaultdict(list)   # operation -> [seconds, ...]
+_sql_counts = defaultdict(int) # statement text -> executions
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def reset():
+    _samples.clear()
+    _sql_counts.clear()
+
+def record(name, seconds):
+    samples = _samples[name]
+    if len(samples) >= MAX_SAMPLES:
+        del samples[:MAX_SAMPLES // 10]
+    samples.append(seconds)
+
+class timed:
+    """
+    Times a block or function under `name` when profiling is enabled.
+
+        @profiling.timed("session.select")
+        def get_questions_for_session(...): ...
+
+        with profiling.timed("model.save"):
+            ...
+    """
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+            self.start = None
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+
+def _trace(statement):
+    # Collapse whitespace so the same statement always lands in one bucket
+    _sql_counts[" ".join(statement.split())[:200]] += 1
+
+def trace_sql(conn):
+    """Counts every statement run on `conn` (sqlite3 set_trace_callback)."""
+    if ENABLED:
+        conn.set_trace_callback(_trace)
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summary():
+    ops = {}
+    for name, samples in sorted(_samples.items()):
+        values = sorted(samples)
+        ops[name] = {
+            "count": len(values),
+            "total_ms": sum(values) * 1000,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000 if values else 0.0,
+        }
+    statements = sorted(_sql_counts.items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        "operations": ops,
+        "sql": [{"statement": sql, "count": count} for sql, count in statements],
+    }
+
+def write_summary(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary(), f, indent=2)
+    print(f"Profile summary saved to {path}")
@@ -0,0 +1,79 @@
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+from src.weights import RecallWeights
+
+# Per-learner memory models. Each learner's weights are a few dozen floats in
+# models/learners/<user>.npy (same format as src/weights.py). The registry keeps
+# the most recently used ones in memory, writes changed ones back in batches,
+# and returns None for learners without a model so callers can fall back to
+# the shared population prior.
+
+LEARNERS_DIR = "models/learners"
+CAPACITY = 1024     # learners kept in memory
+FLUSH_EVERY = 32    # dirty learners allowed before they are written out together
+
+class ModelRegistry:
+    def __init__(self, directory=LEARNERS_DIR, capacity=CAPACITY, flush_every=FLUSH_EVERY):
+        # Resolved now: a flush at interpreter exit must not follow a later chdir
+        self.directory = os.path.abspath(directory)
+        self.capacity = capacity
+        self.flush_every = flush_every
+        self._models = OrderedDict() # user_id -> RecallWeights, least recently used first
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+    def path(self, user_id):
+        # quote() keeps any learner id a single, collision-free file name
+        return os.path.join(self.directory, quote(user_id, safe="") + ".npy")
+
+    def get(self, user_id):
+        """The learner's weights, loaded on first use; None for a cold learner."""
+        with self._lock:
+            weights = self._models.get(user_id)
+            if weights is not None:
+                self._models.move_to_end(user_id)
+                return weights
+            path = self.path(user_id)
+            if not os.path.exists(path):
+                return None
+            weights = RecallWeights.load(path)
+            self._insert(user_id, weights)
+            return weights
+
+    def put(self, user_id, weights):
+        """Replaces the learner's weights; they reach disk with the next batch flush."""
+        with self._lock:
+            self._insert(user_id, weights)
+            self._dirty.add(user_id)
+            if len(self._dirty) >= self.flush_every:
+                self.flush()
+
+    def _insert(self, user_id, weights):
+        self._models[user_id] = weights
+        self._models.move_to_end(user_id)
+        while len(self._models) > self.capacity:
+            evicted, old = self._models.popitem(last=False)
+            if evicted in self._dirty:
+                old.save(self.path(evicted))
+                self._dirty.discard(evicted)
+
+    def flush(self):
+        """Writes every changed learner model. Returns how many were written."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            os.makedirs(self.directory, exist_ok=True)
+            for user_id in self._dirty:
+                self._models[user_id].save(self.path(user_id))
+            written = len(self._dirty)
+            self._dirty.clear()
+            return written
+
+    def __len__(self):
+        return len(self._models)
+
+    @property
+    def dirty(self):
+        return len(self._dirty)
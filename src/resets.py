@@ -0,0 +1,79 @@
+from src import db, forecast, subjects
+
+# Progress resets by epoch. A reset bumps the learner's epoch and records its
+# scope (the whole bank, or each subject in a subtree) in progress_resets; it
+# never touches progress itself, so it is instant and holds the write lock for
+# a moment only. live_progress hides the rows the reset made stale, new reviews
+# are written with the new epoch, and collect() deletes the stale rows later in
+# small batches (review_log events too), dropping the reset once nothing stale
+# is left.
+# A scoped reset also takes its subtree's mastered questions back out of the
+# learner's daily mastery buckets (see src/forecast.py), so the forecast
+# doesn't keep counting gains that were just reset.
+
+GC_BATCH = 5000 # stale rows deleted per collect() call
+
+def current_epoch(cursor, user_id):
+    """Epoch new progress rows for this learner are written with."""
+    cursor.execute("SELECT epoch FROM learner_epochs WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def learners(conn):
+    """Every learner with progress or a reset on record."""
+    rows = conn.execute("SELECT DISTINCT user_id FROM progress UNION SELECT user_id FROM learner_epochs")
+    return [r[0] for r in rows]
+
+def reset(conn, user_id, subject=None):
+    """
+    Makes the learner's progress (or one subject subtree of it) stale. Returns
+    the new epoch, or None if `subject` matches nothing.
+    """
+    scope = [0] if subject is None else subjects.resolve(conn, subject)
+    if not scope:
+        return None
+    with conn:
+        cursor = conn.cursor()
+        epoch = current_epoch(cursor, user_id) + 1
+        cursor.execute("INSERT OR REPLACE INTO learner_epochs (user_id, epoch) VALUES (?, ?)", (user_id, epoch))
+        if subject is None:
+            # A whole-bank reset covers every earlier scoped one
+            cursor.execute("DELETE FROM progress_resets WHERE user_id = ?", (user_id,))
+            # Daily buckets are a handful of rows per learner
+            cursor.execute("DELETE FROM mastery_daily WHERE user_id = ?", (user_id,))
+        else:
+            # A scoped reset keeps the buckets, so the subtree's mastered questions
+            # are taken back out of them; otherwise the forecast still counts them
+            forecast.record_reset(cursor, scope, user_id)
+        cursor.executemany("INSERT OR REPLACE INTO progress_resets (user_id, subject_id, epoch) VALUES (?, ?, ?)",
+                           [(user_id, subject_id, epoch) for subject_id in scope])
+    return epoch
+
+def collect(conn, limit=GC_BATCH):
+    """
+    Deletes up to `limit` stale progress rows and review_log events; returns
+    how many went. A learner's resets are dropped once a pass finds nothing
+    left to delete in either.
+    """
+    deleted = 0
+    pending = [r[0] for r in conn.execute("SELECT DISTINCT user_id FROM progress_resets")]
+    for user_id in pending:
+        if deleted >= limit:
+            break
+        with conn:
+            done = True
+            for table, key in (("progress", "question_id"), ("review_log", "seq")):
+                batch = limit - deleted
+                if batch <= 0:
+                    done = False
+                    break
+                cursor = conn.execute(f'''
+                    DELETE FROM {table} WHERE user_id = ? AND {key} IN (
+                        SELECT {key} FROM {table} p WHERE p.user_id = ? AND {db.PROGRESS_STALE} LIMIT ?
+                    )
+                ''', (user_id, user_id, batch))
+                deleted += cursor.rowcount
+                done = done and cursor.rowcount < batch
+            if done:
+                conn.execute("DELETE FROM progress_resets WHERE user_id = ?", (user_id,))
+    return deleted
@@ -0,0 +1,62 @@
+import json
+import re
+import sqlite3
+from src import db, profiling, subjects
+
+# Ranked full-text search over question text and options (the FTS5 index is
+# defined in src/db.py and maintained by triggers, so ingestion needs nothing extra).
+
+LIMIT = 20
+# bm25 column weights: question_text, option_a..option_d. A hit in the question
+# counts for more than one in an option.
+WEIGHTS = (4.0, 1.0, 1.0, 1.0, 1.0)
+
+TOKEN_RE = re.compile(r'\w+\*?', re.UNICODE)
+
+def to_match(query):
+    """
+    Free text -> FTS5 query: every word must appear (in any column), each one
+    quoted so punctuation or words like AND/NOT in the input are never syntax.
+    A trailing * keeps prefix matching: 'consti*' -> constitution, constituent.
+    """
+    terms = []
+    for token in TOKEN_RE.findall(query):
+        prefix = token.endswith("*")
+        word = token.rstrip("*")
+        terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+@profiling.timed("search.query")
+def search(query, subject=None, limit=LIMIT):
+    """
+    Best matches first (all of them when limit is None). Returns dicts with id,
+    subject, question_text, snippet and rank (lower is better). The snippet comes
+    from whichever column matched best, question or option. Raises RuntimeError
+    if this SQLite has no FTS5.
+    """
+    match = to_match(query)
+    if not match:
+        return []
+    conn = db.get_connection()
+    sql = f'''
+        SELECT q.id, q.subject, q.question_text,
+               snippet(questions_fts, -1, '[', ']', '…', 12) AS snippet,
+               bm25(questions_fts, {", ".join(map(str, WEIGHTS))}) AS rank
+        FROM questions_fts
+        JOIN questions q ON q.id = questions_fts.rowid
+        WHERE questions_fts MATCH ?
+    '''
+    params = [match]
+    if subject:
+        sql += " AND q.subject_id IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(subjects.resolve(conn, subject)))
+    sql += " ORDER BY rank"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        return [dict(r) for r in conn.execute(sql, params)]
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e) or "no such module" in str(e):
+            raise RuntimeError("Full-text search needs an SQLite build with FTS5.")
+        raise
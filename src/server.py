@@ -0,0 +1,288 @@
+import asyncio
+import json
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from src import db, resets
+
+# Local HTTP/JSON API for many learners sharing one question bank.
+#
+#   GET  /subjects
+#   GET  /session?user=asha&count=20&subject=...    questions without their answers
+#   POST /answer   {"user": "asha", "question_id": 1, "answer": "B", "response_time": 3.2}
+#   GET  /analytics?user=asha
+#
+# `user` selects the learner's progress rows and defaults to db.DEFAULT_USER.
+# Reads run on a small thread pool; each thread keeps its own connection
+# (src/db.py is thread-local), and WAL lets them proceed while a write commits.
+# All writes go through one writer task that groups answers into batched
+# commits and saves the population model once per batch (per-learner models
+# are flushed by src/registry.py). Learners get their reply once their
+# answer's batch is committed.
+# With in_memory=True sessions are picked from an in-memory replica of the bank
+# (src/store.py) that the writer keeps current, instead of querying SQLite.
+
+HOST = "127.0.0.1"
+PORT = 8765
+READ_THREADS = 8
+BATCH_SIZE = 64
+BATCH_WINDOW = 0.01 # seconds to wait for more answers before committing
+MAX_BODY = 64 * 1024
+GC_SLICE = 500 # stale progress rows deleted after each write batch
+
+ANSWERS = ("A", "B", "C", "D")
+PUBLIC_FIELDS = ("id", "subject", "question_text", "option_a", "option_b", "option_c", "option_d")
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class AnswerWriter:
+    """Single serialized writer: drains queued answers and commits them in batches."""
+    def __init__(self, batch_size=BATCH_SIZE, window=BATCH_WINDOW, store=None):
+        self.queue = asyncio.Queue()
+        self.batch_size = batch_size
+        self.window = window
+        # One dedicated thread, so the writer's connection and MemoryEngine never change threads
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="viva-writer")
+        self.engine = None
+        self.store = store
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def submit(self, user_id, question_id, is_correct, response_time):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((user_id, question_id, is_correct, response_time, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await loop.run_in_executor(self.executor, self.write_batch, batch)
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_result(True)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def write_batch(self, batch):
+        if self.engine is None:
+            from src import memory
+            self.engine = memory.MemoryEngine(verbose=False, store=self.store)
+        conn = db.get_connection()
+        try:
+            # One update_many per learner: one read, one fit and one executemany each
+            by_user = {}
+            for user_id, question_id, is_correct, response_time, _ in batch:
+                by_user.setdefault(user_id, []).append((question_id, is_correct, response_time))
+            for user_id, events in by_user.items():
+                self.engine.update_many(events, commit=False, user_id=user_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if self.store is not None:
+                # The replica already took some of these rows; re-read those learners
+                for user_id in {item[0] for item in batch}:
+                    self.store.invalidate(user_id)
+            raise
+        # Learner models stay in the registry and are flushed in their own batches
+        self.engine.save(learners=False)
+        # Rows made stale by a reset go a few at a time, between batches
+        resets.collect(conn, GC_SLICE)
+
+    def flush(self):
+        if self.engine is not None:
+            self.engine.save()
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.flush)
+        self.executor.shutdown(wait=True)
+
+class APIServer:
+    def __init__(self, read_threads=READ_THREADS, batch_size=BATCH_SIZE, window=BATCH_WINDOW, in_memory=False):
+        self.readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="viva-reader")
+        self.store = None
+        if in_memory:
+            from src.store import QuestionStore
+            self.store = QuestionStore.load()
+        self.writer = AnswerWriter(batch_size, window, self.store)
+
+    async def read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, fn, *args)
+
+    # --- handlers (run on reader threads) ---
+
+    def _subjects(self):
+        from src import session
+        return {"subjects": session.SessionManager().get_available_subjects()}
+
+    def _session(self, user_id, count, subject):
+        from src import session
+        questions = session.SessionManager(user_id, self.store).get_questions_for_session(count, subject)
+        return {"questions": [{k: q[k] for k in PUBLIC_FIELDS} for q in questions]}
+
+    def _correct_answer(self, question_id):
+        row = db.get_connection().execute(
+            "SELECT correct_answer FROM questions WHERE id=?", (question_id,)).fetchone()
+        return row[0] if row else None
+
+    def _analytics(self, user_id):
+        from src.analytics import AnalyticsEngine
+        engine = AnalyticsEngine(user_id) # per call: the engine caches a thread-local connection
+        prediction = engine.get_mastery_prediction()
+        for key, value in prediction.items():
+            if value == float('inf'):
+                prediction[key] = None # not representable in JSON
+        return {
+            "overall": engine.get_overall_stats(),
+            "subjects": engine.get_subject_performance(),
+            "prediction": prediction,
+        }
+
+    # --- routing ---
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        user_id = query.get("user") or db.DEFAULT_USER
+
+        if url.path == "/subjects" and method == "GET":
+            return await self.read(self._subjects)
+
+        if url.path == "/session" and method == "GET":
+            try:
+                count = max(1, min(200, int(query.get("count", 20))))
+            except ValueError:
+                raise HTTPError(400, "count must be an integer")
+            return await self.read(self._session, user_id, count, query.get("subject"))
+
+        if url.path == "/answer" and method == "POST":
+            try:
+                payload = json.loads(body or b"{}")
+                question_id = int(payload["question_id"])
+                answer = str(payload["answer"]).strip().upper()
+                response_time = float(payload.get("response_time", 0.0))
+                user_id = str(payload.get("user") or db.DEFAULT_USER)
+            except (ValueError, KeyError, TypeError):
+                raise HTTPError(400, "expected JSON with question_id, answer and response_time")
+            if answer not in ANSWERS:
+                raise HTTPError(400, "answer must be one of A, B, C, D")
+            if not 0.0 <= response_time < float("inf"):
+                raise HTTPError(400, "response_time must be a non-negative number of seconds")
+            correct_answer = await self.read(self._correct_answer, question_id)
+            if correct_answer is None:
+                raise HTTPError(404, f"question {question_id} not found")
+            is_correct = answer == correct_answer.upper()
+            await self.writer.submit(user_id, question_id, is_correct, response_time)
+            return {"correct": is_correct, "correct_answer": correct_answer}
+
+        if url.path == "/analytics" and method == "GET":
+            return await self.read(self._analytics, user_id)
+
+        if url.path in ("/subjects", "/session", "/answer", "/analytics"):
+            raise HTTPError(405, f"{method} not allowed on {url.path}")
+        raise HTTPError(404, f"no route for {url.path}")
+
+    # --- HTTP/1.1 plumbing ---
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, {"error": "invalid Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = 200, await self.route(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception:
+                    # Details stay in the server's log: they can carry SQL and file paths
+                    print(f"Error handling {method} {target}:", file=sys.stderr)
+                    traceback.print_exc()
+                    status, payload = 500, {"error": "internal server error"}
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=HOST, port=PORT, ready=None):
+        self.writer.start()
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.writer.close()
+            self.readers.shutdown(wait=False)
+
+def run(host=HOST, port=PORT, read_threads=READ_THREADS, batch_size=BATCH_SIZE, window=BATCH_WINDOW, in_memory=False):
+    server = APIServer(read_threads, batch_size, window, in_memory)
+    print(f"Serving on http://{host}:{port} (Ctrl-C to stop)")
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
@@ -1,46 +1,114 @@
-import sqlite3
+import json
 import random
 import time
+import threading
+from contextlib import nullcontext
 from datetime import datetime
-from src import memory
-from rich.prompt import Prompt
+from src import db, keys, profiling, resets, startup, subjects
 from rich.console import Console
 
-DB_PATH = "data/questions.db"
+FEEDBACK_DELAY = 1.5 # seconds; any key skips it
 console = Console()
 
 class SessionManager:
-    def __init__(self):
-        self.mem_engine = memory.MemoryEngine()
+    def __init__(self, user_id=db.DEFAULT_USER, store=None, auto_maintain=False):
+        self.user_id = user_id
+        self.store = store # optional in-memory replica (src/store.py) to select from
+        self.auto_maintain = auto_maintain # compact/optimize the file at session end when fragmented
+        self._mem_engine = None
+        self._engine_lock = threading.Lock() # warm_up's thread and the session may both build it
+        self._warmup = None
         self.total_questions = 0
         self.correct_count = 0
         self.start_time = None
 
-    def get_questions_for_session(self, total_count=20, subject=None):
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+    @property
+    def mem_engine(self):
+        # Imported lazily: src.memory pulls in NumPy, and the engine itself sklearn
+        if self._mem_engine is None:
+            with self._engine_lock:
+                if self._mem_engine is None:
+                    import atexit
+                    from src import memory
+                    engine = memory.MemoryEngine(verbose=False, store=self.store)
+                    # Learner models are written in batches; whatever is pending goes out on exit
+                    atexit.register(engine.registry.flush)
+                    self._mem_engine = engine
+        return self._mem_engine
+
+    def close(self):
+        """
+        Writes pending learner models and drops the exit hook. Call it before
+        changing directory or throwing the manager away mid-process.
+        """
+        if self._mem_engine is not None:
+            import atexit
+            self._mem_engine.registry.flush()
+            atexit.unregister(self._mem_engine.registry.flush)
+
+    def warm_up(self):
+        """Loads the memory model in the background while the user is still on the menu."""
+        if self._warmup is None:
+            self._warmup = threading.Thread(target=lambda: self.mem_engine.ensure_trainer(), daemon=True)
+            self._warmup.start()
+        return self._warmup
+
+    @profiling.timed("session.select")
+    def get_questions_for_session(self, total_count=20, subject=None, question_ids=None):
+        """
+        Picks a session's questions (weak first, then new, then the rest).
+        question_ids, when given, limits the pool (e.g. a search result set).
+        """
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         questions = []
         selected_ids = set()
         
-        # Base SQL condition
-        where_clause = "WHERE subject = ?" if subject else "WHERE 1=1"
-        params = [subject] if subject else [] # This line was `params = [subject]` in the instruction, but that would break if subject is None. Reverting to original logic.
+        filters, params = [], [self.user_id]
+        # A subject filter covers its whole subtree ('English' -> every English subtopic)
+        subject_ids = None
+        if subject:
+            subject_ids = subjects.resolve(conn, subject)
+            if not subject_ids:
+                return []
+            filters.append("q.subject_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(subject_ids))
+        if self.store is not None:
+            # Same policy, run over the replica's arrays
+            return self.store.select(self.user_id, total_count, subject_ids, question_ids)
+        if question_ids is not None:
+            filters.append("q.id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(question_ids)))
+        where = " AND ".join(filters) or "1=1"
+        
+        # Question content joined with this learner's progress (absent = never seen)
+        base = f"""
+            SELECT q.*, COALESCE(p.recall_score, 0.0) AS recall_score,
+                   COALESCE(p.review_count, 0) AS review_count, p.last_reviewed_ts
+            FROM questions q
+            LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+            WHERE {where}
+        """
         # 1. Priorities
         # Try to get some weak, some new, some review
         target_weak = int(total_count * 0.5)
         target_new = int(total_count * 0.2)
         
-        # Fetch Weak
-        cursor.execute(f"SELECT * FROM questions {where_clause} AND review_count > 0 ORDER BY recall_score ASC LIMIT ?", (*params, target_weak))
+        # Fetch Weak (walks this learner's (user_id, recall_score) index)
+        cursor.execute(f"""
+            SELECT q.*, p.recall_score, p.review_count, p.last_reviewed_ts
+            FROM live_progress p JOIN questions q ON q.id = p.question_id
+            WHERE p.user_id = ? AND {where} AND p.review_count > 0
+            ORDER BY p.recall_score ASC LIMIT ?
+        """, (*params, target_weak))
         rows = cursor.fetchall()
         for r in rows:
             questions.append(dict(r))
             selected_ids.add(r['id'])
             
         # Fetch New
-        cursor.execute(f"SELECT * FROM questions {where_clause} AND review_count = 0 ORDER BY RANDOM() LIMIT ?", (*params, target_new))
+        cursor.execute(f"{base} AND p.question_id IS NULL ORDER BY RANDOM() LIMIT ?", (*params, target_new))
         rows = cursor.fetchall()
         for r in rows:
             if r['id'] not in selected_ids:
@@ -51,7 +119,7 @@ class SessionManager:
         remainder = total_count - len(questions)
         if remainder > 0:
             placeholders = ','.join('?' * len(selected_ids)) if selected_ids else '-1'
-            sql = f"SELECT * FROM questions {where_clause} AND id NOT IN ({placeholders}) AND review_count > 0 ORDER BY RANDOM() LIMIT ?"
+            sql = f"{base} AND q.id NOT IN ({placeholders}) AND p.review_count > 0 ORDER BY RANDOM() LIMIT ?"
             cursor.execute(sql, (*params, *selected_ids, remainder))
             rows = cursor.fetchall()
             for r in rows:
@@ -62,125 +130,221 @@ class SessionManager:
         remainder = total_count - len(questions)
         if remainder > 0:
             placeholders = ','.join('?' * len(selected_ids)) if selected_ids else '-1'
-            sql = f"SELECT * FROM questions {where_clause} AND id NOT IN ({placeholders}) ORDER BY RANDOM() LIMIT ?"
+            sql = f"{base} AND q.id NOT IN ({placeholders}) ORDER BY RANDOM() LIMIT ?"
             cursor.execute(sql, (*params, *selected_ids, remainder))
             rows = cursor.fetchall()
             for r in rows:
                 questions.append(dict(r))
                 selected_ids.add(r['id'])
 
-        conn.close()
         random.shuffle(questions)
         return questions
 
     def get_available_subjects(self):
-        conn = sqlite3.connect(DB_PATH)
+        # Reads the subject dictionary, not the question table
+        return subjects.list_subjects(db.get_connection())
+
+    def get_questions_by_id(self, question_ids):
+        """The given questions with this learner's progress, keyed by id (deleted ids are absent)."""
+        rows = db.get_connection().execute("""
+            SELECT q.*, COALESCE(p.recall_score, 0.0) AS recall_score,
+                   COALESCE(p.review_count, 0) AS review_count, p.last_reviewed_ts
+            FROM questions q
+            LEFT JOIN live_progress p ON p.user_id = ? AND p.question_id = q.id
+            WHERE q.id IN (SELECT value FROM json_each(?))
+        """, (self.user_id, json.dumps(list(question_ids))))
+        return {r['id']: dict(r) for r in rows}
+
+    def replay(self, journal, pending):
+        """
+        Applies the journaled answers the database doesn't have yet, in one
+        update_many with their original times. Idempotent: the applied count is
+        committed together with the progress rows. Returns how many were applied.
+        """
+        conn = db.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT subject FROM questions")
-        subs = [r[0] for r in cursor.fetchall()]
-        conn.close()
-        return sorted(subs)
+        missing = pending.answers[journal.applied(cursor):]
+        if not missing:
+            return 0
+        try:
+            self.mem_engine.update_many([(a["qid"], a["ok"], a["rt"], a["ts"]) for a in missing],
+                                        commit=False, user_id=self.user_id)
+            journal.mark_applied(cursor, len(pending.answers))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        # The replayed answers are marked applied and never replayed again, so the
+        # model trained from them goes to disk now rather than at exit
+        self.mem_engine.save()
+        return len(missing)
 
-    def run_session(self, count=20, subject=None):
+    def _apply_answer(self, journal, applied, question_id, is_correct, response_time):
+        """One answer and the journal watermark in one commit. False if the write failed."""
+        conn = db.get_connection()
+        try:
+            self.mem_engine.update_question_stats(question_id, is_correct, response_time,
+                                                  commit=False, user_id=self.user_id)
+            journal.mark_applied(conn.cursor(), applied)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            return False
+        self.mem_engine.save(learners=False)
+        return True
+
+    def run_session(self, count=20, subject=None, feedback_delay=FEEDBACK_DELAY, question_ids=None, resume=False):
         from rich.live import Live
         from src.ui import DashboardUI
-        
-        dashboard = DashboardUI()
-        
-        # Interactive Subject Selection if not provided
-        if subject is None:
-            available = self.get_available_subjects()
-            if available:
-                dashboard.update_state(status="Select Subject to Begin...")
-                console.clear()
-                console.print(dashboard.get_renderable(mode="selection", subjects=available))
-                
-                choices = [str(i) for i in range(len(available) + 1)]
-                choice = Prompt.ask("\nSelect Subject", choices=choices, default="0")
-                
-                if choice != "0":
-                    subject = available[int(choice) - 1]
-                    dashboard.update_state(status=f"Subject: {subject} Selected.")
+        from src.journal import SessionJournal
 
-        # Initial Fetch
-        questions = self.get_questions_for_session(count, subject)
-        
-        if not questions:
-            console.print("[red]No questions found in database. Please ingest a PDF first.[/red]")
+        # Answers left by an interrupted session always reach the database first
+        journal = SessionJournal(self.user_id)
+        pending = journal.load()
+        if pending is not None:
+            self.replay(journal, pending)
+            if not resume:
+                journal.finish(db.get_connection()) # a new session replaces it
+                pending = None
+        if resume and pending is None:
+            console.print("[yellow]No interrupted session to resume.[/yellow]")
+            return
+        if subject and pending is None and not subjects.resolve(db.get_connection(), subject):
+            # Otherwise the empty selection reads as an empty database
+            console.print(f"[red]No subject matches '{subject}'.[/red]")
             return
 
-        self.start_time = time.time()
-        self.total_questions = len(questions)
-        self.correct_count = 0
-        
-        dashboard.update_state(status="Starting Session...")
-
-        # We can't use live.update() inside input().
-        # So we use a loop where we print the dashboard, then ask for input below it.
-        # But DashboardUI is designed for full screen.
-        # Let's use Live to show the question, then stop it briefly to take input?
-        # Or better: Just use Live and capturing input might be tricky if we want to type IN the dashboard.
-        # Simplest: Live is active, but we use console.input() which might break the layout.
-        # Taking a cue from previous debug mode: print dashboard then standard input.
-        # Actually proper TUI input is complex.
-        # Compromise: We will update the dashboard with "Waiting for Input", 
-        # then pause the Live context to accept input via standard Prompt, then resume.
+        # Two rows stay free under the layout for the answer prompt
+        dashboard = DashboardUI(reserve_lines=2, user_id=self.user_id)
         
-        for i, q in enumerate(questions):
-            # 1. Update Dashboard with Question
-            dashboard.update_state(
-                question=q, 
-                index=i+1, 
-                total=len(questions), 
-                score=self.correct_count,
-                status="Waiting for Answer...",
-                answer=None,
-                feedback=None
-            )
-            
-            # Print the dashboard once
-            console.clear()
-            console.print(dashboard.get_renderable())
-            
-            start_response = time.time()
-            
-            # 2. Get Input
-            # Using rich Prompt for cleaner input
-            console.print("\n")
-            user_ans = Prompt.ask("Your Answer", choices=["A", "B", "C", "D", "a", "b", "c", "d"], default="A")
-            user_ans = user_ans.upper()
-            
-            response_time = time.time() - start_response
-            
-            correct_ans = q['correct_answer']
-            is_correct = False
-            
-            feedback_msg = ""
-            if user_ans == correct_ans.upper():
-                is_correct = True
-                self.correct_count += 1
-                feedback_msg = "Correct!"
-                dashboard.update_state(feedback="Correct!", score=self.correct_count, answer=user_ans)
+        # One Live display for the whole session; redraws are manual and only happen
+        # when a region of the retained layout is dirty.
+        with Live(console=console, auto_refresh=False, redirect_stdout=False, redirect_stderr=False) as live:
+            # Interactive Subject Selection if not provided (a search result set is already a choice)
+            if subject is None and question_ids is None and pending is None:
+                available = self.get_available_subjects()
+                if available:
+                    dashboard.update_state(status="Select Subject to Begin...")
+                    dashboard.refresh(live, mode="selection", subjects=available)
+                    startup.mark("selection menu")
+                    self.warm_up()
+                    
+                    choices = [str(i) for i in range(len(available) + 1)]
+                    choice = dashboard.ask(live, "Select Subject", choices, default="0")
+                    
+                    if choice != "0":
+                        subject = available[int(choice) - 1]
+                        dashboard.update_state(status=f"Subject: {subject} Selected.")
+
+            if pending is not None:
+                # Same questions in the same order, carrying on after the last answer
+                by_id = self.get_questions_by_id(pending.question_ids)
+                questions = [by_id.get(qid) for qid in pending.question_ids]
+                first = pending.answers[-1]["i"] + 1 if pending.answers else 0
+                self.correct_count = sum(1 for a in pending.answers if a["ok"])
+                journal.reopen()
             else:
-                correct_text = q[f'option_{correct_ans.lower()}']
-                feedback_msg = f"Wrong! The answer is {correct_ans}."
-                dashboard.update_state(feedback=f"Wrong! Ans: {correct_ans}", answer=user_ans)
+                # Initial Fetch
+                questions = self.get_questions_for_session(count, subject, question_ids)
+                first = 0
+                self.correct_count = 0
+                if questions:
+                    journal.begin([q['id'] for q in questions], subject)
             
-            # 3. Show Feedback briefly
-            console.clear()
-            console.print(dashboard.get_renderable())
-            time.sleep(1.5)
+            if not any(questions):
+                live.stop()
+                console.print("[red]No questions found in database. Please ingest a PDF first.[/red]")
+                return
+            dashboard.prepare_questions([q for q in questions[first:] if q])
+            self.warm_up()
 
-            # Update Memory
-            try:
-                self.mem_engine.update_question_stats(q['id'], is_correct, response_time)
-            except Exception as e:
-                pass
+            self.start_time = time.time()
+            self.total_questions = len(questions)
+            # Answers journaled / already in the database (equal unless a write failed)
+            answered = applied = len(pending.answers) if pending is not None else 0
+            
+            dashboard.update_state(status="Starting Session...")
             
-        # Export Analytics
-        dashboard.update_state(status="Exporting Analytics Report...")
-        console.clear()
-        console.print(dashboard.get_renderable())
+            # Single-keystroke answers on a real terminal, line prompt otherwise (pipes, CI)
+            reader = keys.KeyReader() if keys.is_interactive() else None
+            try:
+                with reader or nullcontext():
+                    for i in range(first, len(questions)):
+                        q = questions[i]
+                        if q is None:
+                            continue # deleted since the session was journaled
+                        # 1. Update Dashboard with Question
+                        dashboard.update_state(
+                            question=q, 
+                            index=i+1, 
+                            total=len(questions), 
+                            score=self.correct_count,
+                            status="Press A / B / C / D" if reader else "Waiting for Answer...",
+                            answer="",
+                            feedback=""
+                        )
+                        dashboard.refresh(live)
+                        
+                        # 2. Get Input (timed from the moment the question is on screen)
+                        if reader:
+                            reader.flush()
+                            start_response = time.perf_counter()
+                            user_ans = reader.read_choice(["A", "B", "C", "D"])
+                        else:
+                            start_response = time.perf_counter()
+                            user_ans = dashboard.ask(live, "Your Answer", ["A", "B", "C", "D"], default="A")
+                        
+                        response_time = time.perf_counter() - start_response
+                        
+                        correct_ans = q['correct_answer']
+                        is_correct = False
+                        
+                        if user_ans == correct_ans.upper():
+                            is_correct = True
+                            self.correct_count += 1
+                            dashboard.update_state(feedback="Correct!", score=self.correct_count, answer=user_ans)
+                        else:
+                            dashboard.update_state(feedback=f"Wrong! Ans: {correct_ans}", answer=user_ans)
+                        
+                        # Journaled before anything else, so the answer survives a crash from here on
+                        journal.record(i, q['id'], is_correct, response_time, time.time())
+                        answered += 1
+
+                        # 3. Show Feedback until the delay runs out or a key is pressed
+                        if reader:
+                            dashboard.update_state(status="Press any key to continue...")
+                        dashboard.refresh(live)
+
+                        # Update Memory while the feedback is on screen. Answers apply in order:
+                        # after a failed write the rest wait in the journal for the final replay.
+                        if applied == answered - 1 and \
+                                self._apply_answer(journal, answered, q['id'], is_correct, response_time):
+                            applied = answered
+                        # Stats changed, so the analytics sidebar needs a rebuild on the next draw
+                        dashboard.mark_dirty("sidebar")
+                        
+                        if reader:
+                            reader.read(timeout=feedback_delay)
+                        elif feedback_delay:
+                            time.sleep(feedback_delay)
+            except KeyboardInterrupt:
+                journal.close()
+                live.stop()
+                console.print("\n[yellow]Session interrupted. Your answers are saved; "
+                              "`python3 main.py start --resume` continues it.[/yellow]")
+                return
+                
+            # Export Analytics
+            dashboard.update_state(status="Exporting Analytics Report...")
+            dashboard.refresh(live)
+
+        try:
+            self.replay(journal, journal.load())
+            journal.finish(db.get_connection())
+        except Exception as e:
+            journal.close()
+            console.print(f"[red]Some answers could not be saved ({e}); they stay in the journal "
+                          "and are applied on the next start.[/red]")
         
         print("\n\nExporting data...")
         dashboard.analytics.export_to_text()
@@ -189,6 +353,14 @@ class SessionManager:
         self.end_session()
 
     def end_session(self):
+        # One learner never fills a flush batch: write their model now, not only at exit
+        if self._mem_engine is not None:
+            self._mem_engine.registry.flush()
+        # Rows stale since a reset are deleted a batch at a time, here rather than in the reset
+        resets.collect(db.get_connection())
+        if self.auto_maintain:
+            from src import maintenance
+            maintenance.auto_maintain()
         duration = time.time() - self.start_time
         msg = f"Session complete. Score: {self.correct_count}/{self.total_questions}. Duration: {int(duration)} seconds."
         console.print(f"[bold green]{msg}[/bold green]")
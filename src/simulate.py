@@ -0,0 +1,175 @@
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from src import db, subjects
+
+# Headless driver for load-testing the scheduler and memory engine.
+# Runs the real select -> answer -> update_question_stats loop with a simulated
+# learner and a simulated clock, always against a scratch copy of the DB.
+
+class ForgettingCurveLearner:
+    """
+    Exponential forgetting curve per question: P(recall) = exp(-elapsed / stability).
+    A correct answer multiplies stability by `growth`, a miss shrinks it by `lapse`.
+    Unrecalled questions are guessed with probability `guess`.
+    """
+    def __init__(self, stability=1.0, growth=2.0, lapse=0.5, guess=0.25,
+                 response_time=(2.0, 12.0), seed=0):
+        self.initial_stability = stability # days
+        self.growth = growth
+        self.lapse = lapse
+        self.guess = guess
+        self.response_time = response_time
+        self.rng = random.Random(seed)
+        self.memory = {} # question_id -> (stability_days, last_seen_epoch)
+
+    def recall_probability(self, question_id, now):
+        state = self.memory.get(question_id)
+        if state is None:
+            return 0.0
+        stability, last_seen = state
+        return math.exp(-max(0.0, now - last_seen) / 86400.0 / stability)
+
+    def answer(self, question_id, now):
+        """Returns (is_correct, response_time_seconds) and updates the learner's memory."""
+        recalled = self.rng.random() < self.recall_probability(question_id, now)
+        is_correct = recalled or self.rng.random() < self.guess
+        lo, hi = self.response_time
+        response_time = self.rng.uniform(lo, hi) * (0.6 if recalled else 1.0)
+
+        stability, _ = self.memory.get(question_id, (self.initial_stability, now))
+        if recalled:
+            stability *= self.growth
+        elif question_id in self.memory:
+            stability = max(self.initial_stability, stability * self.lapse)
+        self.memory[question_id] = (stability, now)
+        return is_correct, response_time
+
+class SimulatedClock:
+    def __init__(self, start=None):
+        self.now = start if start is not None else time.time()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+def run_headless(sessions=30, count=20, subject=None, gap_hours=24.0, learner=None, seed=0):
+    """
+    Drives `sessions` study sessions through SessionManager/MemoryEngine on the
+    current db.DB_PATH, with models under the current directory's models/.
+    Returns throughput and retention statistics.
+    """
+    from src import session
+
+    learner = learner or ForgettingCurveLearner(seed=seed)
+    clock = SimulatedClock()
+    mgr = session.SessionManager()
+    engine = mgr.mem_engine
+    engine.clock = clock
+    engine.ensure_trainer()
+    random.seed(seed) # session selection shuffles with the global RNG
+
+    reviews = correct = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(sessions):
+            for q in mgr.get_questions_for_session(count, subject):
+                is_correct, response_time = learner.answer(q['id'], clock())
+                engine.update_question_stats(q['id'], is_correct, response_time)
+                clock.advance(response_time)
+                reviews += 1
+                correct += is_correct
+            clock.advance(gap_hours * 3600)
+    finally:
+        # Learner models are written into this run's models/ now, not at interpreter
+        # exit: by then _worker has left (and deleted) the scratch directory
+        mgr.close()
+    elapsed = time.perf_counter() - start
+
+    conn = db.get_connection()
+    if subject:
+        cursor = conn.execute("SELECT id FROM questions WHERE subject_id IN (SELECT value FROM json_each(?))",
+                              (json.dumps(subjects.resolve(conn, subject)),))
+    else:
+        cursor = conn.execute("SELECT id FROM questions")
+    bank = [r[0] for r in cursor.fetchall()]
+    final = [learner.recall_probability(qid, clock()) for qid in bank]
+    seen = sum(1 for qid in bank if qid in learner.memory)
+    return {
+        "reviews": reviews,
+        "seconds": elapsed,
+        "reviews_per_sec": reviews / elapsed if elapsed else 0.0,
+        "accuracy": correct / reviews if reviews else 0.0,
+        "coverage": seen / len(bank) if bank else 0.0,
+        "mean_retention": sum(final) / len(final) if final else 0.0,
+        "retained_90": sum(1 for p in final if p >= 0.9) / len(final) if final else 0.0,
+        "simulated_days": sessions * gap_hours / 24.0,
+    }
+
+def _worker(args):
+    """Runs one simulated learner on a private copy of the DB (process entry point)."""
+    source, worker_id, kwargs, learner_kwargs = args
+    workdir = tempfile.mkdtemp(prefix=f"viva-sim-{worker_id}-")
+    cwd = os.getcwd()
+    old_path = db.DB_PATH
+    try:
+        os.makedirs(os.path.join(workdir, "data"))
+        db.close()
+        db.DB_PATH = os.path.join(workdir, "data", "questions.db")
+        # Copied byte for byte into a plain connection; the first get_connection()
+        # afterwards migrates the copy. Read-only handle: the source is never modified.
+        src_conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        copy = sqlite3.connect(db.DB_PATH)
+        try:
+            src_conn.backup(copy)
+        finally:
+            copy.close()
+            src_conn.close()
+        # models/ is relative to the working directory, keep it private too
+        os.chdir(workdir)
+        seed = kwargs.get("seed", 0) + worker_id
+        learner = ForgettingCurveLearner(seed=seed, **learner_kwargs)
+        return run_headless(learner=learner, **{**kwargs, "seed": seed})
+    finally:
+        db.close()
+        db.DB_PATH = old_path
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def simulate(learners=1, source=None, learner_kwargs=None, **kwargs):
+    """Runs `learners` independent simulations (one process each) and aggregates them."""
+    source = os.path.abspath(source or db.DB_PATH)
+    jobs = [(source, i, kwargs, learner_kwargs or {}) for i in range(learners)]
+    start = time.perf_counter()
+    if learners == 1:
+        results = [_worker(jobs[0])]
+    else:
+        from multiprocessing import Pool
+        with Pool(learners) as pool:
+            results = pool.map(_worker, jobs)
+    wall = time.perf_counter() - start
+
+    total_reviews = sum(r["reviews"] for r in results)
+    # Throughput over the review loops only (workers run concurrently);
+    # process start-up and DB copies are in wall_seconds
+    busy = max(r["seconds"] for r in results)
+    mean = lambda key: sum(r[key] for r in results) / len(results)
+    return {
+        "learners": learners,
+        "reviews": total_reviews,
+        "wall_seconds": wall,
+        "reviews_per_sec": total_reviews / busy if busy else 0.0,
+        "per_learner_reviews_per_sec": mean("reviews_per_sec"),
+        "accuracy": mean("accuracy"),
+        "coverage": mean("coverage"),
+        "mean_retention": mean("mean_retention"),
+        "retained_90": mean("retained_90"),
+        "simulated_days": results[0]["simulated_days"],
+    }
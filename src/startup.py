@@ -0,0 +1,72 @@
+import builtins
+import sys
+import time
+
+# Opt-in import profiler for `main.py --profile-startup`. Deliberately imports
+# nothing heavy so it can be installed before the rest of the app loads.
+
+START = time.perf_counter()
+
+class ImportProfiler:
+    def __init__(self):
+        self.records = [] # (module, depth, seconds), first-time imports only
+        self.marks = []   # (label, seconds since START)
+        self.depth = 0
+        self._original = None
+
+    def install(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _is_new(self, name, fromlist):
+        if name not in sys.modules:
+            return True
+        # `from pkg import mod` only does work if mod is a submodule not yet loaded
+        module = sys.modules[name]
+        return any(not hasattr(module, f) for f in fromlist or () if f != "*")
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or not self._is_new(name, fromlist):
+            return self._original(name, globals, locals, fromlist, level)
+        # `from pkg import mod` is reported as pkg.mod
+        label = name
+        if name in sys.modules and fromlist:
+            label = ", ".join(f"{name}.{f}" for f in fromlist if not hasattr(sys.modules[name], f))
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            self.depth -= 1
+            self.records.append((label, self.depth, time.perf_counter() - start))
+
+    def report(self, top=15, file=None):
+        file = file or sys.stderr
+        total = sum(t for _, depth, t in self.records if depth == 0)
+        print("\n=== Startup import profile ===", file=file)
+        print(f"{'cumulative ms':>14}  module", file=file)
+        slowest = sorted((r for r in self.records if r[1] <= 1), key=lambda r: r[2], reverse=True)
+        for name, depth, seconds in slowest[:top]:
+            print(f"{seconds * 1000:14.1f}  {'  ' * depth}{name}", file=file)
+        print(f"{total * 1000:14.1f}  (all top-level imports)", file=file)
+        for label, seconds in self.marks:
+            print(f"Reached {label} after {seconds * 1000:.1f} ms", file=file)
+
+_profiler = None
+
+def enable():
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler()
+        _profiler.install()
+    return _profiler
+
+def mark(label):
+    """Records a startup milestone; a no-op unless profiling is enabled."""
+    if _profiler is not None:
+        _profiler.marks.append((label, time.perf_counter() - START))
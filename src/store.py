@@ -0,0 +1,162 @@
+import sys
+import threading
+import numpy as np
+from src import db, profiling
+
+# Optional in-memory replica of the question bank for serving sessions.
+#
+# The bank is loaded once into NumPy columns (ids, subject ids) plus a text
+# table of plain tuples with interned subject labels; each learner's progress
+# (review counts, recall scores, review times) is another set of columns,
+# loaded on first use. Session selection is array arithmetic over those
+# columns, and only the questions actually picked become dicts.
+#
+# SQLite stays the source of truth. MemoryEngine writes through (apply()) after
+# every progress write, so the replica never needs re-reading; questions
+# ingested after load() only show up after reload().
+
+TEXT_FIELDS = ("subject", "question_text", "option_a", "option_b", "option_c", "option_d", "correct_answer")
+
+class LearnerProgress:
+    """One learner's progress, aligned with the store's rows (0 reviews = never seen)."""
+    __slots__ = ("review_counts", "recall_scores", "last_reviewed_ts")
+
+    def __init__(self, size):
+        self.review_counts = np.zeros(size, dtype=np.int32)
+        self.recall_scores = np.zeros(size, dtype=np.float64)
+        self.last_reviewed_ts = np.full(size, -1, dtype=np.int64) # -1 = never reviewed
+
+class QuestionStore:
+    def __init__(self, ids, subject_ids, texts):
+        self.ids = np.asarray(ids, dtype=np.int64)          # sorted, so rows are found by bisection
+        self.subject_ids = np.asarray(subject_ids, dtype=np.int32)
+        self.texts = texts                                  # row -> TEXT_FIELDS tuple
+        self.learners = {}
+        # Reader threads select while the writer applies reviews
+        self.lock = threading.Lock()
+
+    @classmethod
+    @profiling.timed("store.load")
+    def load(cls, conn=None):
+        conn = conn or db.get_connection()
+        rows = conn.execute(f"SELECT id, subject_id, {', '.join(TEXT_FIELDS)} FROM questions ORDER BY id").fetchall()
+        labels = {}
+        texts = []
+        for r in rows:
+            # A few dozen subject labels shared by every row
+            subject = labels.setdefault(r[2], sys.intern(r[2]) if r[2] is not None else None)
+            texts.append((subject, *r[3:]))
+        return cls([r[0] for r in rows], [r[1] or 0 for r in rows], texts)
+
+    def reload(self):
+        """Re-reads the bank (after an ingest); learner progress is re-read on next use."""
+        fresh = QuestionStore.load()
+        with self.lock:
+            self.ids, self.subject_ids, self.texts = fresh.ids, fresh.subject_ids, fresh.texts
+            self.learners = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def locate(self, question_ids):
+        """(rows, known): row numbers for `question_ids` and which of them exist in the store."""
+        question_ids = np.asarray(question_ids, dtype=np.int64)
+        rows = np.searchsorted(self.ids, question_ids)
+        known = rows < len(self.ids)
+        known[known] = self.ids[rows[known]] == question_ids[known]
+        return rows, known
+
+    def progress(self, user_id):
+        """The learner's progress columns, read from SQLite the first time."""
+        learner = self.learners.get(user_id)
+        if learner is None:
+            learner = LearnerProgress(len(self.ids))
+            rows = db.get_connection().execute(
+                "SELECT question_id, review_count, last_reviewed_ts, recall_score FROM live_progress WHERE user_id = ?",
+                (user_id,)).fetchall()
+            self._write(learner, rows)
+            self.learners[user_id] = learner
+        return learner
+
+    def _write(self, learner, updates):
+        if not updates:
+            return
+        qids, counts, stamps, scores = zip(*updates)
+        rows, known = self.locate(qids)
+        rows = rows[known]
+        learner.review_counts[rows] = np.asarray(counts, dtype=np.int32)[known]
+        learner.last_reviewed_ts[rows] = np.asarray([-1 if t is None else t for t in stamps], dtype=np.int64)[known]
+        learner.recall_scores[rows] = np.asarray([s or 0.0 for s in scores], dtype=np.float64)[known]
+
+    def apply(self, user_id, updates):
+        """
+        Write-through from MemoryEngine: updates is (question_id, review_count,
+        last_reviewed_ts, recall_score) per row just written to progress.
+        Learners not loaded yet are skipped; they read SQLite on first use.
+        """
+        with self.lock:
+            learner = self.learners.get(user_id)
+            if learner is not None:
+                self._write(learner, updates)
+
+    def invalidate(self, user_id):
+        """Forgets a learner's columns (e.g. after a rolled-back write); re-read on next use."""
+        with self.lock:
+            self.learners.pop(user_id, None)
+
+    def question(self, row, learner):
+        """The dict the UI and server expect, same keys as the SQL selection."""
+        q = dict(zip(TEXT_FIELDS, self.texts[row]))
+        q["id"] = int(self.ids[row])
+        q["subject_id"] = int(self.subject_ids[row])
+        q["review_count"] = int(learner.review_counts[row])
+        q["recall_score"] = float(learner.recall_scores[row])
+        ts = int(learner.last_reviewed_ts[row])
+        q["last_reviewed_ts"] = ts if ts >= 0 else None
+        return q
+
+    @profiling.timed("store.select")
+    def select(self, user_id, total_count=20, subject_ids=None, question_ids=None, rng=None):
+        """
+        Same policy as SessionManager.get_questions_for_session: half weakest
+        reviewed, a fifth new, then random reviewed, then anything.
+        """
+        rng = rng or np.random.default_rng()
+        with self.lock:
+            learner = self.progress(user_id)
+            pool = np.ones(len(self.ids), dtype=bool)
+            if subject_ids is not None:
+                pool &= np.isin(self.subject_ids, subject_ids)
+            if question_ids is not None:
+                only = np.zeros(len(self.ids), dtype=bool)
+                rows, known = self.locate(list(question_ids))
+                only[rows[known]] = True
+                pool &= only
+            reviewed = learner.review_counts > 0
+            picked = np.zeros(len(self.ids), dtype=bool)
+            chosen = []
+
+            def take(rows):
+                picked[rows] = True
+                chosen.extend(rows.tolist())
+
+            def sample(mask, k):
+                rows = np.flatnonzero(mask)
+                if k <= 0 or len(rows) == 0:
+                    return
+                take(rng.choice(rows, size=min(k, len(rows)), replace=False))
+
+            # Weakest first: partial sort of the candidates only
+            weak = np.flatnonzero(pool & reviewed)
+            k = min(int(total_count * 0.5), len(weak))
+            if k:
+                scores = learner.recall_scores[weak]
+                part = np.argpartition(scores, k - 1)[:k]
+                take(weak[part[np.argsort(scores[part], kind="stable")]])
+            sample(pool & ~reviewed, int(total_count * 0.2))
+            sample(pool & reviewed & ~picked, total_count - len(chosen))
+            sample(pool & ~picked, total_count - len(chosen))
+
+            questions = [self.question(row, learner) for row in chosen]
+        rng.shuffle(questions)
+        return questions
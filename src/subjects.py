@@ -0,0 +1,74 @@
+import json
+
+# Subject dictionary: one row per topic ("GK") and per subtopic ("GK - Computer",
+# parent = GK). Questions point at their subject by id; listings, filters and
+# goal roll-ups work on this small table instead of scanning questions.
+# The table itself (and the triggers keeping question_count current) live in src/db.py.
+
+SEPARATOR = " - "
+
+# Every subject under the seed ids, the seeds included
+SUBTREE = '''
+    WITH RECURSIVE tree(id) AS (
+        SELECT value FROM json_each(?)
+        UNION
+        SELECT s.id FROM subjects s JOIN tree t ON s.parent_id = t.id
+    )
+'''
+
+def split(path):
+    """'Topic - Subtopic' -> ('Topic', 'Subtopic'); 'Topic' -> ('Topic', None)"""
+    topic, _, subtopic = path.partition(SEPARATOR)
+    return topic.strip(), subtopic.strip() or None
+
+def _get_or_create(cursor, name, parent_id, path):
+    cursor.execute("INSERT OR IGNORE INTO subjects (name, parent_id, path) VALUES (?, ?, ?)",
+                   (name, parent_id, path))
+    cursor.execute("SELECT id FROM subjects WHERE path = ?", (path,))
+    return cursor.fetchone()[0]
+
+def ensure(cursor, path, cache=None):
+    """Id of the subject at `path`, creating it (and its topic) on first use."""
+    if cache is not None and path in cache:
+        return cache[path]
+    topic, subtopic = split(path or "General")
+    subject_id = _get_or_create(cursor, topic, None, topic)
+    if subtopic:
+        subject_id = _get_or_create(cursor, subtopic, subject_id, f"{topic}{SEPARATOR}{subtopic}")
+    if cache is not None:
+        cache[path] = subject_id
+    return subject_id
+
+def resolve(conn, query):
+    """
+    Subject ids for a --subject filter, subtrees included. An exact path
+    (case-insensitive) wins: 'English' -> English and every English subtopic.
+    Otherwise it is a path prefix: 'GK - Comp' -> GK - Computer.
+    Both are index lookups on subjects.path.
+    """
+    rows = conn.execute("SELECT id FROM subjects WHERE path = ?", (query,)).fetchall()
+    if not rows:
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = conn.execute("SELECT id FROM subjects WHERE path LIKE ? ESCAPE '\\'", (escaped + "%",)).fetchall()
+    if not rows:
+        return []
+    seeds = json.dumps([r[0] for r in rows])
+    return [r[0] for r in conn.execute(SUBTREE + "SELECT id FROM tree ORDER BY id", (seeds,))]
+
+def list_subjects(conn):
+    """Paths of subjects that hold questions directly, sorted (what the menu offers)."""
+    return [r[0] for r in conn.execute("SELECT path FROM subjects WHERE question_count > 0 ORDER BY path")]
+
+def rollup(conn, name):
+    """Questions under every subject called `name` at any level ('GK', 'Computer')."""
+    seeds = json.dumps([r[0] for r in conn.execute("SELECT id FROM subjects WHERE name = ?", (name,))])
+    row = conn.execute(SUBTREE + "SELECT COALESCE(SUM(question_count), 0) FROM subjects WHERE id IN tree",
+                       (seeds,)).fetchone()
+    return row[0]
+
+def refresh_counts(conn):
+    """Recomputes question_count from scratch (after bulk edits that bypass the triggers)."""
+    conn.execute('''
+        UPDATE subjects SET question_count =
+            (SELECT COUNT(*) FROM questions WHERE questions.subject_id = subjects.id)
+    ''')
@@ -0,0 +1,152 @@
+import gzip
+import hashlib
+import json
+import uuid
+from src import db, resets
+
+# Merging progress between devices (`main.py sync export / import`).
+#
+# Every review is appended to review_log with a random 16-byte id, so an event
+# keeps its identity wherever it is copied. An export is the log past a
+# watermark (this file's log position, remembered per --peer) plus the text of
+# the questions it mentions, since question ids differ between banks ingested
+# separately. Importing unions the events (INSERT OR IGNORE on the id) and
+# recomputes progress for every touched (learner, question) from its live
+# events in one statement: the count, the newest time and that review's
+# target, ties broken by event id. The result depends only on the set of
+# events, so imports can be repeated and applied in any order.
+#
+# Resets stay on the device they happened on: imported events join the
+# importing learner's current epoch. Model weights and the daily mastery
+# buckets are not recomputed from imports.
+
+FORMAT = "viva-review-log"
+VERSION = 1
+
+def baseline_id(user_id, question_text, count, reviewed_ts, score):
+    """
+    Id of the event standing in for progress recorded before the log existed.
+    Derived from the content, so two copies of one database agree on it.
+    """
+    key = "\0".join(map(str, ("baseline", user_id, question_text, count, reviewed_ts, score)))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+def record(cursor, user_id, epoch, events):
+    """Appends reviews to the log, in the caller's transaction. events: [(question_id, reviewed_ts, target), ...]"""
+    cursor.executemany('''
+        INSERT INTO review_log (id, user_id, question_id, reviewed_ts, target, epoch) VALUES (?, ?, ?, ?, ?, ?)
+    ''', ((uuid.uuid4().bytes, user_id, question_id, ts, target, epoch) for question_id, ts, target in events))
+
+def watermark(conn, peer):
+    row = conn.execute("SELECT exported_seq FROM sync_peers WHERE peer = ?", (peer,)).fetchone()
+    return row[0] if row else 0
+
+def export(conn, path, since=0, peer=None):
+    """
+    Writes the live events logged after position `since` (or after what `peer`
+    was last sent) to a gzipped JSON-lines file. Returns (events, new watermark).
+    """
+    if peer is not None:
+        since = watermark(conn, peer)
+    # Bounded by `until`, so a review committed meanwhile goes out next time
+    until = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM review_log").fetchone()[0]
+    rows = conn.execute(f'''
+        SELECT p.id, p.user_id, p.question_id, p.reviewed_ts, p.target, p.review_count, q.question_text
+        FROM review_log p JOIN questions q ON q.id = p.question_id
+        WHERE p.seq > ? AND p.seq <= ? AND NOT {db.PROGRESS_STALE}
+        ORDER BY p.seq
+    ''', (since, until)).fetchall()
+    questions = {r[2]: r[6] for r in rows}
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        header = {"format": FORMAT, "version": VERSION, "since": since, "until": until,
+                  "events": len(rows), "questions": questions}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for event_id, user_id, question_id, ts, target, count, _ in rows:
+            f.write(json.dumps([event_id.hex(), user_id, question_id, ts, target, count]) + "\n")
+    if peer is not None:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO sync_peers (peer, exported_seq) VALUES (?, ?)", (peer, until))
+    return len(rows), until
+
+def read(path):
+    """(header, events) from an export file; raises ValueError if it isn't one."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise ValueError(f"{path} is not a review log export")
+        return header, [json.loads(line) for line in f]
+
+def _local_ids(conn, questions):
+    """Maps the exporter's question ids to ours: same id and text first, then any question with that text."""
+    mapping = {}
+    rows = conn.execute('''
+        SELECT q.id FROM questions q
+        JOIN json_each(?) j ON q.id = CAST(j.key AS INTEGER) AND q.question_text = j.value
+    ''', (json.dumps(questions),))
+    for (question_id,) in rows:
+        mapping[question_id] = question_id
+    missing = {int(k): text for k, text in questions.items() if int(k) not in mapping}
+    if missing:
+        # One scan of the bank, whatever the number of unmatched questions
+        by_text = dict(conn.execute('''
+            SELECT question_text, MIN(id) FROM questions
+            WHERE question_text IN (SELECT value FROM json_each(?)) GROUP BY question_text
+        ''', (json.dumps(list(missing.values())),)))
+        for remote, text in missing.items():
+            if text in by_text:
+                mapping[remote] = by_text[text]
+    return mapping
+
+def _recompute(cursor):
+    """Rewrites progress for the pairs in temp.sync_touched from their live events."""
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO progress (user_id, question_id, review_count, last_reviewed_ts, recall_score, epoch)
+        SELECT user_id, question_id, total, reviewed_ts, target,
+               COALESCE((SELECT epoch FROM learner_epochs e WHERE e.user_id = ranked.user_id), 0)
+        FROM (
+            SELECT p.user_id, p.question_id, p.reviewed_ts, p.target,
+                   SUM(p.review_count) OVER pair AS total,
+                   ROW_NUMBER() OVER (pair ORDER BY p.reviewed_ts DESC, p.id DESC) AS newest
+            FROM temp.sync_touched t
+            JOIN review_log p ON p.user_id = t.user_id AND p.question_id = t.question_id
+            WHERE NOT {db.PROGRESS_STALE}
+            WINDOW pair AS (PARTITION BY p.user_id, p.question_id)
+        ) ranked
+        WHERE newest = 1
+    ''')
+    return cursor.rowcount
+
+def import_file(conn, path):
+    """
+    Merges an export into this database. Returns a dict: events read, new
+    (not seen before), skipped (question not in this bank), updated progress rows.
+    """
+    header, events = read(path)
+    mapping = _local_ids(conn, header["questions"])
+    rows, epochs, skipped = [], {}, 0
+    cursor = conn.cursor()
+    for event_id, user_id, question_id, ts, target, count in events:
+        local = mapping.get(question_id)
+        if local is None:
+            skipped += 1
+            continue
+        if user_id not in epochs:
+            epochs[user_id] = resets.current_epoch(cursor, user_id)
+        rows.append((bytes.fromhex(event_id), user_id, local, ts, target, count, epochs[user_id]))
+
+    result = {"read": len(events), "new": 0, "skipped": skipped, "updated": 0}
+    conn.commit()
+    with conn:
+        cursor.executemany('''
+            INSERT OR IGNORE INTO review_log (id, user_id, question_id, reviewed_ts, target, review_count, epoch)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        result["new"] = max(cursor.rowcount, 0)
+        if result["new"]:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS sync_touched (user_id TEXT, question_id INTEGER, "
+                           "PRIMARY KEY (user_id, question_id)) WITHOUT ROWID")
+            cursor.execute("DELETE FROM temp.sync_touched")
+            cursor.executemany("INSERT OR IGNORE INTO temp.sync_touched VALUES (?, ?)", ((r[1], r[2]) for r in rows))
+            result["updated"] = _recompute(cursor)
+            cursor.execute("DELETE FROM temp.sync_touched")
+    return result
@@ -6,12 +6,35 @@ from rich import box
 from rich.progress import Progress, BarColumn, TextColumn
 from rich.align import Align
 from src.analytics import AnalyticsEngine
+from src.db import DEFAULT_USER
+from src import profiling
 import datetime
+import re
+from collections import OrderedDict
+
+# Regions of the retained render tree. Each one is rebuilt only when marked dirty.
+REGIONS = ("header", "footer", "sidebar", "question", "feedback", "selection")
+
+# Question markup highlighting, compiled once
+OPTION_REF_RE = re.compile(r'(\([A-D]\))')
+BLANK_RE = re.compile(r'(_+)')
+FORMAT_CACHE_SIZE = 512
+
+class ReservedHeight:
+    """Renders a full-screen layout a few lines short so an input line fits below it."""
+    def __init__(self, renderable, reserve=0):
+        self.renderable = renderable
+        self.reserve = reserve
+
+    def __rich_console__(self, console, options):
+        height = max(1, (options.height or console.height) - self.reserve)
+        yield from console.render(self.renderable, options.update(height=height))
 
 class DashboardUI:
-    def __init__(self):
+    def __init__(self, reserve_lines=0, user_id=DEFAULT_USER):
         self.layout = Layout()
-        self.analytics = AnalyticsEngine()
+        self.session_view = Layout()
+        self.analytics = AnalyticsEngine(user_id)
         self.total_questions = 0
         self.current_index = 0
         self.score = 0
@@ -27,6 +50,14 @@ class DashboardUI:
             "Computer": {"marks": 50, "questions": 25}
         }
         
+        # Retained render state
+        self.regions = {}
+        self.dirty = set(REGIONS)
+        self.mode = None
+        self.header_minute = None
+        self.reserve_lines = reserve_lines
+        self.format_cache = OrderedDict() # question id -> formatted markup (LRU)
+        
         self.setup_layout()
 
     def setup_layout(self):
@@ -40,6 +71,14 @@ class DashboardUI:
             Layout(name="main_container", ratio=3),
             Layout(name="sidebar", ratio=1)
         )
+        # Session structure is built once and swapped in; only its leaves get updated
+        self.session_view.split_column(
+            Layout(name="question", ratio=3),
+            Layout(name="feedback", size=10)
+        )
+
+    def mark_dirty(self, *regions):
+        self.dirty.update(regions)
 
     def generate_header(self):
         grid = Table.grid(expand=True)
@@ -47,7 +86,8 @@ class DashboardUI:
         grid.add_column(justify="center", ratio=1)
         grid.add_column(justify="right", ratio=1)
         
-        time_str = datetime.datetime.now().strftime("%H:%M:%S")
+        # Minute resolution: the header is only rebuilt when the minute rolls over
+        time_str = datetime.datetime.now().strftime("%H:%M")
         date_str = datetime.datetime.now().strftime("%d %b %Y")
         
         grid.add_row(
@@ -60,12 +100,27 @@ class DashboardUI:
     def generate_footer(self):
         return Panel(Align.center(Text(f" {self.status_message} ", style="italic yellow")), border_style="dim")
 
-    def format_question(self, text, subject):
+    def format_question(self, text, subject, question_id=None):
         if not text: return text
-        import re
-        text = re.sub(r'(\([A-D]\))', r'[bold magenta]\1[/bold magenta]', text)
-        text = re.sub(r'(_+)', r'[bold yellow]\1[/bold yellow]', text)
-        return text
+        if question_id is not None:
+            cached = self.format_cache.get(question_id)
+            if cached is not None:
+                self.format_cache.move_to_end(question_id)
+                return cached
+        
+        formatted = OPTION_REF_RE.sub(r'[bold magenta]\1[/bold magenta]', text)
+        formatted = BLANK_RE.sub(r'[bold yellow]\1[/bold yellow]', formatted)
+        
+        if question_id is not None:
+            self.format_cache[question_id] = formatted
+            if len(self.format_cache) > FORMAT_CACHE_SIZE:
+                self.format_cache.popitem(last=False)
+        return formatted
+
+    def prepare_questions(self, questions):
+        """Pre-formats a fetched batch so rendering during the session is a cache lookup."""
+        for q in questions:
+            self.format_question(q['question_text'], q.get('subject'), q.get('id'))
 
     def generate_question_area(self):
         if not self.current_question:
@@ -73,7 +128,7 @@ class DashboardUI:
         
         subject = self.current_question.get('subject', 'General')
         q_text = self.current_question['question_text']
-        q_formatted = self.format_question(q_text, subject)
+        q_formatted = self.format_question(q_text, subject, self.current_question.get('id'))
         
         header = Table.grid(expand=True)
         header.add_row(
@@ -113,12 +168,8 @@ class DashboardUI:
         goal_table.add_column("Current", justify="right")
         goal_table.add_column("Target", justify="right", style="dim")
         
-        subject_stats = self.analytics.get_subject_performance()
         for sub_name, goal in self.goals.items():
-            actual_count = 0
-            for s in subject_stats:
-                if sub_name.lower() in s['subject'].lower():
-                    actual_count += s['total']
+            actual_count = self.analytics.get_subject_rollup(sub_name)
             goal_table.add_row(sub_name, str(actual_count), str(goal['questions']))
 
         stats = self.analytics.get_overall_stats()
@@ -157,28 +208,89 @@ class DashboardUI:
         return Panel(table, title="CORE NAVIGATION", subtitle="Select ID and press Enter", border_style="bright_blue")
 
     def get_renderable(self, mode="session", subjects=None):
-        self.layout["header"].update(self.generate_header())
-        self.layout["footer"].update(self.generate_footer())
-        self.layout["sidebar"].update(self.generate_sidebar())
+        """Rebuilds dirty regions only and returns the retained layout."""
+        if mode == "selection" and not subjects:
+            mode = "session"
+        if mode != self.mode:
+            self.mode = mode
+            if mode == "session":
+                self.layout["main_container"].update(self.session_view)
+            self.mark_dirty("question", "feedback", "selection")
+        
+        minute = datetime.datetime.now().strftime("%H:%M")
+        if minute != self.header_minute:
+            self.header_minute = minute
+            self.mark_dirty("header")
+        
+        if "header" in self.dirty:
+            self.layout["header"].update(self.generate_header())
+        if "footer" in self.dirty:
+            self.layout["footer"].update(self.generate_footer())
+        if "sidebar" in self.dirty:
+            self.layout["sidebar"].update(self.generate_sidebar())
         
-        if mode == "selection" and subjects:
-            self.layout["main_container"].update(self.generate_selection_menu(subjects))
+        if mode == "selection":
+            if "selection" in self.dirty:
+                self.layout["main_container"].update(self.generate_selection_menu(subjects))
+            self.dirty -= {"header", "footer", "sidebar", "selection"}
         else:
-            # Re-split or update existing session structure
-            session_layout = Layout()
-            session_layout.split_column(
-                Layout(self.generate_question_area(), ratio=3),
-                Layout(self.generate_feedback_area(), size=10)
-            )
-            self.layout["main_container"].update(session_layout)
-            
+            if "question" in self.dirty:
+                self.session_view["question"].update(self.generate_question_area())
+            if "feedback" in self.dirty:
+                self.session_view["feedback"].update(self.generate_feedback_area())
+            self.dirty -= {"header", "footer", "sidebar", "question", "feedback"}
+        
+        if self.reserve_lines:
+            return ReservedHeight(self.layout, self.reserve_lines)
         return self.layout
 
+    def refresh(self, live, mode="session", subjects=None, force=False):
+        """
+        Pushes the layout to a manually refreshed rich Live display; skipped
+        when no region is dirty and the mode is unchanged. Redraws only happen
+        on state changes (there is no redraw loop), so none is ever dropped.
+        """
+        if not force and not self.dirty and self.mode == mode:
+            return False
+        with profiling.timed("ui.render"):
+            live.update(self.get_renderable(mode=mode, subjects=subjects), refresh=True)
+        return True
+
+    def ask(self, live, prompt, choices, default):
+        """
+        Line prompt drawn in the rows kept free below the live layout.
+        The cursor is rewound over the prompt afterwards so Live keeps redrawing in place.
+        """
+        valid = [c.upper() for c in choices]
+        while True:
+            live.refresh()
+            answer = input(f"\n{prompt} [{'/'.join(choices)}] ({default}): ").strip().upper() or default.upper()
+            if live.console.is_terminal:
+                live.console.file.write("\x1b[2A\r\x1b[J")
+                live.console.file.flush()
+            if answer in valid:
+                return answer
+
     def update_state(self, question=None, answer=None, feedback=None, index=0, total=0, score=0, status=None):
-        if question: self.current_question = question
-        if answer is not None: self.user_answer = answer
-        if feedback is not None: self.feedback = feedback
-        if index: self.current_index = index
-        if total: self.total_questions = total
-        if score: self.score = score
-        if status: self.status_message = status
+        if question:
+            if question is not self.current_question:
+                self.mark_dirty("question")
+            self.current_question = question
+        if answer is not None:
+            self.user_answer = answer
+            self.mark_dirty("feedback")
+        if feedback is not None:
+            self.feedback = feedback
+            self.mark_dirty("feedback")
+        if index and index != self.current_index:
+            self.current_index = index
+            self.mark_dirty("question")
+        if total and total != self.total_questions:
+            self.total_questions = total
+            self.mark_dirty("question")
+        if score and score != self.score:
+            self.score = score
+            self.mark_dirty("sidebar")
+        if status and status != self.status_message:
+            self.status_message = status
+            self.mark_dirty("footer")
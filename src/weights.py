@@ -0,0 +1,86 @@
+import os
+import numpy as np
+
+# Compact on-disk format for the memory model: a single float64 .npy vector
+#
+#   [schema_version, n_features, n_samples_seen, t, intercept,
+#    coef[0..n), mean[0..n), var[0..n)]
+#
+# It holds only what inference and incremental training need, loads with one
+# read (or mmap), and does not depend on the installed sklearn version.
+# Inference only needs NumPy; sklearn is imported solely to keep training.
+
+SCHEMA_VERSION = 1
+HEADER_SIZE = 5
+WEIGHTS_PATH = "models/memory_model.npy"
+
+class RecallWeights:
+    def __init__(self, coef, intercept, mean, var, n_samples, t=1.0):
+        # Copies: sklearn updates coef_/mean_ in place on the next partial_fit
+        self.coef = np.array(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.mean = np.array(mean, dtype=np.float64)
+        self.var = np.array(var, dtype=np.float64)
+        self.n_samples = int(n_samples)
+        self.t = float(t)
+
+    @property
+    def n_features(self):
+        return len(self.coef)
+
+    @property
+    def scale(self):
+        # Same zero-variance handling as StandardScaler
+        scale = np.sqrt(self.var)
+        scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+        return scale
+
+    def predict(self, features):
+        """Pure-NumPy equivalent of model.predict(scaler.transform(features))."""
+        X = (np.asarray(features, dtype=np.float64) - self.mean) / self.scale
+        return X @ self.coef + self.intercept
+
+    def to_array(self):
+        header = [SCHEMA_VERSION, self.n_features, self.n_samples, self.t, self.intercept]
+        return np.concatenate([header, self.coef, self.mean, self.var])
+
+    @classmethod
+    def from_array(cls, arr):
+        arr = np.array(arr, dtype=np.float64) # copy: never keep a mapping of a file we rewrite
+        if len(arr) < HEADER_SIZE or int(arr[0]) != SCHEMA_VERSION:
+            raise ValueError("Unsupported model weights schema")
+        n = int(arr[1])
+        if len(arr) != HEADER_SIZE + 3 * n:
+            raise ValueError("Truncated model weights")
+        body = arr[HEADER_SIZE:]
+        return cls(body[:n], arr[4], body[n:2 * n], body[2 * n:], arr[2], arr[3])
+
+    def save(self, path=WEIGHTS_PATH):
+        """Atomic write: a crash mid-save never leaves a half-written model."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, self.to_array())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=WEIGHTS_PATH):
+        return cls.from_array(np.load(path, mmap_mode="r", allow_pickle=False))
+
+    @classmethod
+    def from_estimators(cls, model, scaler):
+        return cls(model.coef_, model.intercept_[0], scaler.mean_, scaler.var_,
+                   scaler.n_samples_seen_, getattr(model, "t_", 1.0))
+
+    def to_estimators(self, model, scaler):
+        """Restores fitted state onto fresh SGDRegressor / StandardScaler instances."""
+        model.coef_ = self.coef.copy()
+        model.intercept_ = np.array([self.intercept])
+        model.t_ = self.t
+        model.n_features_in_ = self.n_features
+        scaler.mean_ = self.mean.copy()
+        scaler.var_ = self.var.copy()
+        scaler.scale_ = self.scale
+        scaler.n_samples_seen_ = np.int64(self.n_samples)
+        scaler.n_features_in_ = self.n_features
+        return model, scaler
@@ -0,0 +1,32 @@
+import unittest
+import tempfile
+import sys
+import os
+from unittest import mock
+
+sys.path.append(os.getcwd())
+from src import db
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """
+    Each test runs in its own temporary directory: db.DB_PATH is
+    questions.db inside it, and it is the working directory, so models/,
+    data/journal/ and the like land there too. Exit-time flushes of learner
+    models (registered by SessionManager) are switched off, since the
+    directory is gone by then.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        self.old_path = db.DB_PATH
+        os.chdir(self.tmp.name)
+        db.DB_PATH = os.path.join(self.tmp.name, "questions.db")
+        atexit_patch = mock.patch("atexit.register")
+        atexit_patch.start()
+        self.addCleanup(atexit_patch.stop)
+
+    def tearDown(self):
+        db.close()
+        db.DB_PATH = self.old_path
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
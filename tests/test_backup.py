@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, backup
+
+class TestBackup(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = os.path.join(self.tmp.name, "backups")
+        ingestion.save_questions([("GK", f"q{i}", "a", "b", "c", "d", "A") for i in range(1, 4)])
+
+    def count(self):
+        return db.get_connection().execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def test_prune_keeps_newest(self):
+        paths = [backup.create(self.dir, keep=0) for _ in range(3)]
+        self.assertEqual(backup.prune(self.dir, 2), paths[:1])
+        self.assertEqual(backup.list_snapshots(self.dir), paths[1:])
+
+    def test_restore_latest_round_trip(self):
+        backup.create(self.dir)
+        conn = db.get_connection()
+        conn.execute("DELETE FROM questions WHERE id > 1")
+        conn.commit()
+        safety = backup.restore("latest", self.dir)
+        self.assertEqual(self.count(), 3)
+        # The pre-restore state was kept and is now the newest snapshot
+        self.assertEqual(backup.list_snapshots(self.dir)[-1], safety)
+        backup.restore(safety, self.dir)
+        self.assertEqual(self.count(), 1)
+
+    def test_damaged_snapshot_is_refused(self):
+        bad = os.path.join(self.dir, backup.snapshot_name())
+        os.makedirs(self.dir)
+        with open(bad, "wb") as f:
+            f.write(b"not a database")
+        with self.assertRaises(OSError): # not even gzip
+            backup.restore(bad, self.dir)
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(backup.list_snapshots(self.dir), [bad])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, ".restore.tmp")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import sqlite3
+from datetime import datetime
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db
+
+class TestConnectionManager(TempDatabaseTestCase):
+    def test_connection_is_reused(self):
+        self.assertIs(db.get_connection(), db.get_connection())
+
+    def test_pragmas_applied(self):
+        conn = db.get_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1) # NORMAL
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+
+    def test_schema_created(self):
+        conn = db.get_connection()
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        self.assertIn("questions", tables)
+        self.assertIn("progress", tables)
+        self.assertIn("mastery_daily", tables)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], db.SCHEMA_VERSION)
+
+    def test_legacy_progress_migrated(self):
+        legacy = sqlite3.connect(db.DB_PATH)
+        legacy.executescript('''
+            CREATE TABLE questions (id INTEGER PRIMARY KEY AUTOINCREMENT, subject TEXT, question_text TEXT,
+                option_a TEXT, option_b TEXT, option_c TEXT, option_d TEXT, correct_answer TEXT,
+                recall_score REAL DEFAULT 0.0, review_count INTEGER DEFAULT 0, last_reviewed_at TIMESTAMP);
+            CREATE INDEX idx_questions_recall ON questions(recall_score);
+            CREATE TABLE mastery_daily (day INTEGER PRIMARY KEY, gained INTEGER, lost INTEGER, reviews INTEGER);
+            INSERT INTO questions (subject, question_text, correct_answer, recall_score, review_count, last_reviewed_at)
+                VALUES ('GK', 'seen', 'A', 0.9, 2, '2024-01-01T10:00:00'), ('GK', 'new', 'B', 0.0, 0, NULL);
+            INSERT INTO mastery_daily VALUES (738886, 1, 0, 2);
+        ''')
+        legacy.commit()
+        legacy.close()
+
+        conn = db.get_connection()
+        self.assertNotIn("recall_score", {r[1] for r in conn.execute("PRAGMA table_info(questions)")})
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0], 2)
+        rows = conn.execute("SELECT user_id, question_id, recall_score, review_count FROM progress").fetchall()
+        self.assertEqual([tuple(r) for r in rows], [(db.DEFAULT_USER, 1, 0.9, 2)])
+        # Review times become epoch integers; the view still shows the old ISO value
+        ts = conn.execute("SELECT last_reviewed_ts FROM progress").fetchone()[0]
+        self.assertEqual(ts, int(datetime(2024, 1, 1, 10).timestamp()))
+        self.assertEqual(conn.execute("SELECT last_reviewed_at FROM progress_iso").fetchone()[0], "2024-01-01T10:00:00")
+        self.assertEqual(tuple(conn.execute("SELECT user_id, day FROM mastery_daily").fetchone()),
+                         (db.DEFAULT_USER, 738886))
+
+    def test_mastery_buckets_backfilled(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO questions (subject, question_text, correct_answer) VALUES ('GK', 'q', 'A')")
+        ts = int(datetime(2024, 1, 1, 10).timestamp())
+        conn.executemany("INSERT INTO progress (user_id, question_id, recall_score, review_count, last_reviewed_ts) "
+                         "VALUES (?, 1, ?, 1, ?)", [("asha", 0.95, ts), ("ravi", 0.95, ts)])
+        conn.execute("INSERT INTO mastery_daily (user_id, day, gained, lost, reviews) VALUES ('ravi', 5, 1, 0, 1)")
+        conn.execute("PRAGMA user_version=6") # buckets written before v7 seeded them
+        conn.commit()
+        db.close()
+
+        conn = db.get_connection()
+        rows = conn.execute("SELECT user_id, day, gained, reviews FROM mastery_daily ORDER BY user_id").fetchall()
+        day = datetime(2024, 1, 1).toordinal()
+        self.assertEqual([tuple(r) for r in rows], [("asha", day, 1, 1), ("ravi", 5, 1, 1)])
+
+    def test_repointing_path_reopens(self):
+        first = db.get_connection()
+        db.DB_PATH = os.path.join(self.tmp.name, "other.db")
+        self.assertIsNot(db.get_connection(), first)
+
+if __name__ == '__main__':
+    unittest.main()
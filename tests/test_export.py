@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, export, ingestion
+
+class TestExportNpz(TempDatabaseTestCase):
+    def test_round_trip_across_chunks(self):
+        ingestion.save_questions([("GK" if i % 2 else "Science", f"question {i} é", "a", "b", "c", "d", "A")
+                                  for i in range(1, 8)])
+        conn = db.get_connection()
+        conn.execute("INSERT INTO progress (user_id, question_id, recall_score, review_count, last_reviewed_ts) "
+                     "VALUES (?, 3, 0.75, 2, 1700000000)", (db.DEFAULT_USER,))
+        conn.commit()
+
+        path, total = export.export_npz(conn, self.tmp.name, chunk_size=3)
+        self.assertEqual(total, 7)
+        arrays = export.open_npz(path)
+        self.assertEqual(arrays["id"].tolist(), list(range(1, 8)))
+        self.assertEqual([export.text_column(arrays, "question_text", i) for i in range(7)],
+                         [f"question {i} é" for i in range(1, 8)])
+        subjects = [export.text_column(arrays, "subject_dict", int(c)) for c in arrays["subject_code"]]
+        self.assertEqual(subjects, ["GK" if i % 2 else "Science" for i in range(1, 8)])
+        self.assertAlmostEqual(float(arrays["recall_score"][2]), 0.75)
+        self.assertEqual(arrays["review_count"].tolist(), [0, 0, 2, 0, 0, 0, 0])
+        self.assertEqual(arrays["last_reviewed_at"].tolist(), [-1, -1, 1700000000, -1, -1, -1, -1])
+        # np.load reads the same archive
+        with np.load(path) as loaded:
+            self.assertEqual(loaded["question_text__offsets"].tolist(), arrays["question_text__offsets"].tolist())
+
+    def test_empty_export_keeps_column_dtypes(self):
+        path, total = export.export_npz(db.get_connection(), self.tmp.name)
+        self.assertEqual(total, 0)
+        arrays = export.open_npz(path)
+        for name, dtype in export.NUMERIC_COLUMNS.items():
+            self.assertEqual(arrays[name].dtype, np.dtype(dtype), name)
+            self.assertEqual(len(arrays[name]), 0)
+        self.assertEqual(arrays["question_text__offsets"].tolist(), [0])
+
+if __name__ == '__main__':
+    unittest.main()
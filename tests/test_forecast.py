@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from src import db, forecast
+
+class TestForecast(unittest.TestCase):
+    def setUp(self):
+        self.conn = db.connect(":memory:")
+        self.cursor = self.conn.cursor()
+
+    def test_record_review_counts_transitions(self):
+        forecast.record_review(self.cursor, 0.0, 1.0, day=10)   # gained
+        forecast.record_review(self.cursor, 1.0, 1.0, day=10)   # already mastered
+        forecast.record_review(self.cursor, 1.0, 0.0, day=10)   # lost
+        self.cursor.execute("SELECT gained, lost, reviews FROM mastery_daily WHERE day=10")
+        self.assertEqual(tuple(self.cursor.fetchone()), (1, 1, 3))
+
+    def test_buckets_are_per_learner(self):
+        forecast.record_review(self.cursor, 0.0, 1.0, day=10, user_id="asha")
+        forecast.record_review(self.cursor, 0.0, 1.0, day=10, user_id="ravi")
+        forecast.record_review(self.cursor, 0.0, 1.0, day=10, user_id="ravi")
+        self.assertEqual(forecast.load_series(self.cursor, window=3, end_day=10, user_id="asha"), [0, 0, 1])
+        self.assertEqual(forecast.load_series(self.cursor, window=3, end_day=10, user_id="ravi"), [0, 0, 2])
+        self.assertEqual(forecast.load_series(self.cursor, window=3, end_day=10), [0, 0, 0])
+
+    def test_series_fills_idle_days(self):
+        forecast.record_review(self.cursor, 0.0, 1.0, day=100)
+        forecast.record_review(self.cursor, 0.0, 1.0, day=103)
+        series = forecast.load_series(self.cursor, window=10, end_day=104)
+        self.assertEqual(series, [0, 0, 0, 0, 0, 1, 0, 0, 1, 0])
+
+    def test_one_busy_day_is_spread_over_the_window(self):
+        # 28 questions mastered yesterday is about a question a day, not 28
+        forecast.record_reviews(self.cursor, [(0.0, 1.0, 99)] * 28)
+        velocity, _, _ = forecast.fit_velocity(forecast.load_series(self.cursor, window=28, end_day=100))
+        self.assertLess(velocity, 28 * forecast.SMOOTHING)
+
+    def test_constant_velocity_has_tight_bounds(self):
+        velocity, low, high = forecast.fit_velocity([5.0] * 14)
+        self.assertAlmostEqual(velocity, 5.0)
+        self.assertAlmostEqual(low, 5.0)
+        self.assertAlmostEqual(high, 5.0)
+        self.assertAlmostEqual(forecast.eta_days(50, velocity), 10.0)
+
+    def test_noisy_velocity_brackets_eta(self):
+        velocity, low, high = forecast.fit_velocity([2.0, 8.0, 3.0, 7.0, 4.0, 6.0])
+        self.assertLess(low, velocity)
+        self.assertGreater(high, velocity)
+        self.assertEqual(forecast.eta_days(10, 0.0), float('inf'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, session
+from src.journal import SessionJournal
+
+class TestSessionJournal(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([("GK", f"q{i}", "a", "b", "c", "d", "A") for i in range(1, 5)])
+        self.journal = SessionJournal("asha", os.path.join(self.tmp.name, "journal"))
+        self.journal.begin([3, 1, 4, 2], "GK")
+        self.journal.record(0, 3, True, 2.0, 1_700_000_000)
+        self.journal.record(1, 1, False, 4.0, 1_700_000_060)
+        self.journal.close()
+
+    def progress(self):
+        rows = db.get_connection().execute(
+            "SELECT question_id, review_count, last_reviewed_ts FROM progress WHERE user_id = 'asha' ORDER BY question_id")
+        return [tuple(r) for r in rows]
+
+    def test_torn_line_is_dropped_on_reopen(self):
+        with open(self.journal.path, "a", encoding="utf-8") as f:
+            f.write('{"i": 2, "qid"')
+        pending = self.journal.load()
+        self.assertEqual(pending.question_ids, [3, 1, 4, 2])
+        self.assertEqual([a["qid"] for a in pending.answers], [3, 1])
+        self.journal.reopen()
+        self.journal.record(2, 4, True, 1.0, 1_700_000_120)
+        self.journal.close()
+        self.assertEqual([a["qid"] for a in self.journal.load().answers], [3, 1, 4])
+
+    def test_replay_applies_each_answer_once(self):
+        mgr = session.SessionManager("asha")
+        pending = self.journal.load()
+        self.assertEqual(mgr.replay(self.journal, pending), 2)
+        self.assertEqual(mgr.replay(self.journal, pending), 0)
+        self.assertEqual(self.progress(), [(1, 1, 1_700_000_060), (3, 1, 1_700_000_000)])
+        # The learner's model is on disk already, not waiting for an exit flush
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "models", "learners", "asha.npy")))
+        # A later answer in the same session only replays what is new
+        self.journal.reopen()
+        self.journal.record(2, 4, True, 1.0, 1_700_000_120)
+        self.assertEqual(mgr.replay(self.journal, self.journal.load()), 1)
+        self.journal.finish(db.get_connection())
+        self.assertFalse(os.path.exists(self.journal.path))
+        self.assertEqual(db.get_connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from src import keys
+
+class TestKeyReader(unittest.TestCase):
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        self.stream = os.fdopen(read_fd, "rb", buffering=0)
+        self.reader = keys.KeyReader(self.stream)
+
+    def tearDown(self):
+        self.stream.close()
+        os.close(self.write_fd)
+
+    @unittest.skipIf(os.name == "nt", "POSIX input path")
+    def test_arrow_keys_do_not_answer(self):
+        # Up, Left (with a modifier parameter), F1, then a real answer
+        os.write(self.write_fd, b"\x1b[A\x1b[1;5D\x1bOPb")
+        self.assertEqual(self.reader.read_choice(["A", "B", "C", "D"]), "B")
+        self.assertIsNone(self.reader.read(timeout=0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, maintenance
+
+class TestMaintenance(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([("GK", "question %d %s" % (i, "x" * 400), "a", "b", "c", "d", "A") for i in range(2000)])
+        self.conn = db.get_connection()
+
+    def test_new_files_release_pages_incrementally(self):
+        self.assertEqual(maintenance.stats(self.conn)["auto_vacuum"], "incremental")
+        self.conn.execute("DELETE FROM questions WHERE id > 100")
+        self.conn.commit()
+        before = maintenance.stats(self.conn)
+        self.assertGreater(before["fragmentation"], maintenance.AUTO_THRESHOLD)
+        self.assertTrue(maintenance.auto_maintain(self.conn))
+        after = maintenance.stats(self.conn)
+        self.assertEqual(after["free_pages"], 0)
+        self.assertLess(after["pages"], before["pages"])
+        self.assertFalse(maintenance.auto_maintain(self.conn))
+
+    def test_report(self):
+        self.assertEqual(maintenance.quick_check(self.conn), [])
+        maintenance.analyze(self.conn)
+        report = {table: indexes for table, _, _, indexes in maintenance.size_report(self.conn)}
+        self.assertIn("idx_questions_subject_id", [name for name, _, _ in report["questions"]])
+        self.assertIn("sqlite_stat1", report)
+
+if __name__ == '__main__':
+    unittest.main()
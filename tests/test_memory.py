@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, memory
+
+class TestUpdateMany(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        conn = db.get_connection()
+        conn.executemany("INSERT INTO questions (subject, question_text, correct_answer) VALUES ('GK', ?, 'A')",
+                         [("q1",), ("q2",), ("q3",)])
+        conn.commit()
+        self.engine = memory.MemoryEngine(verbose=False)
+        self.engine.clock = lambda: 1_700_000_000.0
+
+    def progress(self, user_id=db.DEFAULT_USER):
+        rows = db.get_connection().execute(
+            "SELECT question_id, review_count, recall_score FROM progress WHERE user_id = ? ORDER BY question_id",
+            (user_id,))
+        return [tuple(r) for r in rows]
+
+    def test_applies_events_in_order(self):
+        applied = self.engine.update_many([
+            (1, True, 2.0),
+            (2, False, 5.0),
+            (1, True, 20.0),   # second review of q1: slow, so a "hard" correct
+            (99, True, 1.0),   # unknown question, skipped
+        ])
+        self.assertEqual(applied, 3)
+        self.assertEqual(self.progress(), [(1, 2, 0.7), (2, 1, 0.0)])
+        reviews = db.get_connection().execute("SELECT SUM(reviews) FROM mastery_daily").fetchone()[0]
+        self.assertEqual(reviews, 3)
+        self.assertTrue(os.path.exists(memory.WEIGHTS_PATH))
+
+    def test_matches_single_updates(self):
+        events = [(1, True, 2.0), (2, True, 12.0), (3, False, 4.0)]
+        self.engine.update_many(events, user_id="batch")
+        for question_id, is_correct, response_time in events:
+            self.engine.update_question_stats(question_id, is_correct, response_time, user_id="single")
+        self.assertEqual(self.progress("batch"), self.progress("single"))
+
+if __name__ == '__main__':
+    unittest.main()
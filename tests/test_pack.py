@@ -0,0 +1,53 @@
+import unittest
+import json
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, memory, pack
+
+class TestStudyPack(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([
+            ("English - Idioms", "Gift of the gab", "present", "talent", "mind", "boast", "B"),
+            ("English - Grammar", "Pick the article ‘an’", "a", "an", "the", "none", "b"),
+            ("GK", "Capital of India", "Delhi", "Agra", "Pune", "Goa", "A"),
+        ])
+        self.engine = memory.MemoryEngine(verbose=False)
+        self.engine.update_many([(1, False, 3.0, 1_700_000_000)], user_id="asha")
+        self.path = os.path.join(self.tmp.name, "english.pack")
+
+    def test_round_trip(self):
+        self.assertEqual(pack.build(db.get_connection(), self.path, "English", "asha"), 2)
+        self.assertIsNone(pack.build(db.get_connection(), self.path, "Maths"))
+        with pack.StudyPack(self.path) as p:
+            self.assertEqual((len(p), p.user_id), (2, "asha"))
+            first, second = p.question(0), p.question(1)
+            self.assertEqual((first["subject"], first["option_b"], first["correct_answer"]),
+                             ("English - Idioms", "talent", "B"))
+            self.assertEqual((first["review_count"], first["last_reviewed_ts"]), (1, 1_700_000_000))
+            self.assertEqual((second["question_text"], second["correct_answer"]), ("Pick the article ‘an’", "B"))
+            self.assertIsNone(second["last_reviewed_ts"])
+            # Weakest reviewed first, then new
+            self.assertEqual(sorted(pack.select(p, 2)), [0, 1])
+
+    def test_sync_applies_answers_once(self):
+        pack.build(db.get_connection(), self.path, "English", "asha")
+        with pack.StudyPack(self.path) as p:
+            header = {"pack": p.pack_id, "user": "asha"}
+        with open(pack.answers_path(self.path), "w", encoding="utf-8") as f:
+            for line in (header, {"qid": 2, "ok": True, "rt": 2.0, "ts": 1_700_000_100}):
+                f.write(json.dumps(line) + "\n")
+            f.write('{"qid": 1, "ok"') # torn by a crash
+        self.assertEqual(pack.unsynced(self.path), 1)
+        self.assertEqual(pack.sync(pack.answers_path(self.path), self.engine), 1)
+        self.assertEqual(pack.sync(pack.answers_path(self.path), self.engine), 0)
+        self.assertEqual(pack.unsynced(self.path), 0)
+        row = db.get_connection().execute(
+            "SELECT review_count, last_reviewed_ts FROM live_progress WHERE user_id = 'asha' AND question_id = 2").fetchone()
+        self.assertEqual(tuple(row), (1, 1_700_000_100))
+
+if __name__ == '__main__':
+    unittest.main()
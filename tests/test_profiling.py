@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.append(os.getcwd())
+from src import profiling
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = profiling.ENABLED
+        profiling.reset()
+
+    def tearDown(self):
+        profiling.ENABLED = self.was_enabled
+        profiling.reset()
+
+    def test_disabled_is_a_no_op(self):
+        profiling.ENABLED = False
+
+        @profiling.timed("op")
+        def double(x):
+            return 2 * x
+
+        self.assertEqual(double(4), 8)
+        with profiling.timed("block"):
+            pass
+        self.assertEqual(profiling.summary()["operations"], {})
+
+    def test_decorator_and_block_are_recorded(self):
+        profiling.enable()
+
+        @profiling.timed("op")
+        def double(x):
+            return 2 * x
+
+        double(1)
+        double(2)
+        with profiling.timed("block"):
+            pass
+        ops = profiling.summary()["operations"]
+        self.assertEqual(ops["op"]["count"], 2)
+        self.assertEqual(ops["block"]["count"], 1)
+
+    def test_percentiles(self):
+        for ms in range(1, 101): # 1..100 ms
+            profiling.record("op", ms / 1000)
+        op = profiling.summary()["operations"]["op"]
+        self.assertAlmostEqual(op["p50_ms"], 51.0) # nearest rank over 100 samples
+        self.assertAlmostEqual(op["p95_ms"], 95.0)
+        self.assertAlmostEqual(op["max_ms"], 100.0)
+        self.assertEqual(profiling.percentile([], 50), 0.0)
+
+    def test_samples_are_capped(self):
+        with mock.patch.object(profiling, "MAX_SAMPLES", 10):
+            for i in range(25):
+                profiling.record("op", float(i))
+        samples = profiling._samples["op"]
+        self.assertLessEqual(len(samples), 10)
+        self.assertEqual(samples[-1], 24.0) # the oldest are the ones dropped
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import tempfile
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from src.registry import ModelRegistry
+from src.weights import RecallWeights
+
+def weights(value):
+    return RecallWeights([value, value], value, [0.0, 0.0], [1.0, 1.0], n_samples=1)
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cold_learner_has_no_model(self):
+        registry = ModelRegistry(self.tmp.name)
+        self.assertIsNone(registry.get("asha"))
+
+    def test_dirty_models_flush_in_batches(self):
+        registry = ModelRegistry(self.tmp.name, flush_every=3)
+        registry.put("a", weights(1.0))
+        registry.put("b", weights(2.0))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        registry.put("c", weights(3.0))
+        self.assertEqual(len(os.listdir(self.tmp.name)), 3)
+        self.assertEqual(registry.dirty, 0)
+
+    def test_flush_ignores_later_chdir(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            registry = ModelRegistry("models/learners")
+            registry.put("asha", weights(1.0))
+            os.chdir(cwd) # e.g. a simulation worker returning before the exit flush
+            registry.flush()
+        finally:
+            os.chdir(cwd)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "models", "learners", "asha.npy")))
+
+    def test_lru_eviction_writes_and_reloads(self):
+        registry = ModelRegistry(self.tmp.name, capacity=2, flush_every=100)
+        registry.put("a", weights(1.0))
+        registry.put("b", weights(2.0))
+        registry.get("a")                 # b is now least recently used
+        registry.put("c", weights(3.0))   # evicts b, writing it out
+        self.assertEqual(len(registry), 2)
+        self.assertTrue(os.path.exists(registry.path("b")))
+        self.assertFalse(os.path.exists(registry.path("a")))
+        self.assertEqual(registry.get("b").intercept, 2.0)
+
+    def test_learner_ids_are_safe_file_names(self):
+        registry = ModelRegistry(self.tmp.name)
+        path = registry.path("../x/y")
+        self.assertEqual(os.path.dirname(path), self.tmp.name)
+        registry.put("../x/y", weights(1.0))
+        registry.flush()
+        np.testing.assert_allclose(ModelRegistry(self.tmp.name).get("../x/y").coef, [1.0, 1.0])
+
+if __name__ == '__main__':
+    unittest.main()
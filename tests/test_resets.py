@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, forecast, ingestion, memory, resets
+
+class TestResets(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([
+            ("GK - Polity", "q1", "a", "b", "c", "d", "A"),
+            ("GK - History", "q2", "a", "b", "c", "d", "A"),
+            ("English", "q3", "a", "b", "c", "d", "A"),
+        ])
+        self.conn = db.get_connection()
+        self.engine = memory.MemoryEngine(verbose=False)
+        self.engine.clock = lambda: 1_700_000_000.0
+        for user_id in ("asha", "ben"):
+            self.engine.update_many([(1, True, 2.0), (2, True, 2.0), (3, True, 2.0)], user_id=user_id)
+
+    def live(self, user_id):
+        rows = self.conn.execute("SELECT question_id, review_count FROM live_progress WHERE user_id = ? ORDER BY question_id",
+                                 (user_id,))
+        return [tuple(r) for r in rows]
+
+    def stored(self):
+        return self.conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+
+    def test_reset_hides_rows_without_deleting(self):
+        self.assertEqual(resets.reset(self.conn, "asha"), 1)
+        self.assertEqual(self.live("asha"), [])
+        self.assertEqual(self.live("ben"), [(1, 1), (2, 1), (3, 1)])
+        self.assertEqual(self.stored(), 6)
+        # The next review starts from scratch, in the new epoch
+        self.engine.update_question_stats(1, True, 2.0, user_id="asha")
+        self.assertEqual(self.live("asha"), [(1, 1)])
+
+    def test_subject_reset_covers_subtree(self):
+        resets.reset(self.conn, "asha", "GK")
+        self.assertEqual(self.live("asha"), [(3, 1)])
+        self.assertIsNone(resets.reset(self.conn, "asha", "Maths"))
+
+    def test_subject_reset_takes_gains_out_of_the_forecast(self):
+        def net(user_id):
+            return self.conn.execute("SELECT SUM(gained - lost) FROM mastery_daily WHERE user_id = ?",
+                                     (user_id,)).fetchone()[0]
+        mastered = lambda user_id, where="": self.conn.execute(
+            f"SELECT COUNT(*) FROM live_progress p JOIN questions q ON q.id = p.question_id "
+            f"WHERE p.user_id = ? AND p.recall_score >= ? {where}", (user_id, forecast.MASTERY_THRESHOLD)).fetchone()[0]
+        self.assertEqual(net("asha"), mastered("asha"))
+        self.assertGreater(mastered("asha", "AND q.subject LIKE 'GK%'"), 0)
+        resets.reset(self.conn, "asha", "GK")
+        # The buckets count only what is still mastered: the English question
+        self.assertEqual(net("asha"), mastered("asha"))
+        self.assertEqual(net("ben"), 3)
+
+    def test_collect_deletes_stale_rows_in_batches(self):
+        resets.reset(self.conn, "asha", "GK")
+        self.engine.update_question_stats(2, True, 2.0, user_id="asha") # live again, must survive
+        self.assertEqual(resets.collect(self.conn, limit=1), 1)
+        self.assertEqual(resets.collect(self.conn), 2) # the review_log events of q1 and q2 from before the reset
+        self.assertEqual(resets.collect(self.conn), 0)
+        self.assertEqual(self.stored(), 5)
+        self.assertEqual(self.live("asha"), [(2, 1), (3, 1)])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM progress_resets").fetchone()[0], 0)
+        # The epoch survives the cleanup, so the next reset still supersedes today's rows
+        self.assertEqual(resets.reset(self.conn, "asha"), 2)
+        self.assertEqual(self.live("asha"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, search, session
+
+class TestSearch(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([
+            ("GK - Polity", "Article 370 of the Constitution dealt with which state?", "Jammu and Kashmir", "Punjab", "Assam", "Goa", "A"),
+            ("GK - Polity", "Who chaired the drafting committee?", "Nehru", "Ambedkar", "Patel", "Prasad", "B"),
+            ("English", "Pick the synonym of 'constitution'", "Physique", "Article", "Law", "Rule", "A"),
+        ])
+
+    def ids(self, *args, **kwargs):
+        return [r["id"] for r in search.search(*args, **kwargs)]
+
+    def test_query_words_are_quoted(self):
+        self.assertEqual(search.to_match('Article 370'), '"Article" "370"')
+        self.assertEqual(search.to_match('consti* AND "('), '"consti"* "AND"')
+        self.assertEqual(search.to_match('?!'), '')
+
+    def test_question_hits_rank_above_option_hits(self):
+        # q1 has "article" in the question, q3 only in an option
+        self.assertEqual(self.ids("article"), [1, 3])
+        self.assertEqual(self.ids("article 370"), [1])
+        self.assertEqual(self.ids("consti*", subject="English"), [3])
+        self.assertIn("[Article]", search.search("article")[0]["snippet"])
+        # A hit only in an option is highlighted there, not in the question text
+        self.assertEqual(search.search("physique")[0]["snippet"], "[Physique]")
+
+    def test_limit_none_returns_every_match(self):
+        self.assertEqual(len(self.ids("constitution", limit=1)), 1)
+        self.assertEqual(sorted(self.ids("constitution", limit=None)), [1, 3])
+
+    def test_index_follows_edits(self):
+        conn = db.get_connection()
+        conn.execute("UPDATE questions SET question_text = 'Who chaired the drafting panel?' WHERE id = 2")
+        conn.execute("DELETE FROM questions WHERE id = 1")
+        conn.commit()
+        self.assertEqual(self.ids("committee"), [])
+        self.assertEqual(self.ids("panel"), [2])
+        self.assertEqual(self.ids("370"), [])
+
+    def test_session_limited_to_results(self):
+        mgr = session.SessionManager()
+        questions = mgr.get_questions_for_session(10, question_ids=self.ids("constitution"))
+        self.assertEqual(sorted(q["id"] for q in questions), [1, 3])
+
+if __name__ == '__main__':
+    unittest.main()
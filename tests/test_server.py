@@ -0,0 +1,91 @@
+import unittest
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, server
+
+class TestAPIServer(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([("GK", f"q{i}", "a", "b", "c", "d", "B") for i in range(1, 4)])
+        db.close()
+
+        self.api = server.APIServer(read_threads=2, window=0.001)
+        started = threading.Event()
+        def ready(srv):
+            self.loop = asyncio.get_running_loop()
+            self.srv = srv
+            self.port = srv.sockets[0].getsockname()[1]
+            started.set()
+        def serve():
+            try:
+                asyncio.run(self.api.serve("127.0.0.1", 0, ready))
+            except asyncio.CancelledError:
+                pass # stopped by tearDown
+        self.thread = threading.Thread(target=serve, daemon=True)
+        self.thread.start()
+        self.assertTrue(started.wait(5))
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.srv.close)
+        self.thread.join(5)
+        super().tearDown()
+
+    def request(self, method, path, payload=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request(method, path, body=json.dumps(payload) if payload is not None else None)
+        response = conn.getresponse()
+        result = response.status, json.loads(response.read())
+        conn.close()
+        return result
+
+    def raw(self, data):
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            sock.sendall(data)
+            return sock.recv(65536).decode("latin-1")
+
+    def test_session_and_answer(self):
+        status, body = self.request("GET", "/session?user=asha&count=2")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body["questions"]), 2)
+        self.assertNotIn("correct_answer", body["questions"][0])
+
+        status, body = self.request("POST", "/answer", {"user": "asha", "question_id": 1, "answer": "b",
+                                                        "response_time": 2.5})
+        self.assertEqual((status, body), (200, {"correct": True, "correct_answer": "B"}))
+        # The reply only comes once the writer's batch is committed
+        row = db.get_connection().execute(
+            "SELECT review_count FROM live_progress WHERE user_id = 'asha' AND question_id = 1").fetchone()
+        self.assertEqual(row[0], 1)
+
+        self.assertEqual(self.request("POST", "/answer", {"question_id": 1, "answer": "E"})[0], 400)
+        self.assertEqual(self.request("POST", "/answer", {"question_id": 99, "answer": "A"})[0], 404)
+
+    def test_bad_content_length(self):
+        for value in ("abc", "-5"):
+            reply = self.raw(f"POST /answer HTTP/1.1\r\nContent-Length: {value}\r\n\r\n".encode("latin-1"))
+            self.assertTrue(reply.startswith("HTTP/1.1 400"), reply)
+        reply = self.raw(b"POST /answer HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n")
+        self.assertTrue(reply.startswith("HTTP/1.1 413"), reply)
+
+    def test_internal_errors_are_generic(self):
+        def broken():
+            raise RuntimeError("no such table: secret_table at /home/me/data/questions.db")
+        self.api._subjects = broken
+        with open(os.devnull, "w") as quiet:
+            stderr, sys.stderr = sys.stderr, quiet
+            try:
+                status, body = self.request("GET", "/subjects")
+            finally:
+                sys.stderr = stderr
+        self.assertEqual((status, body), (500, {"error": "internal server error"}))
+
+if __name__ == '__main__':
+    unittest.main()
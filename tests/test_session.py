@@ -0,0 +1,46 @@
+import unittest
+import threading
+import time
+import sys
+import os
+from io import StringIO
+from unittest import mock
+from rich.console import Console
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import ingestion, memory, session
+
+class SlowEngine:
+    built = 0
+
+    def __init__(self, **kwargs):
+        SlowEngine.built += 1
+        time.sleep(0.05) # long enough for the other thread to arrive
+        self.registry = mock.Mock()
+
+class TestSessionManager(TempDatabaseTestCase):
+    def test_engine_built_once_across_threads(self):
+        SlowEngine.built = 0
+        mgr = session.SessionManager()
+        engines = []
+        with mock.patch.object(memory, "MemoryEngine", SlowEngine), mock.patch("atexit.register") as register:
+            threads = [threading.Thread(target=lambda: engines.append(mgr.mem_engine)) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(SlowEngine.built, 1)
+        self.assertEqual(register.call_count, 1)
+        self.assertTrue(all(e is engines[0] for e in engines))
+
+    def test_unknown_subject_is_reported(self):
+        ingestion.save_questions([("GK", "q1", "a", "b", "c", "d", "A")])
+        out = StringIO()
+        with mock.patch.object(session, "console", Console(file=out, width=120)):
+            session.SessionManager().run_session(count=2, subject="Nonesuch")
+        self.assertIn("No subject matches 'Nonesuch'.", out.getvalue())
+        self.assertNotIn("ingest a PDF", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
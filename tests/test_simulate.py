@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import sqlite3
+from unittest import mock
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, simulate
+
+class TestSimulate(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # A bank from before any migration (user_version 0)
+        self.source = os.path.join(self.tmp.name, "legacy.db")
+        legacy = sqlite3.connect(self.source)
+        legacy.executescript('''
+            CREATE TABLE questions (id INTEGER PRIMARY KEY AUTOINCREMENT, subject TEXT, question_text TEXT,
+                option_a TEXT, option_b TEXT, option_c TEXT, option_d TEXT, correct_answer TEXT,
+                recall_score REAL DEFAULT 0.0, review_count INTEGER DEFAULT 0, last_reviewed_at TIMESTAMP);
+            INSERT INTO questions (subject, question_text, option_a, option_b, option_c, option_d, correct_answer)
+                VALUES ('GK', 'q1', 'a', 'b', 'c', 'd', 'A'), ('GK', 'q2', 'a', 'b', 'c', 'd', 'B');
+        ''')
+        legacy.commit()
+        legacy.close()
+
+    def test_runs_on_unmigrated_copy_and_restores_path(self):
+        caller = os.path.join(self.tmp.name, "caller")
+        os.makedirs(caller)
+        cwd = os.getcwd()
+        os.chdir(caller)
+        try:
+            with mock.patch("atexit.register") as register:
+                stats = simulate.simulate(learners=1, source=self.source, sessions=2, count=2)
+        finally:
+            os.chdir(cwd)
+        # The scratch learner's models were written (and deleted) with the scratch
+        # copy: nothing is left for an exit hook to flush
+        self.assertFalse(os.path.exists(os.path.join(caller, "models")))
+        hooks = [c.args[0] for c in register.call_args_list]
+        flushes = [f for f in hooks if getattr(f, "__name__", "") == "flush"]
+        self.assertEqual(len(flushes), 1)
+        self.assertEqual(flushes[0](), 0)
+        self.assertEqual(stats["reviews"], 4)
+        self.assertEqual(db.DB_PATH, os.path.join(self.tmp.name, "questions.db"))
+        # The source bank is left as it was
+        source = sqlite3.connect(self.source)
+        self.assertEqual(source.execute("PRAGMA user_version").fetchone()[0], 0)
+        source.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, memory, session, subjects
+from src.store import QuestionStore
+
+class TestQuestionStore(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        ingestion.save_questions([("GK" if i % 2 else "English", f"q{i}", "a", "b", "c", "d", "A") for i in range(1, 11)])
+        conn = db.get_connection()
+        # Questions 1-4 reviewed, 1 the weakest
+        conn.executemany("INSERT INTO progress (user_id, question_id, review_count, last_reviewed_ts, recall_score) VALUES (?, ?, 1, 1700000000, ?)",
+                         [(db.DEFAULT_USER, 1, 0.1), (db.DEFAULT_USER, 2, 0.9), (db.DEFAULT_USER, 3, 0.5), (db.DEFAULT_USER, 4, 0.3)])
+        conn.commit()
+        self.store = QuestionStore.load()
+
+    def select(self, count, user_id=db.DEFAULT_USER, **kwargs):
+        return self.store.select(user_id, count, rng=np.random.default_rng(0), **kwargs)
+
+    def test_same_rows_as_sqlite(self):
+        sql = {q["id"]: q for q in session.SessionManager().get_questions_for_session(10)}
+        mem = {q["id"]: q for q in self.select(10)}
+        self.assertEqual(sql, mem)
+
+    def test_weakest_first_and_filters(self):
+        # 4 questions: 2 weakest reviewed, then new/random fill
+        ids = {q["id"] for q in self.select(4)}
+        self.assertTrue({1, 4} <= ids)
+        english = subjects.resolve(db.get_connection(), "English")
+        self.assertEqual(sorted(q["id"] for q in self.select(10, subject_ids=english)), [2, 4, 6, 8, 10])
+        self.assertEqual(sorted(q["id"] for q in self.select(10, question_ids=[3, 5, 99])), [3, 5])
+
+    def test_write_through(self):
+        self.select(1, user_id="asha")  # loads asha's (empty) columns
+        engine = memory.MemoryEngine(verbose=False, store=self.store)
+        engine.clock = lambda: 1_700_000_500.0
+        engine.update_question_stats(7, False, 2.0, user_id="asha")
+        engine.update_many([(8, True, 2.0), (8, True, 2.0)], user_id="asha")
+        reviewed = {q["id"]: (q["review_count"], q["recall_score"], q["last_reviewed_ts"])
+                    for q in self.select(10, user_id="asha") if q["review_count"]}
+        self.assertEqual(reviewed, {7: (1, 0.0, 1_700_000_500), 8: (2, 1.0, 1_700_000_500)})
+
+if __name__ == '__main__':
+    unittest.main()
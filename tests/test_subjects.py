@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from src import db, subjects
+
+class TestSubjects(unittest.TestCase):
+    def setUp(self):
+        self.conn = db.connect(":memory:")
+        cursor = self.conn.cursor()
+        for path, count in (("English - Grammar", 3), ("English - Vocabulary", 2), ("GK - Computer", 4), ("GK", 1)):
+            subject_id = subjects.ensure(cursor, path)
+            cursor.executemany("INSERT INTO questions (subject, subject_id, question_text) VALUES (?, ?, 'q')",
+                               [(path, subject_id)] * count)
+
+    def paths(self, ids):
+        rows = self.conn.execute("SELECT path FROM subjects WHERE id IN (%s)" % ",".join("?" * len(ids)), ids)
+        return sorted(r[0] for r in rows)
+
+    def test_topic_is_parent_of_subtopics(self):
+        row = self.conn.execute('''
+            SELECT p.path FROM subjects s JOIN subjects p ON p.id = s.parent_id WHERE s.path = 'GK - Computer'
+        ''').fetchone()
+        self.assertEqual(row[0], "GK")
+
+    def test_topic_filter_includes_subtree(self):
+        self.assertEqual(self.paths(subjects.resolve(self.conn, "english")),
+                         ["English", "English - Grammar", "English - Vocabulary"])
+
+    def test_prefix_filter(self):
+        self.assertEqual(self.paths(subjects.resolve(self.conn, "GK - Comp")), ["GK - Computer"])
+        self.assertEqual(subjects.resolve(self.conn, "Maths"), [])
+
+    def test_counts_and_rollups(self):
+        self.assertEqual(subjects.list_subjects(self.conn),
+                         ["English - Grammar", "English - Vocabulary", "GK", "GK - Computer"])
+        self.assertEqual(subjects.rollup(self.conn, "English"), 5)
+        self.assertEqual(subjects.rollup(self.conn, "GK"), 5)
+        self.assertEqual(subjects.rollup(self.conn, "Computer"), 4)
+        self.conn.execute("DELETE FROM questions WHERE subject = 'GK'")
+        self.assertEqual(subjects.rollup(self.conn, "GK"), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.getcwd())
+from tests.helpers import TempDatabaseTestCase
+from src import db, ingestion, memory, sync
+
+QUESTIONS = [("GK", f"q{i}", "a", "b", "c", "d", "A") for i in range(1, 5)]
+
+class TestSync(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.engine = memory.MemoryEngine(verbose=False)
+        # Two devices; the laptop ingested the same questions in another order
+        self.use("phone.db")
+        ingestion.save_questions(QUESTIONS)
+        self.engine.update_many([(1, True, 2.0, 1_700_000_000), (2, False, 2.0, 1_700_000_010)], user_id="asha")
+        self.use("laptop.db")
+        ingestion.save_questions(QUESTIONS[::-1])
+        self.engine.update_many([(4, True, 12.0, 1_700_000_020)], user_id="asha") # q1 here
+
+    def use(self, name):
+        db.DB_PATH = os.path.join(self.tmp.name, name)
+        return db.get_connection()
+
+    def transfer(self, source, target, peer=None):
+        path = os.path.join(self.tmp.name, f"{source}.jsonl.gz")
+        sync.export(self.use(source), path, peer=peer)
+        return sync.import_file(self.use(target), path)
+
+    def progress(self, name):
+        rows = self.use(name).execute('''
+            SELECT q.question_text, p.review_count, p.last_reviewed_ts, p.recall_score
+            FROM live_progress p JOIN questions q ON q.id = p.question_id WHERE p.user_id = 'asha' ORDER BY 1
+        ''')
+        return [tuple(r) for r in rows]
+
+    def test_merge_converges_and_is_idempotent(self):
+        result = self.transfer("phone.db", "laptop.db")
+        self.assertEqual((result["new"], result["skipped"]), (2, 0))
+        self.assertEqual(self.transfer("phone.db", "laptop.db")["new"], 0)
+        self.transfer("laptop.db", "phone.db")
+        expected = [("q1", 2, 1_700_000_020, 0.7), ("q2", 1, 1_700_000_010, 0.0)]
+        self.assertEqual(self.progress("laptop.db"), expected)
+        self.assertEqual(self.progress("phone.db"), expected)
+
+    def test_peer_watermark_only_sends_new_reviews(self):
+        self.transfer("phone.db", "laptop.db", peer="laptop")
+        self.assertEqual(self.transfer("phone.db", "laptop.db", peer="laptop")["read"], 0)
+        self.use("phone.db")
+        self.engine.update_many([(3, True, 2.0, 1_700_000_030)], user_id="asha")
+        self.assertEqual(self.transfer("phone.db", "laptop.db", peer="laptop")["read"], 1)
+        self.assertIn(("q3", 1, 1_700_000_030, 1.0), self.progress("laptop.db"))
+
+if __name__ == '__main__':
+    unittest.main()
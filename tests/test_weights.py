@@ -0,0 +1,63 @@
+import unittest
+import tempfile
+import subprocess
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.getcwd())
+from src.weights import RecallWeights
+
+class TestRecallWeights(unittest.TestCase):
+    def _trained(self):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+        model = SGDRegressor(loss='squared_error', penalty='l2', learning_rate='invscaling', eta0=0.01)
+        scaler = StandardScaler()
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            X = rng.uniform(0, 10, size=(1, 2))
+            scaler.partial_fit(X)
+            model.partial_fit(scaler.transform(X), [rng.uniform()])
+        return model, scaler
+
+    def test_numpy_predict_matches_sklearn(self):
+        model, scaler = self._trained()
+        weights = RecallWeights.from_estimators(model, scaler)
+        X = np.array([[1.0, 0.5], [4.0, 12.0]])
+        np.testing.assert_allclose(weights.predict(X), model.predict(scaler.transform(X)))
+
+    def test_roundtrip_and_resume_training(self):
+        model, scaler = self._trained()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.npy")
+            RecallWeights.from_estimators(model, scaler).save(path)
+            loaded = RecallWeights.load(path)
+
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+        model2, scaler2 = loaded.to_estimators(
+            SGDRegressor(loss='squared_error', penalty='l2', learning_rate='invscaling', eta0=0.01),
+            StandardScaler())
+        # One more identical step on both must land on identical weights
+        X = np.array([[3.0, 2.0]])
+        for m, s in ((model, scaler), (model2, scaler2)):
+            s.partial_fit(X)
+            m.partial_fit(s.transform(X), [1.0])
+        np.testing.assert_allclose(model2.coef_, model.coef_)
+        np.testing.assert_allclose(scaler2.mean_, scaler.mean_)
+
+    def test_rejects_unknown_schema(self):
+        with self.assertRaises(ValueError):
+            RecallWeights.from_array([99, 0, 0, 1, 0])
+
+    def test_inference_without_sklearn(self):
+        code = ("import sys; from src.weights import RecallWeights; "
+                "w = RecallWeights([0.1, -0.2], 0.5, [1, 2], [1, 4], 10); "
+                "w.predict([[1.0, 2.0]]); print('sklearn' in sys.modules)")
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.getcwd())
+        self.assertEqual(out.stdout.strip(), "False")
+
+if __name__ == '__main__':
+    unittest.main()